@@ -0,0 +1,95 @@
+import json
+import os
+import random
+
+QUOTES = ["USD", "EUR", "XBT"]
+
+
+def get_pair_names(num_pairs):
+    return [f"BENCH{index}USD" for index in range(num_pairs)]
+
+
+def generate_ticker_payload(num_pairs, seed=0):
+    rng = random.Random(seed)
+    result = {}
+    for index in range(num_pairs):
+        name = f"BENCH{index}{QUOTES[index % len(QUOTES)]}"
+        price = rng.uniform(0.01, 1000)
+        low, high = price * rng.uniform(0.85, 1), price * rng.uniform(1, 1.2)
+        volume = rng.uniform(1e3, 1e7)
+        result[name] = {
+            "a": [f"{price * 1.001:.6f}", "1", "1.000"],
+            "b": [f"{price * 0.999:.6f}", "1", "1.000"],
+            "c": [f"{price:.6f}", "0.5"],
+            "v": [f"{volume / 2:.4f}", f"{volume:.4f}"],
+            "p": [f"{price:.6f}", f"{price:.6f}"],
+            "t": [rng.randint(10, 1000), rng.randint(1000, 5000)],
+            "l": [f"{low:.6f}", f"{low:.6f}"],
+            "h": [f"{high:.6f}", f"{high:.6f}"],
+            "o": f"{price * rng.uniform(0.95, 1.05):.6f}",
+        }
+    return result
+
+
+def generate_ohlc_rows(num_candles, seed=0, interval_in_seconds=3600, start=1700000000):
+    rng = random.Random(seed)
+    rows = []
+    close = rng.uniform(1, 100)
+    for index in range(num_candles):
+        open_price = close * rng.uniform(0.98, 1.02)
+        close = open_price * rng.uniform(0.98, 1.02)
+        high = max(open_price, close) * rng.uniform(1, 1.02)
+        low = min(open_price, close) * rng.uniform(0.97, 1)
+        volume = rng.uniform(10, 1000)
+        rows.append(
+            [
+                start + index * interval_in_seconds,
+                f"{open_price:.6f}",
+                f"{high:.6f}",
+                f"{low:.6f}",
+                f"{close:.6f}",
+                f"{(open_price + close) / 2:.6f}",
+                f"{volume:.8f}",
+                rng.randint(1, 500),
+            ]
+        )
+    return rows
+
+
+def generate_ohlc_payloads(num_pairs, num_candles):
+    return {
+        pair: {pair: generate_ohlc_rows(num_candles, seed), "last": 0}
+        for seed, pair in enumerate(get_pair_names(num_pairs))
+    }
+
+
+def generate_trades_history_payload(num_trades, seed=0):
+    rng = random.Random(seed)
+    trades = {}
+    for index in range(num_trades):
+        price = rng.uniform(1, 100)
+        volume = rng.uniform(0.1, 50)
+        trades[f"T{index:06d}-BENCH"] = {
+            "ordertxid": f"O{index:06d}",
+            "pair": f"BENCH{index % 50}USD",
+            "time": 1700000000 + index * 60.5,
+            "type": "buy" if rng.random() < 0.6 else "sell",
+            "ordertype": "limit",
+            "price": f"{price:.5f}",
+            "cost": f"{price * volume:.5f}",
+            "fee": f"{price * volume * 0.0026:.5f}",
+            "vol": f"{volume:.8f}",
+            "margin": "0.00000",
+            "misc": "",
+        }
+    return {"trades": trades, "count": num_trades}
+
+
+def load_payload(payload_directory, file_name, default):
+    # Recorded responses, when present, replace the synthetic ones.
+    if payload_directory is not None:
+        path = os.path.join(payload_directory, file_name)
+        if os.path.exists(path):
+            with open(path) as payload_file:
+                return json.load(payload_file)["result"]
+    return default
@@ -0,0 +1,267 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Callable, Dict, List
+
+from benchmarks.fixtures import (
+    generate_ohlc_payloads,
+    generate_ticker_payload,
+    generate_trades_history_payload,
+    load_payload,
+)
+from kraken_api.kraken_client import KrakenClient
+from kraken_api.model.candle import Candle
+from kraken_api.model.candle_matrix import CandleMatrix
+from kraken_api.model.candle_series import CandleSeries
+from trader.strategy.profiler import profiler
+from trader.strategy.strategy import (
+    StrategyEvaluator,
+    batch_strategies,
+    strategy_order,
+)
+from trader.trade_finder import (
+    evaluate_market_delta_strategies,
+    evaluate_strategies_in_batch,
+    filter_watchlist,
+)
+
+Measurement = namedtuple("Measurement", ["median_s", "min_s", "peak_kb", "allocations"])
+
+
+class Fixtures:
+    def __init__(self, num_pairs, num_candles, payload_directory=None):
+        self.num_pairs = num_pairs
+        self.num_candles = num_candles
+        self.ticker_payload = load_payload(
+            payload_directory, "ticker.json", generate_ticker_payload(num_pairs)
+        )
+        self.ohlc_payloads = generate_ohlc_payloads(num_pairs, num_candles)
+        self.trades_history_payload = load_payload(
+            payload_directory,
+            "trades_history.json",
+            generate_trades_history_payload(num_pairs * 10),
+        )
+        self.tickers = KrakenClient.parse_ticker_data(self.ticker_payload)
+        self.next_tickers = KrakenClient.parse_ticker_data(
+            generate_ticker_payload(num_pairs, seed=1)
+        )
+        self.candles_by_ticker = {
+            pair: CandleSeries.from_rows(payload[pair])
+            for pair, payload in self.ohlc_payloads.items()
+        }
+        self.candle_matrix = CandleMatrix(self.candles_by_ticker)
+
+    def __str__(self):
+        return f"pairs={self.num_pairs},history={self.num_candles}"
+
+
+class NullDiscordBot:
+    def send_basic_message(self, channel_name, message):
+        pass
+
+
+benchmarks: Dict[str, Callable[[Fixtures], Callable[[], object]]] = {}
+
+
+def add_benchmark(benchmark):
+    benchmarks[benchmark.__name__] = benchmark
+
+    return benchmark
+
+
+@add_benchmark
+def ticker_parsing(fixtures: Fixtures):
+    return lambda: KrakenClient.parse_ticker_data(fixtures.ticker_payload)
+
+
+@add_benchmark
+def candle_objects(fixtures: Fixtures):
+    return lambda: [
+        [Candle(*row) for row in payload[pair]]
+        for pair, payload in fixtures.ohlc_payloads.items()
+    ]
+
+
+@add_benchmark
+def candle_series(fixtures: Fixtures):
+    return lambda: [
+        CandleSeries.from_rows(payload[pair])
+        for pair, payload in fixtures.ohlc_payloads.items()
+    ]
+
+
+@add_benchmark
+def trade_history_parsing(fixtures: Fixtures):
+    return lambda: KrakenClient.parse_trade_history(fixtures.trades_history_payload)
+
+
+@add_benchmark
+def watchlist_filtering(fixtures: Fixtures):
+    return lambda: filter_watchlist(fixtures.tickers)
+
+
+@add_benchmark
+def delta_strategy_sweep(fixtures: Fixtures):
+    return lambda: evaluate_market_delta_strategies(
+        fixtures.tickers, fixtures.next_tickers, NullDiscordBot()
+    )
+
+
+@add_benchmark
+def strategy_sweep(fixtures: Fixtures):
+    def sweep():
+        candles_by_ticker = {
+            pair: CandleSeries.from_rows(payload[pair])
+            for pair, payload in fixtures.ohlc_payloads.items()
+        }
+        evaluate_strategies_in_batch(candles_by_ticker, {}, NullDiscordBot())
+
+    return sweep
+
+
+@add_benchmark
+def scalar_strategy_sweep(fixtures: Fixtures):
+    def sweep():
+        strategy_evaluator = StrategyEvaluator()
+        # Slicing drops cached indicator state so each run starts cold.
+        return [
+            strategy_evaluator.evaluate(candles[:])
+            for candles in fixtures.candles_by_ticker.values()
+        ]
+
+    return sweep
+
+
+def get_strategy_benchmarks(fixtures: Fixtures):
+    strategy_benchmarks = {}
+    for strategy_node in strategy_order:
+        strategy_benchmarks[f"strategy:{strategy_node.name}"] = (
+            lambda strategy=strategy_node.strategy: [
+                strategy(candles[:]) for candles in fixtures.candles_by_ticker.values()
+            ]
+        )
+    for name, batch_strategy in batch_strategies.items():
+        strategy_benchmarks[f"batch_strategy:{name}"] = (
+            lambda batch_strategy=batch_strategy: batch_strategy(fixtures.candle_matrix)
+        )
+    return strategy_benchmarks
+
+
+def measure(run: Callable[[], object], repeat) -> Measurement:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = run()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocations = sum(
+        max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno")
+    )
+    del result
+
+    return Measurement(
+        statistics.median(timings), min(timings), peak / 1024, allocations
+    )
+
+
+def run_benchmarks(pair_counts, history_lengths, repeat, payload_directory=None):
+    results = {}
+    for num_pairs in pair_counts:
+        for num_candles in history_lengths:
+            fixtures = Fixtures(num_pairs, num_candles, payload_directory)
+            runs = {name: setup(fixtures) for name, setup in benchmarks.items()}
+            runs |= get_strategy_benchmarks(fixtures)
+            for name, run in runs.items():
+                key = f"{name}[{fixtures}]"
+                results[key] = measure(run, repeat)
+                print(format_measurement(key, results[key]), flush=True)
+    return results
+
+
+def format_measurement(key, measurement: Measurement, baseline: Measurement = None):
+    line = (
+        f"{key:<80} median={measurement.median_s * 1000:10.3f}ms "
+        f"peak={measurement.peak_kb:10.1f}KiB allocations={measurement.allocations}"
+    )
+    if baseline is not None:
+        line += f" ({measurement.median_s / baseline.median_s:.2f}x baseline)"
+    return line
+
+
+def find_regressions(
+    results: Dict[str, Measurement], baseline: Dict[str, Measurement], tolerance
+) -> List[str]:
+    regressions = []
+    for key, measurement in results.items():
+        if key not in baseline:
+            continue
+        expected = baseline[key]
+        if measurement.median_s > expected.median_s * (1 + tolerance) or (
+            measurement.peak_kb > expected.peak_kb * (1 + tolerance)
+        ):
+            regressions.append(format_measurement(key, measurement, expected))
+    return regressions
+
+
+def save_results(path, results: Dict[str, Measurement]):
+    with open(path, "w") as out:
+        json.dump({key: value._asdict() for key, value in results.items()}, out, indent=2)
+
+
+def load_results(path) -> Dict[str, Measurement]:
+    with open(path) as results_file:
+        return {
+            key: Measurement(**value) for key, value in json.load(results_file).items()
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the client parsing and strategy hot paths offline."
+    )
+    parser.add_argument("--pairs", type=int, nargs="+", default=[100, 700])
+    parser.add_argument("--history", type=int, nargs="+", default=[336, 720])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--payload-dir", default=None)
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--profile-sample-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler.enable(args.profile_sample_rate)
+    results = run_benchmarks(args.pairs, args.history, args.repeat, args.payload_dir)
+    if args.profile:
+        # Profiled timings carry the profiler's overhead, so they are not
+        # compared against the baseline.
+        print(profiler.format_report(limit=20))
+        sys.exit(0)
+    if args.save_baseline:
+        save_results(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+        sys.exit(0)
+
+    try:
+        baseline = load_results(args.baseline)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        sys.exit(0)
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        print("Regressions against baseline:")
+        print("\n".join(regressions))
+        sys.exit(1)
+    print("No regressions against baseline")
@@ -4,6 +4,8 @@ import time
 
 import requests
 
+from discord_bot.notification_queue import NotificationQueue
+
 API_PATH = "https://discord.com/api/v10"
 CHANNELS_PATH = f"{API_PATH}/channels"
 
@@ -20,9 +22,24 @@ class DiscordBot:
             content = list(csv.DictReader(channel_file))
         return {row["name"]: row["id"] for row in content}
 
-    def __init__(self):
+    def get_pending_path():
+        cur_dir = os.path.dirname(os.path.abspath(__file__))
+        return f"{cur_dir}/pending-notifications.json"
+
+    def __init__(self, coalesce_window=2):
         self.bot_token = DiscordBot.get_bot_token()
         self.channel_information = DiscordBot.get_channel_information()
+        self.session = requests.Session()
+        self.session.headers.update(self.get_auth_header())
+        # Alerts are queued and sent from a background thread so evaluation
+        # loops never wait on Discord.
+        self.notifications = NotificationQueue(
+            self._send_message,
+            coalesce_window,
+            DiscordBot.get_pending_path(),
+            channels=self.channel_information.keys(),
+        )
+        self.notifications.start()
 
     def get_nonce():
         return time.time_ns()
@@ -31,19 +48,21 @@ class DiscordBot:
         return {"Authorization": f"Bot {self.bot_token}"}
 
     def send_basic_message(self, channel_name, message):
-        body = {"content": message}
-        self._send_message(channel_name, body)
-
-    def _send_message(self, channel_name, message):
-        headers = self.get_auth_header() | {
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
-        new_body = message | {"nonce": DiscordBot.get_nonce()}
+        self.notifications.enqueue(channel_name, message)
+
+    def _send_message(self, channel_name, content) -> requests.Response:
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        body = {"content": content, "nonce": DiscordBot.get_nonce()}
         url = f"{CHANNELS_PATH}/{self.channel_information[channel_name]}/messages"
 
-        requests.post(url, new_body, headers=headers)
+        return self.session.post(url, body, headers=headers, timeout=10)
+
+    def close(self, timeout=10):
+        self.notifications.stop(timeout)
+        self.session.close()
 
 
 if __name__ == "__main__":
     bot = DiscordBot()
     bot.send_basic_message("general", "Hi again.")
+    bot.close()
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+from metrics.registry import registry
+
+MAX_MESSAGE_LENGTH = 2000
+DEFAULT_COALESCE_WINDOW = 2
+ERROR_BACKOFF = 5
+# Consecutive failed sends after which a channel's queued messages are dropped.
+MAX_SEND_FAILURES = 5
+
+SEND_DURATION = registry.histogram(
+    "discord_send_duration_seconds", "Time taken to post to Discord.", ["channel"]
+)
+SEND_ERRORS = registry.counter(
+    "discord_send_errors_total", "Failed Discord posts.", ["channel", "status"]
+)
+
+
+class NotificationQueue:
+    def __init__(
+        self,
+        send: Callable[[str, str], object],
+        coalesce_window=DEFAULT_COALESCE_WINDOW,
+        pending_path=None,
+        max_message_length=MAX_MESSAGE_LENGTH,
+        channels: Iterable[str] = None,
+    ):
+        self.send = send
+        self.channels = None if channels is None else set(channels)
+        self.coalesce_window = coalesce_window
+        self.pending_path = pending_path
+        self.max_message_length = max_message_length
+        self.pending: Dict[str, List[str]] = self.load_pending()
+        # Monotonic time at which each channel, or every channel, may send again.
+        self.ready_at: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {}
+        # Set when `pending` differs from what is on disk. Only the sender
+        # thread writes the file, so enqueue never touches the disk.
+        self.dirty = False
+        self.global_ready_at = 0.0
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.sender_thread: threading.Thread = None
+
+    def load_pending(self) -> Dict[str, List[str]]:
+        if self.pending_path is None or not os.path.exists(self.pending_path):
+            return {}
+        try:
+            with open(self.pending_path) as pending_file:
+                pending = json.load(pending_file)
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not load unsent notifications: {e}")
+            return {}
+        for channel_name in [name for name in pending if not self.is_known(name)]:
+            logging.error(f"Dropping unsent notifications to unknown {channel_name}")
+            del pending[channel_name]
+        return pending
+
+    def is_known(self, channel_name):
+        return self.channels is None or channel_name in self.channels
+
+    def persist_pending(self):
+        with self.condition:
+            if not self.dirty:
+                return
+            self.dirty = False
+            pending = {
+                channel: list(messages)
+                for channel, messages in self.pending.items()
+                if messages
+            }
+        if self.pending_path is None:
+            return
+        temporary_path = f"{self.pending_path}.tmp"
+        try:
+            with open(temporary_path, "w") as pending_file:
+                json.dump(pending, pending_file)
+            os.replace(temporary_path, self.pending_path)
+        except OSError as e:
+            logging.error(f"Could not save unsent notifications: {e}")
+
+    def has_pending(self):
+        return any(self.pending.values())
+
+    def enqueue(self, channel_name, message):
+        if not self.is_known(channel_name):
+            logging.error(f"Dropping notification to unknown channel {channel_name}")
+            return False
+
+        pieces = [
+            message[start : start + self.max_message_length]
+            for start in range(0, max(len(message), 1), self.max_message_length)
+        ]
+        with self.condition:
+            self.pending.setdefault(channel_name, []).extend(pieces)
+            self.dirty = True
+            self.condition.notify_all()
+        return True
+
+    def coalesce(self, messages: List[str]):
+        content, count = messages[0], 1
+        for message in messages[1:]:
+            if len(content) + 1 + len(message) > self.max_message_length:
+                break
+            content += "\n" + message
+            count += 1
+        return content, count
+
+    def get_retry_after(response):
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        retry_after = body.get("retry_after", response.headers.get("Retry-After", 1))
+        return float(retry_after), bool(body.get("global", False))
+
+    def update_rate_limit(self, channel_name, response):
+        now = time.monotonic()
+        if response.status_code == 429:
+            retry_after, is_global = NotificationQueue.get_retry_after(response)
+            if is_global:
+                self.global_ready_at = now + retry_after
+            else:
+                self.ready_at[channel_name] = now + retry_after
+            return
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+        if remaining is not None and reset_after is not None and int(remaining) == 0:
+            self.ready_at[channel_name] = now + float(reset_after)
+
+    def send_channel(self, channel_name):
+        with self.condition:
+            content, count = self.coalesce(self.pending[channel_name])
+        start = time.perf_counter()
+        try:
+            response = self.send(channel_name, content)
+        except Exception as e:
+            SEND_ERRORS.inc(channel=channel_name, status=type(e).__name__)
+            logging.error(f"Could not send notification to {channel_name}: {e}")
+            self.failures[channel_name] = self.failures.get(channel_name, 0) + 1
+            if self.failures[channel_name] < MAX_SEND_FAILURES:
+                self.ready_at[channel_name] = time.monotonic() + ERROR_BACKOFF
+                return
+            logging.error(
+                f"Dropping notification to {channel_name} after "
+                f"{self.failures.pop(channel_name)} failed attempts"
+            )
+        else:
+            self.failures.pop(channel_name, None)
+            if not self.handle_response(channel_name, response, start):
+                return
+
+        with self.condition:
+            del self.pending[channel_name][:count]
+            self.dirty = True
+
+    def handle_response(self, channel_name, response, start) -> bool:
+        # Returns whether the message is done with, sent or rejected for good.
+        SEND_DURATION.observe(time.perf_counter() - start, channel=channel_name)
+        if response.status_code >= 400:
+            SEND_ERRORS.inc(channel=channel_name, status=response.status_code)
+        self.update_rate_limit(channel_name, response)
+        if response.status_code == 429:
+            logging.warning(f"Discord rate limited notifications to {channel_name}")
+            return False
+        if response.status_code >= 500:
+            self.ready_at[channel_name] = time.monotonic() + ERROR_BACKOFF
+            return False
+        if response.status_code >= 400:
+            logging.error(
+                f"Dropping notification to {channel_name}: {response.status_code}"
+            )
+        return True
+
+    def send_ready(self):
+        # Sends one coalesced message per channel that is not rate limited and
+        # returns how long to wait before the next pass, or None when idle.
+        # The pending file is written once per pass, before and after sending.
+        self.persist_pending()
+        with self.condition:
+            channels = [
+                channel for channel, messages in self.pending.items() if messages
+            ]
+
+        delays = []
+        for channel_name in channels:
+            ready_at = max(self.ready_at.get(channel_name, 0), self.global_ready_at)
+            if ready_at <= time.monotonic():
+                self.send_channel(channel_name)
+            if self.pending[channel_name]:
+                ready_at = max(self.ready_at.get(channel_name, 0), self.global_ready_at)
+                delays.append(max(ready_at - time.monotonic(), 0))
+
+        self.persist_pending()
+        return min(delays, default=None)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.has_pending() or self.stop_event.is_set()
+                )
+            # Let a burst of alerts accumulate so it goes out as one message.
+            self.stop_event.wait(self.coalesce_window)
+            delay = self.send_ready()
+            while delay is not None and not self.stop_event.is_set():
+                self.stop_event.wait(delay)
+                delay = self.send_ready()
+
+        # One last attempt; anything still unsent stays on disk for next start.
+        self.send_ready()
+
+    def start(self):
+        if self.sender_thread is None:
+            self.sender_thread = threading.Thread(
+                target=self.run, name="discord-notifications", daemon=True
+            )
+            self.sender_thread.start()
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if self.sender_thread is not None:
+            self.sender_thread.join(timeout)
+        if self.sender_thread is None or not self.sender_thread.is_alive():
+            self.persist_pending()
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+from discord_bot.notification_queue import MAX_SEND_FAILURES, NotificationQueue
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = headers or {}
+
+    def json(self):
+        return self.body
+
+
+class FakeSender:
+    def __init__(self, responses=None):
+        self.responses = responses or []
+        self.sent = []
+
+    def __call__(self, channel_name, content):
+        response = self.responses.pop(0) if self.responses else FakeResponse(200)
+        if response.status_code == 200:
+            self.sent.append((channel_name, content))
+        return response
+
+
+class TestNotificationQueue(unittest.TestCase):
+    def test_coalesces_a_burst_into_one_message_per_channel(self):
+        sender = FakeSender()
+        notifications = NotificationQueue(sender, coalesce_window=0.1)
+        notifications.start()
+        for i in range(60):
+            notifications.enqueue("strategies", f"PAIR{i}USD - gap")
+        notifications.enqueue("delta-strategies", "XBTUSD - volume")
+        notifications.stop(timeout=5)
+
+        self.assertEqual(len(sender.sent), 2)
+        contents = dict(sender.sent)
+        self.assertEqual(len(contents["strategies"].split("\n")), 60)
+        self.assertEqual(contents["delta-strategies"], "XBTUSD - volume")
+
+    def test_splits_messages_over_discord_length_limit(self):
+        sender = FakeSender()
+        notifications = NotificationQueue(sender, max_message_length=10)
+        notifications.enqueue("strategies", "a" * 25)
+        notifications.enqueue("strategies", "bb")
+
+        while notifications.send_ready() is not None:
+            pass
+
+        self.assertEqual(
+            [content for _, content in sender.sent], ["a" * 10, "a" * 10, "aaaaa\nbb"]
+        )
+
+    def test_rate_limited_alerts_are_retried_after_retry_after(self):
+        sender = FakeSender([FakeResponse(429, {"retry_after": 0.05})])
+        notifications = NotificationQueue(sender)
+        notifications.enqueue("strategies", "XBTUSD")
+
+        delay = notifications.send_ready()
+        self.assertGreater(delay, 0)
+        self.assertEqual(sender.sent, [])
+
+        notifications.ready_at["strategies"] = 0
+        self.assertIsNone(notifications.send_ready())
+        self.assertEqual(sender.sent, [("strategies", "XBTUSD")])
+
+    def test_unsent_alerts_survive_a_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pending_path = os.path.join(directory, "pending.json")
+            failing = NotificationQueue(
+                FakeSender([FakeResponse(503)]), pending_path=pending_path
+            )
+            failing.enqueue("strategies", "XBTUSD")
+            failing.send_ready()
+
+            sender = FakeSender()
+            restarted = NotificationQueue(sender, pending_path=pending_path)
+            restarted.send_ready()
+
+            self.assertEqual(sender.sent, [("strategies", "XBTUSD")])
+            self.assertEqual(
+                NotificationQueue(sender, pending_path=pending_path).pending, {}
+            )
+
+    def test_unknown_channels_are_rejected(self):
+        sender = FakeSender()
+        notifications = NotificationQueue(sender, channels=["strategies"])
+
+        self.assertFalse(notifications.enqueue("typo-channel", "XBTUSD"))
+        self.assertTrue(notifications.enqueue("strategies", "XBTUSD"))
+        self.assertEqual(list(notifications.pending), ["strategies"])
+
+    def test_messages_are_dropped_after_repeated_send_errors(self):
+        def failing_sender(channel_name, content):
+            raise KeyError(channel_name)
+
+        notifications = NotificationQueue(failing_sender)
+        notifications.enqueue("strategies", "XBTUSD")
+        for _ in range(MAX_SEND_FAILURES):
+            notifications.ready_at["strategies"] = 0
+            notifications.send_ready()
+
+        self.assertFalse(notifications.has_pending())
+
+    def test_enqueue_leaves_persisting_to_the_sender(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pending_path = os.path.join(directory, "pending.json")
+            notifications = NotificationQueue(
+                FakeSender([FakeResponse(503)]), pending_path=pending_path
+            )
+            for i in range(50):
+                notifications.enqueue("strategies", f"PAIR{i}USD")
+            self.assertFalse(os.path.exists(pending_path))
+
+            notifications.stop()
+            restarted = NotificationQueue(FakeSender(), pending_path=pending_path)
+
+        self.assertEqual(len(restarted.pending["strategies"]), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
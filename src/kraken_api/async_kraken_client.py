@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlencode
+from typing import Dict, Iterable, List
+
+import aiohttp
+
+from kraken_api.configuration.kraken_config import KrakenConfiguration
+from kraken_api.kraken_client import (
+    PARSE_DURATION,
+    REQUEST_RETRIES,
+    KrakenClient,
+    record_error,
+    record_response,
+)
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.interval import TradeInterval
+from kraken_api.model.priority import Priority
+from kraken_api.model.market_snapshot import MarketSnapshot
+from kraken_api.model.trade_history_record import TradeHistoryRecord
+from kraken_api.paths.kraken_api_paths import BASE_HOST, KrakenPaths
+from kraken_api.paths.request_type import RequestType
+from kraken_api.response_cache import ResponseCache
+from kraken_api.transport import KrakenTransport
+
+
+class AsyncKrakenClient(KrakenClient):
+    def __init__(
+        self,
+        config: KrakenConfiguration,
+        transport: KrakenTransport = None,
+        base_host=BASE_HOST,
+        response_cache: ResponseCache = None,
+    ):
+        super().__init__(config, transport, base_host, response_cache)
+        self.session: aiohttp.ClientSession = None
+        self.in_flight_requests: Dict[tuple, asyncio.Task] = {}
+        self.request_slots: asyncio.Semaphore = None
+        # Nonces must reach Kraken in increasing order, so private calls are
+        # signed and sent one at a time.
+        self.private_lock: asyncio.Lock = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            pool_size = self.transport.get_pool_size(self.base_host)
+            connect_timeout, read_timeout = self.transport.timeout
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=pool_size),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=connect_timeout, sock_read=read_timeout
+                ),
+                headers={"User-Agent": "Python API Client"},
+            )
+            self.request_slots = asyncio.Semaphore(pool_size)
+            self.private_lock = asyncio.Lock()
+
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def __aenter__(self):
+        await self.get_session()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    async def send_request(self, path: KrakenPaths, params, payload):
+        session = await self.get_session()
+        headers, payload = self.prepare_request(path, payload)
+        data = urlencode(payload) if path.http_method == "POST" else None
+
+        start = time.perf_counter()
+        async with session.request(
+            path.http_method,
+            self.get_uri(path),
+            params=params,
+            data=data,
+            headers=headers,
+        ) as response:
+            content = await response.read()
+        record_response(path, time.perf_counter() - start, content)
+
+        with PARSE_DURATION.time(path=path.name):
+            return KrakenClient.parse_response(response.status, content)
+
+    async def perform_request(
+        self, path: KrakenPaths, params={}, payload={}, priority: Priority = None
+    ):
+        ttl = self.response_cache.get_ttl(path)
+        if ttl is None or path.request_type == RequestType.Private:
+            return await self.call_api(path, params, payload, priority)
+
+        key = ResponseCache.get_key(path, params)
+        found, value = self.response_cache.get(key)
+        if found:
+            return value
+
+        task = self.in_flight_requests.get(key)
+        with self.response_cache.lock:
+            if task is None:
+                self.response_cache.misses += 1
+            else:
+                self.response_cache.shared += 1
+
+        if task is None:
+            task = asyncio.ensure_future(self.call_api(path, params, payload, priority))
+            self.in_flight_requests[key] = task
+
+            def finish(task: asyncio.Task):
+                self.in_flight_requests.pop(key, None)
+                if not task.cancelled() and task.exception() is None:
+                    self.response_cache.put(key, task.result(), ttl)
+
+            task.add_done_callback(finish)
+
+        # Shielded so one caller giving up does not cancel the shared request.
+        return await asyncio.shield(task)
+
+    async def call_api(
+        self, path: KrakenPaths, params={}, payload={}, priority: Priority = None
+    ):
+        await self.get_session()
+        priority = priority or KrakenClient.get_default_priority(path)
+        attempt = 0
+        while True:
+            async with self.request_slots:
+                await asyncio.to_thread(
+                    self.rate_budgets[path.request_type].acquire,
+                    path.cost_to_call,
+                    priority,
+                )
+                try:
+                    if path.request_type == RequestType.Private:
+                        async with self.private_lock:
+                            return await self.send_request(path, params, payload)
+                    return await self.send_request(path, params, payload)
+                except Exception as e:
+                    record_error(path, e)
+                    if not self.should_retry(e, attempt):
+                        raise
+            REQUEST_RETRIES.inc(path=path.name)
+            await asyncio.sleep(self.transport.get_backoff(attempt))
+            attempt += 1
+
+    async def get_open_trades(self):
+        return await self.perform_request(KrakenPaths.OPEN_ORDERS_PATH)
+
+    async def get_trade_history(
+        self, start=0.0, end=None, offset=0
+    ) -> List[TradeHistoryRecord]:
+        payload = KrakenClient.get_trade_history_payload(
+            start, end if end is not None else time.time(), offset
+        )
+        data = await self.perform_request(
+            KrakenPaths.TRADES_HISTORY_PATH, payload=payload
+        )
+
+        return KrakenClient.parse_trade_history(data)
+
+    async def get_open_positions(self):
+        return await self.perform_request(KrakenPaths.OPEN_POSITIONS_PATH)
+
+    async def get_tickers(self):
+        data = await self.perform_request(KrakenPaths.TICKER_INFO_PATH)
+
+        return KrakenClient.parse_tickers(data)
+
+    async def get_ticker_data(self) -> MarketSnapshot:
+        data = await self.perform_request(KrakenPaths.TICKER_INFO_PATH)
+
+        return KrakenClient.parse_ticker_data(data)
+
+    async def get_candle_data_since(
+        self, ticker, since, interval=TradeInterval.ONE_HOUR
+    ) -> tuple[CandleSeries, int]:
+        data = await self.perform_request(
+            KrakenPaths.CANDLE_INFO_PATH,
+            params=KrakenClient.get_candle_params(ticker, since, interval),
+        )
+
+        return KrakenClient.parse_candle_data(data, ticker)
+
+    async def get_candle_data_for_ticker(
+        self, ticker, days_back=14, interval=TradeInterval.ONE_HOUR
+    ) -> CandleSeries:
+        since = KrakenClient.get_candle_window_start(days_back, interval)
+        candles, _ = await self.get_candle_data_since(ticker, since, interval)
+
+        return candles
+
+    async def gather_candles(
+        self, pairs: Iterable[str], interval=TradeInterval.ONE_HOUR, days_back=14
+    ) -> Dict[str, CandleSeries]:
+        pairs = list(pairs)
+        results = await asyncio.gather(
+            *(
+                self.get_candle_data_for_ticker(pair, days_back, interval)
+                for pair in pairs
+            ),
+            return_exceptions=True,
+        )
+
+        candles_by_pair = {}
+        for pair, result in zip(pairs, results):
+            if isinstance(result, Exception):
+                logging.error(f"Could not fetch candles for {pair}: {result}")
+            else:
+                candles_by_pair[pair] = result
+
+        return candles_by_pair
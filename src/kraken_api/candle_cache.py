@@ -0,0 +1,94 @@
+from threading import Lock
+from typing import Dict, Tuple
+
+from kraken_api.candle_resampler import CandleResampler
+from kraken_api.candle_store import CandleStore, log_gaps
+from kraken_api.kraken_client import KrakenClient
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.interval import TradeInterval
+
+
+class CandleCache:
+    def __init__(self, kraken_client: KrakenClient, candle_store: CandleStore = None):
+        self.kraken_client = kraken_client
+        self.candle_store = candle_store
+        self.windows: Dict[Tuple[str, TradeInterval], CandleSeries] = {}
+        self.cursors: Dict[Tuple[str, TradeInterval], int] = {}
+        self.resamplers: Dict[
+            Tuple[str, TradeInterval, TradeInterval], CandleResampler
+        ] = {}
+        self.lock = Lock()
+
+    def load_from_store(self, ticker, interval, window_start):
+        stored = self.candle_store.read(ticker, interval, since=window_start)
+        if len(stored) == 0:
+            return None, None
+
+        return stored, int(stored.timestamp[-1])
+
+    def get_candle_data_for_ticker(
+        self, ticker, days_back=14, interval=TradeInterval.ONE_HOUR
+    ) -> CandleSeries:
+        key = (ticker, interval)
+        window_start = KrakenClient.get_candle_window_start(days_back, interval)
+
+        with self.lock:
+            cached = self.windows.get(key)
+            cursor = self.cursors.get(key)
+
+        if cached is None and self.candle_store is not None:
+            cached, cursor = self.load_from_store(ticker, interval, window_start)
+
+        if cached is None or cursor is None or cursor < window_start:
+            candles, last = self.kraken_client.get_candle_data_since(
+                ticker, window_start, interval
+            )
+            newer = candles
+        else:
+            newer, last = self.kraken_client.get_candle_data_since(
+                ticker, cursor, interval
+            )
+            candles = cached.merge(newer, since=window_start)
+
+        if self.candle_store is not None:
+            committed = newer[: int((newer.timestamp <= last).sum())]
+            if self.candle_store.append(ticker, interval, committed) > 0:
+                log_gaps(ticker, candles, interval)
+
+        with self.lock:
+            self.windows[key] = candles
+            self.cursors[key] = last
+
+        return candles
+
+    def get_resampled_candle_data_for_ticker(
+        self,
+        ticker,
+        interval: TradeInterval,
+        days_back=14,
+        base_interval=TradeInterval.ONE_HOUR,
+    ) -> CandleSeries:
+        # Higher intervals are built from the cached base window, so they cost
+        # no OHLC calls beyond the base refresh.
+        with self.lock:
+            base_candles = self.windows.get((ticker, base_interval))
+        if base_candles is None:
+            base_candles = self.get_candle_data_for_ticker(
+                ticker, days_back, base_interval
+            )
+
+        key = (ticker, base_interval, interval)
+        with self.lock:
+            resampler = self.resamplers.get(key)
+            if resampler is None:
+                resampler = CandleResampler(interval, base_interval)
+                self.resamplers[key] = resampler
+            return resampler.update(base_candles)
+
+    def evict(self, ticker, interval=TradeInterval.ONE_HOUR):
+        with self.lock:
+            self.windows.pop((ticker, interval), None)
+            self.cursors.pop((ticker, interval), None)
+            for key in list(self.resamplers):
+                if key[:2] == (ticker, interval):
+                    del self.resamplers[key]
@@ -0,0 +1,70 @@
+import numpy as np
+
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.interval import TradeInterval
+
+
+def check_intervals(interval: TradeInterval, base_interval: TradeInterval):
+    if interval.value <= base_interval.value or interval.value % base_interval.value:
+        raise Exception(
+            f"Cannot build {interval.name} candles from {base_interval.name}"
+        )
+
+
+def resample(candles: CandleSeries, interval: TradeInterval) -> CandleSeries:
+    # Buckets are aligned to multiples of the interval since the epoch, like
+    # Kraken's own candles. A leading bucket that starts before the base
+    # candles is incomplete and dropped; the last bucket may still be open.
+    period = interval.value * 60
+    if len(candles) > 0 and candles.timestamp[0] % period != 0:
+        first_bucket = (candles.timestamp[0] // period + 1) * period
+        candles = candles[int(np.searchsorted(candles.timestamp, first_bucket)) :]
+    if len(candles) == 0:
+        return candles
+
+    buckets = candles.timestamp // period * period
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(candles)) - 1
+    volume = np.add.reduceat(candles.volume, starts)
+    traded = np.add.reduceat(candles.vwap * candles.volume, starts)
+    close = candles.close[ends]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = np.where(volume > 0, traded / volume, close)
+
+    return CandleSeries(
+        buckets[starts],
+        candles.open[starts],
+        np.maximum.reduceat(candles.high, starts),
+        np.minimum.reduceat(candles.low, starts),
+        close,
+        vwap,
+        volume,
+        np.add.reduceat(candles.trades, starts),
+    )
+
+
+class CandleResampler:
+    def __init__(self, interval: TradeInterval, base_interval=TradeInterval.ONE_HOUR):
+        check_intervals(interval, base_interval)
+        self.interval = interval
+        self.base_interval = base_interval
+        self.period = interval.value * 60
+        self.candles: CandleSeries = None
+
+    def update(self, base_candles: CandleSeries) -> CandleSeries:
+        # Only the base candles of the still-open bar onwards are resampled;
+        # closed bars are kept and trimmed to the base window.
+        if (
+            self.candles is None
+            or len(self.candles) == 0
+            or len(base_candles) == 0
+            or base_candles.timestamp[0] > self.candles.timestamp[-1]
+        ):
+            self.candles = resample(base_candles, self.interval)
+            return self.candles
+
+        open_start = self.candles.timestamp[-1]
+        tail = base_candles[int(np.searchsorted(base_candles.timestamp, open_start)) :]
+        since = -(-int(base_candles.timestamp[0]) // self.period) * self.period
+        self.candles = self.candles.merge(resample(tail, self.interval), since=since)
+        return self.candles
@@ -0,0 +1,120 @@
+import logging
+import mmap
+import os
+from threading import Lock
+from typing import List, Tuple
+
+import numpy as np
+
+from kraken_api.model.candle_series import COLUMN_NAMES, CandleSeries
+from kraken_api.model.interval import TradeInterval
+
+# One fixed-width little-endian record per committed candle.
+RECORD_DTYPE = np.dtype(
+    [("timestamp", "<i8")] + [(name, "<f8") for name in COLUMN_NAMES[1:]]
+)
+
+
+class CandleStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, ticker, interval: TradeInterval):
+        return os.path.join(
+            self.directory, f"{ticker.replace('/', '')}_{interval.value}.bin"
+        )
+
+    def get_stored_tickers(self, interval: TradeInterval) -> List[str]:
+        suffix = f"_{interval.value}.bin"
+        return sorted(
+            file_name[: -len(suffix)]
+            for file_name in os.listdir(self.directory)
+            if file_name.endswith(suffix)
+        )
+
+    def read_records(self, ticker, interval: TradeInterval) -> np.ndarray:
+        path = self.get_path(ticker, interval)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        with open(path, "rb") as candle_file:
+            size = os.fstat(candle_file.fileno()).st_size
+            num_records = size // RECORD_DTYPE.itemsize
+            if num_records == 0:
+                return np.empty(0, dtype=RECORD_DTYPE)
+            # The map outlives the file handle and is released once the last
+            # array viewing it is garbage collected.
+            mapped = mmap.mmap(
+                candle_file.fileno(),
+                num_records * RECORD_DTYPE.itemsize,
+                access=mmap.ACCESS_READ,
+            )
+
+        return np.frombuffer(mapped, dtype=RECORD_DTYPE, count=num_records)
+
+    def read(self, ticker, interval: TradeInterval, since=None) -> CandleSeries:
+        records = self.read_records(ticker, interval)
+        if since is not None:
+            records = records[np.searchsorted(records["timestamp"], since) :]
+
+        return CandleSeries(*(records[name] for name in COLUMN_NAMES))
+
+    def get_last_timestamp(self, ticker, interval: TradeInterval):
+        path = self.get_path(ticker, interval)
+        if not os.path.exists(path):
+            return None
+        size = os.path.getsize(path) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+        if size == 0:
+            return None
+
+        with open(path, "rb") as candle_file:
+            candle_file.seek(size - RECORD_DTYPE.itemsize)
+            record = np.frombuffer(candle_file.read(RECORD_DTYPE.itemsize), RECORD_DTYPE)
+
+        return int(record["timestamp"][0])
+
+    def append(self, ticker, interval: TradeInterval, candles: CandleSeries):
+        with self.lock:
+            last_timestamp = self.get_last_timestamp(ticker, interval)
+            if last_timestamp is not None:
+                candles = candles[int(np.searchsorted(candles.timestamp, last_timestamp, side="right")) :]
+            if len(candles) == 0:
+                return 0
+
+            records = np.empty(len(candles), dtype=RECORD_DTYPE)
+            for name in COLUMN_NAMES:
+                records[name] = getattr(candles, name)
+
+            path = self.get_path(ticker, interval)
+            with open(path, "ab") as candle_file:
+                # Drop a partially written trailing record left by a crash.
+                candle_file.truncate(
+                    os.fstat(candle_file.fileno()).st_size
+                    // RECORD_DTYPE.itemsize
+                    * RECORD_DTYPE.itemsize
+                )
+                candle_file.write(records.tobytes())
+
+            return len(records)
+
+
+def find_gaps(candles: CandleSeries, interval: TradeInterval) -> List[Tuple[int, int]]:
+    if len(candles) < 2:
+        return []
+    interval_in_seconds = interval.value * 60
+    steps = np.diff(candles.timestamp)
+    gap_indices = np.nonzero(steps > interval_in_seconds)[0]
+
+    return [
+        (int(candles.timestamp[i]), int(candles.timestamp[i + 1]))
+        for i in gap_indices
+    ]
+
+
+def log_gaps(ticker, candles: CandleSeries, interval: TradeInterval):
+    for start, end in find_gaps(candles, interval):
+        logging.warning(
+            f"{ticker} has no {interval.name} candles between {start} and {end}"
+        )
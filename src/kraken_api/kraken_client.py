@@ -2,12 +2,11 @@ import base64
 import csv
 import hashlib
 import hmac
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 import pyotp
 import time
 import requests
 import json
-from threading import Thread
 from importlib import resources
 
 import urllib
@@ -16,32 +15,87 @@ from datetime import datetime
 from kraken_api.model.interval import TradeInterval
 from kraken_api.model.trade_history_record import TradeHistoryRecord
 
-from kraken_api.paths.kraken_api_paths import KrakenPaths
+from kraken_api.paths.kraken_api_paths import BASE_HOST, KrakenPaths
 
-from kraken_api.model.candle import Candle
-from kraken_api.model.ticker import Ticker
-from queue import PriorityQueue
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.market_snapshot import MarketSnapshot
+from kraken_api.model.priority import Priority
+from kraken_api.rate_budget import RateBudget
+from kraken_api.response_cache import ResponseCache
+from kraken_api.transport import KrakenTransport
 
 from kraken_api.model.api_action import ApiAction
+from kraken_api.model.api_error import KrakenApiError
 from kraken_api.paths.request_type import RequestType
+from metrics.registry import registry
+
+REQUEST_DURATION = registry.histogram(
+    "kraken_request_duration_seconds",
+    "Time from sending a Kraken request to receiving the full response.",
+    ["path"],
+)
+PARSE_DURATION = registry.histogram(
+    "kraken_response_parse_duration_seconds",
+    "Time spent decoding Kraken responses.",
+    ["path"],
+)
+RESPONSE_BYTES = registry.counter(
+    "kraken_response_bytes_total", "Bytes received from Kraken.", ["path"]
+)
+REQUEST_ERRORS = registry.counter(
+    "kraken_request_errors_total", "Failed Kraken requests.", ["path", "status"]
+)
+REQUEST_RETRIES = registry.counter(
+    "kraken_request_retries_total", "Retried Kraken requests.", ["path"]
+)
+RATE_BUDGET_LEVEL = registry.gauge(
+    "kraken_rate_budget_level",
+    "Current call counter of the Kraken rate budget.",
+    ["request_type"],
+)
+
+
+def record_response(path, duration, content):
+    REQUEST_DURATION.observe(duration, path=path.name)
+    RESPONSE_BYTES.inc(len(content), path=path.name)
+
+
+def record_error(path, error: Exception):
+    if isinstance(error, KrakenApiError):
+        status = "api" if error.status_code == 200 else error.status_code
+    else:
+        status = type(error).__name__
+    REQUEST_ERRORS.inc(path=path.name, status=status)
 
 
 class KrakenClient:
     API_LIMIT = 15
-
-    def __init__(self, config: KrakenConfiguration):
-        self.api_counter = 0
-        self.queue = PriorityQueue()
+    PUBLIC_DECAY_PER_SECOND = 1
+    PRIVATE_DECAY_PER_SECOND = 1 / 3
+
+    def __init__(
+        self,
+        config: KrakenConfiguration,
+        transport: KrakenTransport = None,
+        base_host=BASE_HOST,
+        response_cache: ResponseCache = None,
+    ):
         self.config = config
-
-        def decrement_counter():
-            while True:
-                while self.api_counter > 0:
-                    self.api_counter = max(self.api_counter - 1, 0)
-                    time.sleep(3)
-
-        self.counter_thread: Thread = Thread(target=decrement_counter, daemon=True)
-        self.counter_thread.start()
+        self.transport = transport or KrakenTransport()
+        self.base_host = base_host
+        self.response_cache = response_cache or ResponseCache()
+        self.rate_budgets = {
+            RequestType.Public: RateBudget(
+                KrakenClient.API_LIMIT, KrakenClient.PUBLIC_DECAY_PER_SECOND
+            ),
+            RequestType.Private: RateBudget(
+                KrakenClient.API_LIMIT, KrakenClient.PRIVATE_DECAY_PER_SECOND
+            ),
+        }
+        for request_type, rate_budget in self.rate_budgets.items():
+            RATE_BUDGET_LEVEL.set_function(
+                rate_budget.level, request_type=request_type.name
+            )
 
     def get_otp(self):
         totp = pyotp.TOTP(self.config.otp_secret)
@@ -52,32 +106,69 @@ class KrakenClient:
         return int(time.time() * 1000)
 
     def get_data_or_raise(response: requests.Response):
-        if response.status_code != 200:
-            raise Exception(f"{response.status_code} found: {str(response.content)}")
-        response_info = json.loads(response.content)
+        return KrakenClient.parse_response(response.status_code, response.content)
+
+    def parse_response(status_code, content):
+        if status_code != 200:
+            raise KrakenApiError([f"{status_code} found: {str(content)}"], status_code)
+        response_info = json.loads(content)
         if len(response_info["error"]) > 0:
-            raise Exception(response_info["error"])
+            raise KrakenApiError(response_info["error"])
         else:
             return response_info["result"]
 
-    def handle_error(error) -> ApiAction:
-        if "EGeneral:Internal error" in error:
+    def handle_error(error, status_code=200) -> ApiAction:
+        if "EGeneral:Internal error" in error or 500 <= status_code < 600:
             return (ApiAction.Retry, error)
         else:
             return (ApiAction.Abort, error)
 
+    def should_retry(self, error: Exception, attempt) -> bool:
+        if not isinstance(error, KrakenApiError):
+            return False
+        action, _ = KrakenClient.handle_error(error.error, error.status_code)
+        return action == ApiAction.Retry and attempt < self.transport.max_retries
+
+    def get_default_priority(path: KrakenPaths) -> Priority:
+        if path.request_type == RequestType.Private:
+            return Priority.HIGH
+        elif path == KrakenPaths.CANDLE_INFO_PATH:
+            return Priority.LOW
+        else:
+            return Priority.MEDIUM
+
     def api_call(api_func):
         def new_call(
             self,
             path: KrakenPaths,
             params={},
             payload={},
+            priority: Priority = None,
         ):
-            self.api_counter += path.cost_to_call
-
-            result = api_func(self, path, params, payload)
-
-            return result
+            priority = priority or KrakenClient.get_default_priority(path)
+
+            def call():
+                attempt = 0
+                while True:
+                    self.rate_budgets[path.request_type].acquire(
+                        path.cost_to_call, priority
+                    )
+                    try:
+                        return api_func(self, path, params, payload)
+                    except Exception as e:
+                        record_error(path, e)
+                        if not self.should_retry(e, attempt):
+                            raise
+                    REQUEST_RETRIES.inc(path=path.name)
+                    self.transport.wait_before_retry(attempt)
+                    attempt += 1
+
+            ttl = self.response_cache.get_ttl(path)
+            if ttl is None or path.request_type == RequestType.Private:
+                return call()
+            return self.response_cache.get_or_load(
+                ResponseCache.get_key(path, params), ttl, call
+            )
 
         return new_call
 
@@ -116,42 +207,47 @@ class KrakenClient:
 
         return payload
 
-    @api_call
-    def perform_request(self, path: KrakenPaths, params={}, payload={}):
-        headers = {
-            "User-Agent": "Python API Client",
-        }
+    def get_uri(self, path: KrakenPaths):
+        return f"{self.base_host}{path.path}"
+
+    def prepare_request(self, path: KrakenPaths, payload={}):
+        headers = {}
         if path.request_type == RequestType.Private:
             payload = payload | self.get_initial_private_payload()
             headers = headers | self.get_authorization_headers(path.path, payload)
 
+        return headers, payload
+
+    @api_call
+    def perform_request(self, path: KrakenPaths, params={}, payload={}):
+        headers, payload = self.prepare_request(path, payload)
+
+        start = time.perf_counter()
         if path.http_method == "GET":
-            return KrakenClient.get_data_or_raise(
-                requests.get(path.uri, params=params, headers=headers)
+            response = self.transport.get(
+                self.get_uri(path), params=params, headers=headers
             )
         elif path.http_method == "POST":
-            return KrakenClient.get_data_or_raise(
-                requests.post(path.uri, params=params, data=payload, headers=headers)
+            response = self.transport.post(
+                self.get_uri(path), params=params, data=payload, headers=headers
             )
+        record_response(path, time.perf_counter() - start, response.content)
+
+        with PARSE_DURATION.time(path=path.name):
+            return KrakenClient.get_data_or_raise(response)
 
     def get_open_trades(self):
         return self.perform_request(KrakenPaths.OPEN_ORDERS_PATH)
 
-    def get_trade_history(
-        self, start=0.0, end=time.time(), offset=0
-    ) -> List[TradeHistoryRecord]:
-        payload = {
+    def get_trade_history_payload(start, end, offset):
+        return {
             "start": start,
             "end": end,
             "ofs": offset,
             "consolidate_taker": False,
         }
-        data = self.perform_request(KrakenPaths.TRADES_HISTORY_PATH, payload=payload)
 
-        trades = data["trades"].values()
-        for trade in trades:
-            if trade["pair"] == "XXMRZUSD":
-                print(",".join(str(v) for v in trade.values()))
+    def parse_trade_history(data) -> List[TradeHistoryRecord]:
         return [
             TradeHistoryRecord(
                 trade["time"],
@@ -161,16 +257,45 @@ class KrakenClient:
                 float(trade["fee"]),
                 float(trade["price"]),
                 float(trade["vol"]),
+                txid,
             )
-            for trade in trades
+            for txid, trade in data["trades"].items()
         ]
 
+    def get_trade_history(
+        self, start=0.0, end=None, offset=0
+    ) -> List[TradeHistoryRecord]:
+        payload = KrakenClient.get_trade_history_payload(
+            start, end if end is not None else time.time(), offset
+        )
+        data = self.perform_request(KrakenPaths.TRADES_HISTORY_PATH, payload=payload)
+
+        return KrakenClient.parse_trade_history(data)
+
+    def iter_trade_history(
+        self, start=0.0, end=None, offset=0
+    ) -> Iterator[Tuple[List[TradeHistoryRecord], int]]:
+        # Kraken pages newest first, so offsets only stay stable while `end` is
+        # fixed. Each page is yielded with the offset to resume from.
+        end = time.time() if end is None else end
+        while True:
+            payload = KrakenClient.get_trade_history_payload(start, end, offset)
+            data = self.perform_request(
+                KrakenPaths.TRADES_HISTORY_PATH, payload=payload
+            )
+            records = KrakenClient.parse_trade_history(data)
+            if len(records) == 0:
+                return
+
+            offset += len(records)
+            yield records, offset
+            if offset >= int(data.get("count", 0)):
+                return
+
     def get_open_positions(self):
         return self.perform_request(KrakenPaths.OPEN_POSITIONS_PATH)
 
-    def get_tickers(self):
-        data = self.perform_request(KrakenPaths.TICKER_INFO_PATH)
-
+    def parse_tickers(data):
         exclusions = KrakenClient.get_exclusions()
         return [
             ticker_pair
@@ -178,43 +303,68 @@ class KrakenClient:
             if ticker_pair.endswith("USD") and ticker_pair not in exclusions
         ]
 
-    def get_ticker_data(self):
+    def get_tickers(self):
         data = self.perform_request(KrakenPaths.TICKER_INFO_PATH)
 
+        return KrakenClient.parse_tickers(data)
+
+    def get_websocket_names(self, tickers) -> Dict[str, str]:
+        data = self.perform_request(KrakenPaths.ASSET_INFO_PATH)
+
+        websocket_names = {}
+        for name, asset_pair in data.items():
+            for ticker in (name, asset_pair.get("altname")):
+                if ticker in tickers and "wsname" in asset_pair:
+                    websocket_names[ticker] = asset_pair["wsname"]
+        return websocket_names
+
+    def parse_ticker_data(data) -> MarketSnapshot:
         exclusions = KrakenClient.get_exclusions()
-        return [
-            Ticker(
-                ticker,
-                entry["a"],
-                entry["b"],
-                entry["c"],
-                entry["v"],
-                entry["p"],
-                entry["t"],
-                entry["l"],
-                entry["h"],
-                entry["o"],
-            )
-            for (ticker, entry) in data.items()
-            if ticker.endswith("USD") and ticker not in exclusions
-        ]
+        return MarketSnapshot.from_ticker_data(
+            data,
+            [
+                ticker
+                for ticker in data.keys()
+                if ticker.endswith("USD") and ticker not in exclusions
+            ],
+        )
 
-    def get_candle_data_for_ticker(
-        self, ticker, days_back=14, interval=TradeInterval.ONE_HOUR
-    ):
+    def get_ticker_data(self) -> MarketSnapshot:
+        data = self.perform_request(KrakenPaths.TICKER_INFO_PATH)
+
+        return KrakenClient.parse_ticker_data(data)
+
+    def get_candle_window_start(days_back, interval: TradeInterval):
         cur_time = datetime.now().timestamp()
-        interval_in_seconds = interval.value / 60
+        interval_in_seconds = interval.value * 60
         adjusted_cur_time = int((cur_time // interval_in_seconds) * interval_in_seconds)
 
-        since = adjusted_cur_time - days_back * 86400
+        return adjusted_cur_time - days_back * 86400
+
+    def get_candle_params(ticker, since, interval: TradeInterval):
+        return {
+            "pair": ticker.replace("/", ""),
+            "interval": interval.value,
+            "since": since,
+        }
+
+    def parse_candle_data(data, ticker) -> tuple[CandleSeries, int]:
+        return CandleSeries.from_rows(data[ticker.replace("/", "")]), int(data["last"])
+
+    def get_candle_data_since(
+        self, ticker, since, interval=TradeInterval.ONE_HOUR
+    ) -> tuple[CandleSeries, int]:
         data = self.perform_request(
             KrakenPaths.CANDLE_INFO_PATH,
-            params={
-                "pair": ticker.replace("/", ""),
-                "interval": interval.value,
-                "since": since,
-            },
+            params=KrakenClient.get_candle_params(ticker, since, interval),
         )
-        response_data = data[ticker.replace("/", "")]
 
-        return [Candle(*row) for row in response_data]
+        return KrakenClient.parse_candle_data(data, ticker)
+
+    def get_candle_data_for_ticker(
+        self, ticker, days_back=14, interval=TradeInterval.ONE_HOUR
+    ) -> CandleSeries:
+        since = KrakenClient.get_candle_window_start(days_back, interval)
+        candles, _ = self.get_candle_data_since(ticker, since, interval)
+
+        return candles
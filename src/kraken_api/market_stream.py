@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import time
+from threading import Thread
+from typing import Callable, Dict, List, Tuple
+
+import aiohttp
+
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.interval import TradeInterval
+from kraken_api.model.ticker import Ticker
+from kraken_api.paths.kraken_api_paths import WEBSOCKET_HOST
+
+# Delta strategy thresholds were tuned on ticker snapshots this far apart.
+DEFAULT_TICKER_INTERVAL = 30
+
+
+class MarketStream:
+    def __init__(
+        self,
+        websocket_names: Dict[str, str],
+        interval=TradeInterval.ONE_HOUR,
+        candle_loader: Callable[[str], CandleSeries] = None,
+        url=WEBSOCKET_HOST,
+        reconnect_delay=1,
+        max_reconnect_delay=30,
+        ticker_interval=DEFAULT_TICKER_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.websocket_names = websocket_names
+        self.tickers_by_websocket_name = {
+            websocket_name: ticker for ticker, websocket_name in websocket_names.items()
+        }
+        self.interval = interval
+        self.candle_loader = candle_loader
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.ticker_interval = ticker_interval
+        self.clock = clock
+
+        self.tickers: Dict[str, Ticker] = {}
+        self.compared_tickers: Dict[str, Tuple[float, Ticker]] = {}
+        self.candles: Dict[str, CandleSeries] = {}
+        self.ticker_listeners: List[Callable[[Ticker, Ticker], None]] = []
+        self.candle_listeners: List[Callable[[str, CandleSeries], None]] = []
+
+        self.stopped = False
+        self.connections = 0
+        self.loop: asyncio.AbstractEventLoop = None
+        self.stop_event: asyncio.Event = None
+        self.websocket: aiohttp.ClientWebSocketResponse = None
+        self.thread: Thread = None
+
+    def on_ticker(self, listener: Callable[[Ticker, Ticker], None]):
+        self.ticker_listeners.append(listener)
+
+        return listener
+
+    def on_candle(self, listener: Callable[[str, CandleSeries], None]):
+        self.candle_listeners.append(listener)
+
+        return listener
+
+    def get_subscriptions(self):
+        pairs = list(self.websocket_names.values())
+        return [
+            {"event": "subscribe", "pair": pairs, "subscription": {"name": "ticker"}},
+            {
+                "event": "subscribe",
+                "pair": pairs,
+                "subscription": {"name": "ohlc", "interval": self.interval.value},
+            },
+        ]
+
+    async def resync(self):
+        if self.candle_loader is None:
+            return
+        for ticker in self.websocket_names:
+            try:
+                self.candles[ticker] = await asyncio.to_thread(self.candle_loader, ticker)
+            except Exception as e:
+                logging.error(f"Could not resync candles for {ticker}: {e}")
+
+    def handle_ticker(self, ticker_name, entry):
+        cur_ticker = Ticker(
+            ticker_name,
+            entry["a"],
+            entry["b"],
+            entry["c"],
+            entry["v"],
+            entry["p"],
+            entry["t"],
+            entry["l"],
+            entry["h"],
+            entry["o"][0],
+        )
+        self.tickers[ticker_name] = cur_ticker
+        # Listeners compare against the tick they last saw for the pair, once
+        # it is at least ticker_interval old, rather than every pair of ticks.
+        now = self.clock()
+        compared_at, prev_ticker = self.compared_tickers.get(
+            ticker_name, (now, None)
+        )
+        if prev_ticker is not None and now - compared_at < self.ticker_interval:
+            return
+        self.compared_tickers[ticker_name] = (now, cur_ticker)
+        if prev_ticker is None:
+            return
+
+        for listener in self.ticker_listeners:
+            listener(prev_ticker, cur_ticker)
+
+    def handle_ohlc(self, ticker_name, entry):
+        _, end_time, *values = entry
+        start_time = int(float(end_time)) - self.interval.value * 60
+        update = CandleSeries.from_rows([[start_time, *values]])
+
+        candles = self.candles.get(ticker_name)
+        if candles is None:
+            candles = update
+        else:
+            # Keep the window length fixed when a new candle opens.
+            candles = candles.merge(update)
+            if len(candles) > len(self.candles[ticker_name]):
+                indicators = candles.indicators
+                candles = candles[1:]
+                candles.indicators = indicators
+        self.candles[ticker_name] = candles
+
+        for listener in self.candle_listeners:
+            listener(ticker_name, candles)
+
+    def handle_message(self, message):
+        if not isinstance(message, list):
+            if message.get("event") == "subscriptionStatus" and message.get(
+                "status"
+            ) == "error":
+                logging.error(f"Subscription failed: {message.get('errorMessage')}")
+            return
+
+        channel_name, websocket_name = message[-2], message[-1]
+        ticker_name = self.tickers_by_websocket_name.get(websocket_name)
+        if ticker_name is None:
+            return
+
+        for entry in message[1:-2]:
+            try:
+                if channel_name == "ticker":
+                    self.handle_ticker(ticker_name, entry)
+                elif channel_name.startswith("ohlc"):
+                    self.handle_ohlc(ticker_name, entry)
+            except Exception as e:
+                logging.error(f"Could not handle {channel_name} for {ticker_name}: {e}")
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+        delay = self.reconnect_delay
+        async with aiohttp.ClientSession() as session:
+            while not self.stopped:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=30) as websocket:
+                        self.websocket = websocket
+                        self.connections += 1
+                        for subscription in self.get_subscriptions():
+                            await websocket.send_json(subscription)
+                        # Updates that arrive during the resync stay buffered
+                        # and are applied on top of the fresh snapshot.
+                        await self.resync()
+                        delay = self.reconnect_delay
+                        async for message in websocket:
+                            if message.type == aiohttp.WSMsgType.TEXT:
+                                self.handle_message(json.loads(message.data))
+                            elif message.type == aiohttp.WSMsgType.ERROR:
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.error(f"Market stream disconnected: {e}")
+                finally:
+                    self.websocket = None
+
+                if not self.stopped:
+                    logging.info(f"Reconnecting market stream in {delay}s")
+                    try:
+                        await asyncio.wait_for(self.stop_event.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    delay = min(delay * 2, self.max_reconnect_delay)
+
+    def start(self):
+        self.thread = Thread(target=asyncio.run, args=[self.run()], daemon=True)
+        self.thread.start()
+
+        return self.thread
+
+    def stop(self):
+        self.stopped = True
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
+            if self.websocket is not None:
+                asyncio.run_coroutine_threadsafe(self.websocket.close(), self.loop)
+        if self.thread is not None:
+            self.thread.join()
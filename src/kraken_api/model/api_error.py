@@ -0,0 +1,5 @@
+class KrakenApiError(Exception):
+    def __init__(self, error, status_code=200):
+        super().__init__(error)
+        self.error = error
+        self.status_code = status_code
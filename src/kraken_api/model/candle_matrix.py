@@ -0,0 +1,67 @@
+from typing import Dict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from kraken_api.model.candle_series import COLUMN_NAMES, CandleSeries
+
+
+class CandleMatrix:
+    def __init__(self, candles_by_ticker: Dict[str, CandleSeries], length=None):
+        self.tickers = list(candles_by_ticker.keys())
+        self.candles_by_ticker = candles_by_ticker
+        self.length = length or max(
+            (len(candles) for candles in candles_by_ticker.values()), default=0
+        )
+
+        # Series are right-aligned so column -1 is every pair's latest candle;
+        # shorter histories are padded with NaN on the left.
+        for name in COLUMN_NAMES:
+            matrix = np.full((len(self.tickers), self.length), np.nan)
+            for row, candles in enumerate(candles_by_ticker.values()):
+                values = getattr(candles, name)[-self.length :]
+                if len(values) > 0:
+                    matrix[row, self.length - len(values) :] = values
+            matrix.flags.writeable = False
+            setattr(self, name, matrix)
+
+    def get_candles(self, row) -> CandleSeries:
+        return self.candles_by_ticker[self.tickers[row]]
+
+    def is_red(self) -> np.ndarray:
+        return self.close < self.open
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __str__(self):
+        return f"CandleMatrix(tickers={len(self.tickers)}, length={self.length})"
+
+    def __repr__(self):
+        return str(self)
+
+
+class CandleWindowMatrix(CandleMatrix):
+    def __init__(self, candles: CandleSeries, length, indicators=None):
+        # Row i is the window ending at candle i + length - 1. Every column is a
+        # strided view over the series, so no candle data is copied.
+        self.candles = candles
+        self.length = length
+        self.indicators = indicators
+        num_windows = max(len(candles) - length + 1, 0)
+        self.tickers = list(candles.timestamp[length - 1 :]) if num_windows else []
+        for name in COLUMN_NAMES:
+            values = getattr(candles, name)
+            if num_windows:
+                matrix = sliding_window_view(values.astype(np.float64, copy=False), length)
+            else:
+                matrix = np.empty((0, length))
+            setattr(self, name, matrix)
+
+    def get_candles(self, row) -> CandleSeries:
+        window = self.candles[row : row + self.length]
+        window.indicators = self.indicators
+        return window
+
+    def __str__(self):
+        return f"CandleWindowMatrix(windows={len(self.tickers)}, length={self.length})"
@@ -0,0 +1,188 @@
+from typing import Iterable, List
+
+import numpy as np
+
+from kraken_api.model.candle import Candle
+
+# Column order of a single OHLC row as returned by Kraken:
+# [time, open, high, low, close, vwap, volume, count]
+NUM_COLUMNS = 8
+COLUMN_NAMES = [
+    "timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    "vwap",
+    "volume",
+    "trades",
+]
+
+
+class CandleView:
+    __slots__ = ("_series", "_index")
+
+    def __init__(self, series, index):
+        self._series = series
+        self._index = index
+
+    @property
+    def timestamp(self) -> int:
+        return int(self._series.timestamp[self._index])
+
+    @property
+    def open(self) -> float:
+        return float(self._series.open[self._index])
+
+    @property
+    def high(self) -> float:
+        return float(self._series.high[self._index])
+
+    @property
+    def low(self) -> float:
+        return float(self._series.low[self._index])
+
+    @property
+    def close(self) -> float:
+        return float(self._series.close[self._index])
+
+    @property
+    def vwap(self) -> float:
+        return float(self._series.vwap[self._index])
+
+    @property
+    def volume(self) -> float:
+        return float(self._series.volume[self._index])
+
+    @property
+    def trades(self) -> int:
+        return int(self._series.trades[self._index])
+
+    def is_red(self) -> bool:
+        return self.close < self.open
+
+    def __str__(self):
+        return f"Candle(timestamp={self.timestamp}, open={self.open}, high={self.high}, low={self.low}, close={self.close}, vwap={self.vwap}, volume={self.volume}, trades={self.trades})"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+class CandleSeries:
+    def __init__(self, timestamp, open, high, low, close, vwap, volume, trades):
+        self.timestamp: np.ndarray = CandleSeries._read_only(timestamp, np.int64)
+        self.open: np.ndarray = CandleSeries._read_only(open, np.float64)
+        self.high: np.ndarray = CandleSeries._read_only(high, np.float64)
+        self.low: np.ndarray = CandleSeries._read_only(low, np.float64)
+        self.close: np.ndarray = CandleSeries._read_only(close, np.float64)
+        self.vwap: np.ndarray = CandleSeries._read_only(vwap, np.float64)
+        self.volume: np.ndarray = CandleSeries._read_only(volume, np.float64)
+        self.trades: np.ndarray = CandleSeries._read_only(trades, np.float64)
+        # Incremental indicator state follows a window through merge() but is
+        # never carried onto slices.
+        self.indicators = None
+
+    def _read_only(values, dtype):
+        array = np.asarray(values, dtype=dtype)
+        array.flags.writeable = False
+        return array
+
+    def from_rows(rows: List[list]):
+        matrix = np.array(rows, dtype=np.float64).reshape(-1, NUM_COLUMNS)
+        return CandleSeries.from_matrix(matrix)
+
+    def from_matrix(matrix: np.ndarray):
+        return CandleSeries(
+            matrix[:, 0].astype(np.int64),
+            np.ascontiguousarray(matrix[:, 1]),
+            np.ascontiguousarray(matrix[:, 2]),
+            np.ascontiguousarray(matrix[:, 3]),
+            np.ascontiguousarray(matrix[:, 4]),
+            np.ascontiguousarray(matrix[:, 5]),
+            np.ascontiguousarray(matrix[:, 6]),
+            np.ascontiguousarray(matrix[:, 7]),
+        )
+
+    def from_candles(candles: Iterable[Candle]):
+        return CandleSeries.from_rows(
+            [
+                [
+                    candle.timestamp,
+                    candle.open,
+                    candle.high,
+                    candle.low,
+                    candle.close,
+                    candle.vwap,
+                    candle.volume,
+                    candle.trades,
+                ]
+                for candle in candles
+            ]
+        )
+
+    def to_matrix(self) -> np.ndarray:
+        return np.column_stack(
+            [
+                self.timestamp.astype(np.float64),
+                self.open,
+                self.high,
+                self.low,
+                self.close,
+                self.vwap,
+                self.volume,
+                self.trades,
+            ]
+        )
+
+    def merge(self, newer, since=None):
+        # Candles in `newer` replace any stored candle at or after their first
+        # timestamp, which drops the still-forming candle from the last fetch.
+        if len(newer) > 0:
+            keep = self.timestamp < newer.timestamp[0]
+        else:
+            keep = np.ones(len(self), dtype=bool)
+        columns = [
+            np.concatenate([getattr(self, name)[keep], getattr(newer, name)])
+            for name in COLUMN_NAMES
+        ]
+        if since is not None:
+            in_window = columns[0] >= since
+            columns = [column[in_window] for column in columns]
+
+        merged = CandleSeries(*columns)
+        merged.indicators = self.indicators
+        return merged
+
+    def is_red(self) -> np.ndarray:
+        return self.close < self.open
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return CandleSeries(
+                self.timestamp[key],
+                self.open[key],
+                self.high[key],
+                self.low[key],
+                self.close[key],
+                self.vwap[key],
+                self.volume[key],
+                self.trades[key],
+            )
+
+        length = len(self)
+        index = key + length if key < 0 else key
+        if index < 0 or index >= length:
+            raise IndexError(f"candle index {key} out of range for {length} candles")
+        return CandleView(self, index)
+
+    def __iter__(self):
+        return (CandleView(self, index) for index in range(len(self)))
+
+    def __str__(self):
+        return f"CandleSeries(length={len(self)})"
+
+    def __repr__(self):
+        return str(self)
@@ -1,17 +1,111 @@
+import logging
 import threading
 import time
+from collections import namedtuple
+from typing import Callable, List
+
+Snapshot = namedtuple("Snapshot", ["version", "timestamp", "value"])
 
 
 class InMemoryStorage:
-    def __init__(self, base_data_fetcher, refresh_rate=15):
+    def __init__(self, base_data_fetcher, refresh_rate=15, name="storage"):
+        self.base_data_fetcher = base_data_fetcher
         self.refresh_rate = refresh_rate
-        self.stored_value = None
+        self.name = name
+        self.snapshot: Snapshot = None
+        self.subscribers: List[Callable[[Snapshot], None]] = []
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.data_fetching_thread: threading.Thread = None
 
-        def fetch_data():
-            while True:
-                self.stored_value = base_data_fetcher()
+    @property
+    def stored_value(self):
+        snapshot = self.snapshot
+        return None if snapshot is None else snapshot.value
+
+    def get_snapshot(self) -> Snapshot:
+        return self.snapshot
+
+    def subscribe(self, callback: Callable[[Snapshot], None]):
+        with self.condition:
+            self.subscribers = self.subscribers + [callback]
+
+        return callback
+
+    def unsubscribe(self, callback: Callable[[Snapshot], None]):
+        with self.condition:
+            self.subscribers = [
+                subscriber for subscriber in self.subscribers if subscriber != callback
+            ]
+
+    def publish(self, value) -> Snapshot:
+        # Published values are shared by every subscriber and must be treated
+        # as immutable; a new value means a new snapshot.
+        with self.condition:
+            version = 1 if self.snapshot is None else self.snapshot.version + 1
+            snapshot = Snapshot(version, time.time(), value)
+            self.snapshot = snapshot
+            subscribers = self.subscribers
+            self.condition.notify_all()
+
+        for subscriber in subscribers:
+            try:
+                subscriber(snapshot)
+            except Exception as e:
+                logging.error(f"{self.name} subscriber failed: {e}")
+
+        return snapshot
 
-                time.sleep(refresh_rate)
+    def refresh(self):
+        try:
+            value = self.base_data_fetcher()
+        except Exception as e:
+            logging.error(f"Could not refresh {self.name}: {e}")
+            return None
 
-        self.data_fetching_thread = threading.Thread(target=fetch_data)
+        return self.publish(value)
+
+    def wait_for_version(self, after_version=0, timeout=None) -> Snapshot:
+        # Returns None on timeout or once the storage is stopped.
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.stop_event.is_set()
+                or (self.snapshot is not None and self.snapshot.version > after_version),
+                timeout,
+            )
+            if self.snapshot is None or self.snapshot.version <= after_version:
+                return None
+            return self.snapshot
+
+    def start(self):
+        # Without a refresh rate the storage is refreshed by its owner, e.g. a
+        # scheduled job, and only publishes.
+        if self.data_fetching_thread is not None or self.refresh_rate is None:
+            return
+
+        def fetch_data():
+            while not self.stop_event.is_set():
+                self.refresh()
+                self.stop_event.wait(self.refresh_rate)
+
+        self.data_fetching_thread = threading.Thread(
+            target=fetch_data, name=f"{self.name}-fetcher", daemon=True
+        )
         self.data_fetching_thread.start()
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if (
+            self.data_fetching_thread is not None
+            and self.data_fetching_thread is not threading.current_thread()
+        ):
+            self.data_fetching_thread.join(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
@@ -0,0 +1,91 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from kraken_api.model.ticker import (
+    Ask,
+    Bid,
+    High,
+    LastTradeClosed,
+    Low,
+    NumTrades,
+    Ticker,
+    Volume,
+    VolumeWeightedAvg,
+)
+
+# (Ticker attribute, Ticker response key, fields kept from the response array)
+FIELD_GROUPS = [
+    ("ask", "a", Ask._fields),
+    ("bid", "b", Bid._fields),
+    ("last_trade_closed", "c", LastTradeClosed._fields),
+    ("volume", "v", Volume._fields),
+    ("volume_weighted_avg_price", "p", VolumeWeightedAvg._fields),
+    ("num_trades", "t", NumTrades._fields),
+    ("low", "l", Low._fields),
+    ("high", "h", High._fields),
+]
+FIELD_NAMES = [
+    f"{group}_{field}" for group, _, fields in FIELD_GROUPS for field in fields
+] + ["open_price"]
+SNAPSHOT_DTYPE = np.dtype([(name, "<f8") for name in FIELD_NAMES])
+
+
+class MarketSnapshot:
+    def __init__(self, pairs: List[str], data: np.ndarray):
+        self.pairs = list(pairs)
+        self.index: Dict[str, int] = {pair: row for row, pair in enumerate(self.pairs)}
+        self.data = data
+        self.data.flags.writeable = False
+        self.ticker_views: Dict[str, Ticker] = {}
+        for name in FIELD_NAMES:
+            setattr(self, name, self.data[name])
+
+    def from_ticker_data(ticker_data: Dict[str, dict], pairs: Iterable[str] = None):
+        pairs = list(ticker_data.keys() if pairs is None else pairs)
+        values = []
+        for pair in pairs:
+            entry = ticker_data[pair]
+            for _, key, fields in FIELD_GROUPS:
+                values.extend(entry[key][: len(fields)])
+            values.append(entry["o"])
+
+        # Every field is float64 without padding, so the parsed matrix can be
+        # reinterpreted as structured rows without copying.
+        matrix = np.array(values, dtype=np.float64).reshape(len(pairs), len(FIELD_NAMES))
+        return MarketSnapshot(pairs, matrix.view(SNAPSHOT_DTYPE).reshape(len(pairs)))
+
+    def take(self, pairs: Iterable[str]):
+        pairs = [pair for pair in pairs if pair in self.index]
+        rows = np.array([self.index[pair] for pair in pairs], dtype=np.intp)
+        return MarketSnapshot(pairs, self.data[rows])
+
+    def select(self, mask: np.ndarray):
+        rows = np.nonzero(mask)[0]
+        return MarketSnapshot([self.pairs[row] for row in rows], self.data[rows])
+
+    def get_ticker(self, pair) -> Ticker:
+        if pair not in self.ticker_views:
+            values = self.data[self.index[pair]].tolist()
+            groups, start = [], 0
+            for _, _, fields in FIELD_GROUPS:
+                groups.append(values[start : start + len(fields)])
+                start += len(fields)
+            self.ticker_views[pair] = Ticker(pair, *groups, values[-1])
+
+        return self.ticker_views[pair]
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def __contains__(self, pair):
+        return pair in self.index
+
+    def __iter__(self):
+        return (self.get_ticker(pair) for pair in self.pairs)
+
+    def __str__(self):
+        return f"MarketSnapshot(pairs={len(self.pairs)})"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,82 @@
+import gc
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List
+
+import numpy as np
+
+from kraken_api.model.candle_matrix import CandleMatrix
+from kraken_api.model.candle_series import COLUMN_NAMES, CandleSeries
+
+
+class SharedCandleBuffer:
+    # Every candle column of every pair in one shared memory block, laid out
+    # as (column, pair, candle) so a contiguous range of pairs is a plain
+    # view in any process that attaches to it.
+    def __init__(self, num_pairs, length):
+        self.shape = (len(COLUMN_NAMES), num_pairs, length)
+        size = max(num_pairs * length, 1) * len(COLUMN_NAMES) * 8
+        self.memory = SharedMemory(create=True, size=size)
+        self.array = np.ndarray(self.shape, dtype=np.float64, buffer=self.memory.buf)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def write(self, candles_by_ticker: Dict[str, CandleSeries]) -> List[int]:
+        # Series are right-aligned and NaN padded like CandleMatrix.
+        length = self.shape[2]
+        self.array.fill(np.nan)
+        lengths = []
+        for row, candles in enumerate(candles_by_ticker.values()):
+            num_candles = min(len(candles), length)
+            for column, name in enumerate(COLUMN_NAMES):
+                if num_candles > 0:
+                    values = getattr(candles, name)[-num_candles:]
+                    self.array[column, row, length - num_candles :] = values
+            lengths.append(num_candles)
+
+        return lengths
+
+    def close(self):
+        self.array = None
+        self.memory.close()
+        self.memory.unlink()
+
+
+class SharedCandleMatrix(CandleMatrix):
+    def __init__(self, tickers, columns: np.ndarray, lengths: List[int]):
+        # `columns` is a (column, pair, candle) view into a SharedCandleBuffer.
+        self.tickers = tickers
+        self.lengths = lengths
+        self.length = columns.shape[2]
+        self.candles_by_ticker = None
+        for index, name in enumerate(COLUMN_NAMES):
+            matrix = columns[index]
+            matrix.flags.writeable = False
+            setattr(self, name, matrix)
+
+    def get_candles(self, row) -> CandleSeries:
+        start = self.length - self.lengths[row]
+        columns = [getattr(self, name)[row, start:] for name in COLUMN_NAMES]
+        return CandleSeries(*columns)
+
+
+attached_buffers: Dict[str, tuple] = {}
+
+
+def attach_shared_candles(name, shape) -> np.ndarray:
+    # Workers keep the latest buffer mapped between calls; attaching to a new
+    # one releases the old mapping once nothing views it anymore.
+    if name not in attached_buffers:
+        for old_name in list(attached_buffers):
+            memory, _ = attached_buffers.pop(old_name)
+            gc.collect()
+            try:
+                memory.close()
+            except BufferError:
+                pass
+        memory = SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+        attached_buffers[name] = (memory, array)
+
+    return attached_buffers[name][1]
@@ -1,5 +1,5 @@
 class TradeHistoryRecord:
-    def __init__(self, timestamp, ticker, type, cost, fee, price, quantity):
+    def __init__(self, timestamp, ticker, type, cost, fee, price, quantity, txid=None):
         self.timestamp: float = timestamp
         self.ticker = ticker
         self.type = type
@@ -7,9 +7,10 @@ class TradeHistoryRecord:
         self.fee: float = fee
         self.price: float = price
         self.quantity: float = quantity
+        self.txid = txid
 
     def __str__(self) -> str:
-        return f"[timestamp={self.timestamp}, ticker={self.ticker}, type={self.type}, cost={self.cost}, fee={self.fee}, price={self.price}, quantity={self.quantity}]"
+        return f"[txid={self.txid}, timestamp={self.timestamp}, ticker={self.ticker}, type={self.type}, cost={self.cost}, fee={self.fee}, price={self.price}, quantity={self.quantity}]"
 
     def __repr__(self):
         return str(self)
@@ -3,6 +3,7 @@ from enum import Enum
 from kraken_api.paths.request_type import RequestType
 
 BASE_HOST = "https://api.kraken.com"
+WEBSOCKET_HOST = "wss://ws.kraken.com"
 PUBLIC_PATH = "/0/public"
 PRIVATE_PATH = "/0/private"
 
@@ -0,0 +1,50 @@
+import itertools
+import time
+from queue import PriorityQueue
+from threading import Condition
+
+from kraken_api.model.priority import Priority
+
+
+class RateBudget:
+    def __init__(self, limit, decay_per_second):
+        self.limit = limit
+        self.decay_per_second = decay_per_second
+        self.counter = 0.0
+        self.last_update = time.monotonic()
+        self.queue = PriorityQueue()
+        self.condition = Condition()
+        self.sequence = itertools.count()
+
+    def _decay(self):
+        now = time.monotonic()
+        self.counter = max(
+            self.counter - (now - self.last_update) * self.decay_per_second, 0.0
+        )
+        self.last_update = now
+
+    def level(self) -> float:
+        with self.condition:
+            self._decay()
+            return self.counter
+
+    def acquire(self, cost, priority=Priority.MEDIUM):
+        cost = min(cost, self.limit)
+        # Higher priorities are served first, equal priorities in arrival order.
+        ticket = (-priority.value, next(self.sequence))
+        with self.condition:
+            self.queue.put(ticket)
+            while True:
+                self._decay()
+                if self.queue.queue[0] != ticket:
+                    self.condition.wait()
+                    continue
+
+                excess = self.counter + cost - self.limit
+                if excess <= 0:
+                    break
+                self.condition.wait(excess / self.decay_per_second)
+
+            self.queue.get()
+            self.counter += cost
+            self.condition.notify_all()
@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import Callable, Dict
+
+from kraken_api.paths.kraken_api_paths import KrakenPaths
+
+# Seconds a public response stays fresh. Paths without a TTL are never cached.
+DEFAULT_TTLS = {
+    KrakenPaths.TICKER_INFO_PATH: 5,
+    KrakenPaths.ASSET_INFO_PATH: 60 * 60,
+}
+DEFAULT_MAX_ENTRIES = 256
+
+
+class ResponseCache:
+    def __init__(
+        self, ttls: Dict[KrakenPaths, float] = None, max_entries=DEFAULT_MAX_ENTRIES
+    ):
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.in_flight: Dict[tuple, Future] = {}
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def get_ttl(self, path: KrakenPaths):
+        return self.ttls.get(path)
+
+    def get_key(path: KrakenPaths, params={}):
+        return (path, tuple(sorted(params.items())))
+
+    def _get_fresh(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return False, None
+
+        self.entries.move_to_end(key)
+        return True, value
+
+    def get(self, key):
+        with self.lock:
+            found, value = self._get_fresh(key)
+            if found:
+                self.hits += 1
+            return found, value
+
+    def put(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_load(self, key, ttl, load: Callable[[], object]):
+        # Cached responses are shared between callers and must not be mutated.
+        with self.lock:
+            found, value = self._get_fresh(key)
+            if found:
+                self.hits += 1
+                return value
+
+            future = self.in_flight.get(key)
+            is_loader = future is None
+            if is_loader:
+                future = Future()
+                self.in_flight[key] = future
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not is_loader:
+            return future.result()
+
+        try:
+            value = load()
+        except BaseException as e:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(e)
+            raise
+
+        self.put(key, value, ttl)
+        with self.lock:
+            del self.in_flight[key]
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "entries": len(self.entries),
+            }
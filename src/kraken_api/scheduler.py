@@ -0,0 +1,205 @@
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable
+
+from kraken_api.model.interval import TradeInterval
+
+# Seconds to wait after a boundary so the exchange has closed the candle.
+DEFAULT_SETTLE_DELAY = 2
+MAX_RECORDED_MISSES = 1000
+
+MissedSlot = namedtuple("MissedSlot", ["key", "slot", "reason"])
+
+
+class ScheduledJob:
+    def __init__(
+        self,
+        key: Hashable,
+        period,
+        run: Callable[[float], None],
+        offset=0,
+        deadline=None,
+        on_missed: Callable[[float], None] = None,
+    ):
+        self.key = key
+        self.period = period
+        self.run = run
+        self.offset = offset
+        # A slot has to start within `deadline` seconds of its planned time.
+        self.deadline = period if deadline is None else deadline
+        self.on_missed = on_missed
+        self.running = False
+        self.completed = 0
+        self.missed = 0
+        self.late = 0
+
+    def get_next_slot(self, now):
+        # Slots are period boundaries; the job runs `offset` seconds after one.
+        return (math.floor((now - self.offset) / self.period) + 1) * self.period
+
+
+class Scheduler:
+    def __init__(self, max_workers=4, clock: Callable[[], float] = time.time):
+        self.max_workers = max_workers
+        self.clock = clock
+        self.jobs: Dict[Hashable, ScheduledJob] = {}
+        self.queue = []
+        self.sequence = itertools.count()
+        self.missed_slots = deque(maxlen=MAX_RECORDED_MISSES)
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.executor: ThreadPoolExecutor = None
+        self.scheduler_thread: threading.Thread = None
+
+    def add_job(
+        self,
+        key: Hashable,
+        period,
+        run: Callable[[float], None],
+        offset=0,
+        deadline=None,
+        on_missed: Callable[[float], None] = None,
+        start_now=False,
+        first_slot=None,
+    ) -> ScheduledJob:
+        job = ScheduledJob(key, period, run, offset, deadline, on_missed)
+        with self.condition:
+            if key in self.jobs:
+                raise Exception(f"Job {key} is already scheduled")
+            self.jobs[key] = job
+            now = self.clock()
+            next_slot = job.get_next_slot(now)
+            if first_slot is not None:
+                # Jobs given the same first slot all run it, each at its offset
+                # or right away if that has already passed.
+                self.schedule(job, first_slot, max(now, first_slot + offset))
+            elif start_now:
+                # Catch up on the current slot right away, keeping the offset
+                # so that staggered jobs stay staggered.
+                self.schedule(job, next_slot - period, now + offset)
+            else:
+                self.schedule(job, next_slot)
+            self.condition.notify_all()
+        return job
+
+    def add_interval_job(
+        self,
+        key: Hashable,
+        interval: TradeInterval,
+        run: Callable[[float], None],
+        offset=DEFAULT_SETTLE_DELAY,
+        on_missed: Callable[[float], None] = None,
+        start_now=False,
+        first_slot=None,
+    ) -> ScheduledJob:
+        return self.add_job(
+            key,
+            interval.value * 60,
+            run,
+            offset,
+            on_missed=on_missed,
+            start_now=start_now,
+            first_slot=first_slot,
+        )
+
+    def schedule(self, job: ScheduledJob, slot, run_at=None):
+        run_at = slot + job.offset if run_at is None else run_at
+        heapq.heappush(self.queue, (run_at, next(self.sequence), job.key, slot))
+
+    def record_missed(self, job: ScheduledJob, slot, reason):
+        job.missed += 1
+        self.missed_slots.append(MissedSlot(job.key, slot, reason))
+        logging.warning(f"Missed {job.key} slot at {slot}: {reason}")
+        if job.on_missed is not None:
+            try:
+                job.on_missed(slot)
+            except Exception as e:
+                logging.error(f"Missed slot handler for {job.key} failed: {e}")
+
+    def execute(self, job: ScheduledJob, slot, deadline_at):
+        try:
+            job.run(slot)
+            job.completed += 1
+        except Exception as e:
+            logging.error(f"Scheduled job {job.key} failed for slot {slot}: {e}")
+        finally:
+            with self.condition:
+                job.running = False
+            if self.clock() > deadline_at:
+                job.late += 1
+                logging.warning(f"{job.key} finished late for slot {slot}")
+
+    def run_pending(self, submit=None) -> float:
+        # Starts every due job and returns the time of the next planned run.
+        submit = submit or self.executor.submit
+        now = self.clock()
+        with self.condition:
+            due = []
+            while self.queue and self.queue[0][0] <= now:
+                run_at, _, key, slot = heapq.heappop(self.queue)
+                job = self.jobs[key]
+                self.schedule(job, job.get_next_slot(max(now, run_at)))
+                due.append((job, slot, run_at))
+
+        for job, slot, run_at in due:
+            deadline_at = run_at + job.deadline
+            if now > deadline_at:
+                self.record_missed(job, slot, "started past its deadline")
+                continue
+            with self.condition:
+                is_running = job.running
+                job.running = True
+            if is_running:
+                self.record_missed(job, slot, "previous run still in progress")
+                continue
+            submit(self.execute, job, slot, deadline_at)
+
+        with self.condition:
+            return self.queue[0][0] if self.queue else None
+
+    def run(self):
+        while not self.stop_event.is_set():
+            next_run_at = self.run_pending()
+            with self.condition:
+                timeout = None if next_run_at is None else next_run_at - self.clock()
+                if timeout is None or timeout > 0:
+                    self.condition.wait(timeout)
+
+    def start(self):
+        if self.scheduler_thread is not None:
+            return
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="scheduled-job"
+        )
+        self.scheduler_thread = threading.Thread(
+            target=self.run, name="scheduler", daemon=True
+        )
+        self.scheduler_thread.start()
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if self.scheduler_thread is not None:
+            self.scheduler_thread.join(timeout)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self) -> Dict[Hashable, Dict[str, int]]:
+        return {
+            key: {"completed": job.completed, "missed": job.missed, "late": job.late}
+            for key, job in self.jobs.items()
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
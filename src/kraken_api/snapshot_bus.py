@@ -0,0 +1,50 @@
+from typing import Callable, Dict
+
+from kraken_api.model.in_memory_storage import InMemoryStorage, Snapshot
+
+
+class SnapshotBus:
+    def __init__(self):
+        self.sources: Dict[str, InMemoryStorage] = {}
+
+    def add_source(self, name, fetcher: Callable[[], object], refresh_rate=None):
+        if name in self.sources:
+            raise Exception(f"Snapshot source {name} is already registered")
+
+        self.sources[name] = InMemoryStorage(fetcher, refresh_rate, name)
+        return self.sources[name]
+
+    def get_source(self, name) -> InMemoryStorage:
+        if name not in self.sources:
+            raise Exception(f"Unknown snapshot source {name}")
+
+        return self.sources[name]
+
+    def get_snapshot(self, name) -> Snapshot:
+        return self.get_source(name).get_snapshot()
+
+    def subscribe(self, name, callback: Callable[[Snapshot], None]):
+        return self.get_source(name).subscribe(callback)
+
+    def unsubscribe(self, name, callback: Callable[[Snapshot], None]):
+        self.get_source(name).unsubscribe(callback)
+
+    def wait_for_version(self, name, after_version=0, timeout=None) -> Snapshot:
+        return self.get_source(name).wait_for_version(after_version, timeout)
+
+    def start(self):
+        for source in self.sources.values():
+            source.start()
+
+    def stop(self, timeout=None):
+        for source in self.sources.values():
+            source.stop_event.set()
+        for source in self.sources.values():
+            source.stop(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
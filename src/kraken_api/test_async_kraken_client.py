@@ -0,0 +1,76 @@
+import asyncio
+import base64
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from kraken_api.async_kraken_client import AsyncKrakenClient
+from kraken_api.configuration.kraken_config import KrakenConfiguration
+from kraken_api.transport import KrakenTransport
+
+
+class StubKrakenHandler(BaseHTTPRequestHandler):
+    def reply(self, result):
+        body = json.dumps({"error": [], "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        pair = parse_qs(url.query)["pair"][0]
+        since = int(parse_qs(url.query)["since"][0])
+        rows = [[since + i * 3600, "1", "2", "0.5", "1.5", "1", "10", 3] for i in range(3)]
+        self.reply({pair: rows, "last": since + 3600})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if "API-Sign" not in self.headers:
+            self.send_response(403)
+            self.end_headers()
+            return
+        self.reply({"open": {}})
+
+    def log_message(self, *_):
+        pass
+
+
+class TestAsyncKrakenClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubKrakenHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_host = f"http://127.0.0.1:{self.server.server_port}"
+        config = KrakenConfiguration(
+            api_private_key=base64.b64encode(b"secret").decode(), api_key="key"
+        )
+        self.client = AsyncKrakenClient(
+            config, KrakenTransport(max_retries=0), self.base_host
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_gather_candles_fetches_every_pair(self):
+        async def gather():
+            async with self.client:
+                return await self.client.gather_candles(["XBTUSD", "ETHUSD", "SOLUSD"])
+
+        candles = asyncio.run(gather())
+
+        self.assertEqual(sorted(candles), ["ETHUSD", "SOLUSD", "XBTUSD"])
+        self.assertTrue(all(len(series) == 3 for series in candles.values()))
+
+    def test_private_calls_are_signed(self):
+        async def open_trades():
+            async with self.client:
+                return await self.client.get_open_trades()
+
+        self.assertEqual(asyncio.run(open_trades()), {"open": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
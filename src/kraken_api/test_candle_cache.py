@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+
+from kraken_api.candle_cache import CandleCache
+from kraken_api.candle_store import CandleStore, find_gaps
+from kraken_api.kraken_client import KrakenClient
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.interval import TradeInterval
+
+
+class FakeCandleClient:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested_since = []
+
+    def get_candle_data_since(self, ticker, since, interval):
+        self.requested_since.append(since)
+        rows, last = self.responses.pop(0)
+        return CandleSeries.from_rows(rows), last
+
+
+def candle_row(timestamp, close):
+    return [timestamp, close, close, close, close, close, 1, 1]
+
+
+class TestCandleCache(unittest.TestCase):
+    def test_second_fetch_uses_cursor_and_replaces_forming_candle(self):
+        start = KrakenClient.get_candle_window_start(1, TradeInterval.ONE_HOUR)
+        first = [candle_row(start + i * 3600, i) for i in range(25)]
+        second = [candle_row(start + 24 * 3600, 100), candle_row(start + 25 * 3600, 101)]
+        client = FakeCandleClient(
+            [(first, start + 23 * 3600), (second, start + 24 * 3600)]
+        )
+        cache = CandleCache(client)
+
+        cache.get_candle_data_for_ticker("XBTUSD", days_back=1)
+        candles = cache.get_candle_data_for_ticker("XBTUSD", days_back=1)
+
+        self.assertEqual(client.requested_since, [start, start + 23 * 3600])
+        self.assertEqual(len(candles), 26)
+        self.assertEqual(list(candles.close[-3:]), [23.0, 100.0, 101.0])
+
+    def test_restart_reads_store_and_fetches_only_missing_candles(self):
+        start = KrakenClient.get_candle_window_start(1, TradeInterval.ONE_HOUR)
+        first = [candle_row(start + i * 3600, i) for i in range(25)]
+        second = [candle_row(start + 24 * 3600, 100)]
+        with tempfile.TemporaryDirectory() as directory:
+            CandleCache(
+                FakeCandleClient([(first, start + 23 * 3600)]), CandleStore(directory)
+            ).get_candle_data_for_ticker("XBT/USD", days_back=1)
+
+            client = FakeCandleClient([(second, start + 23 * 3600)])
+            candles = CandleCache(
+                client, CandleStore(directory)
+            ).get_candle_data_for_ticker("XBT/USD", days_back=1)
+            stored = CandleStore(directory).read("XBT/USD", TradeInterval.ONE_HOUR)
+
+        self.assertEqual(client.requested_since, [start + 23 * 3600])
+        self.assertEqual(len(stored), 24)
+        self.assertFalse(stored.close.flags.owndata)
+        self.assertEqual(len(candles), 25)
+        self.assertEqual(candles[-1].close, 100.0)
+
+    def test_resampled_candles_reuse_the_base_window(self):
+        start = KrakenClient.get_candle_window_start(2, TradeInterval.ONE_HOUR)
+        rows = [candle_row(start + i * 3600, i) for i in range(49)]
+        client = FakeCandleClient([(rows, start + 47 * 3600)])
+        cache = CandleCache(client)
+
+        four_hour = cache.get_resampled_candle_data_for_ticker(
+            "XBTUSD", TradeInterval.FOUR_HOUR, days_back=2
+        )
+        one_day = cache.get_resampled_candle_data_for_ticker(
+            "XBTUSD", TradeInterval.ONE_DAY, days_back=2
+        )
+
+        self.assertEqual(len(client.requested_since), 1)
+        self.assertTrue((four_hour.timestamp % (4 * 3600) == 0).all())
+        self.assertEqual(four_hour.close[-1], 48.0)
+        self.assertEqual(one_day.close[-1], 48.0)
+
+    def test_find_gaps_reports_missing_intervals(self):
+        candles = CandleSeries.from_rows(
+            [candle_row(0, 1), candle_row(3600, 1), candle_row(4 * 3600, 1)]
+        )
+
+        self.assertEqual(find_gaps(candles, TradeInterval.ONE_HOUR), [(3600, 14400)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+from kraken_api.candle_resampler import CandleResampler, resample
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.interval import TradeInterval
+
+FOUR_HOURS = 4 * 3600
+
+
+def hourly_candles(start, count, offset=0):
+    rows = []
+    for i in range(offset, offset + count):
+        price = 100 + i
+        rows.append(
+            [start + i * 3600, price, price + 2, price - 1, price + 1, price, i + 1, 2]
+        )
+    return CandleSeries.from_rows(rows)
+
+
+class TestCandleResampler(unittest.TestCase):
+    def test_resample_aggregates_each_bucket(self):
+        start = 1000 * FOUR_HOURS
+        candles = resample(hourly_candles(start, 6), TradeInterval.FOUR_HOUR)
+
+        self.assertEqual(list(candles.timestamp), [start, start + FOUR_HOURS])
+        self.assertEqual(list(candles.open), [100, 104])
+        self.assertEqual(list(candles.high), [105, 107])
+        self.assertEqual(list(candles.low), [99, 103])
+        self.assertEqual(list(candles.close), [104, 106])
+        self.assertEqual(list(candles.volume), [10, 11])
+        self.assertEqual(list(candles.trades), [8, 4])
+        self.assertAlmostEqual(candles.vwap[0], (100 + 202 + 306 + 412) / 10)
+
+    def test_incomplete_leading_bucket_is_dropped(self):
+        start = 1000 * FOUR_HOURS
+        candles = resample(hourly_candles(start - 2 * 3600, 6), TradeInterval.FOUR_HOUR)
+
+        self.assertEqual(list(candles.timestamp), [start])
+        self.assertEqual(candles.open[0], 102)
+
+    def test_open_bar_is_updated_incrementally(self):
+        start = 1000 * FOUR_HOURS
+        resampler = CandleResampler(TradeInterval.FOUR_HOUR)
+        resampler.update(hourly_candles(start, 6))
+
+        base = CandleSeries.from_matrix(
+            np.vstack(
+                [
+                    hourly_candles(start, 4, offset=2).to_matrix(),
+                    hourly_candles(start, 4, offset=6).to_matrix(),
+                ]
+            )
+        )
+        candles = resampler.update(base)
+
+        self.assertEqual(
+            list(candles.timestamp), [start + FOUR_HOURS, start + 2 * FOUR_HOURS]
+        )
+        self.assertEqual(list(candles.close), [108, 110])
+        self.assertEqual(list(candles.volume), [5 + 6 + 7 + 8, 9 + 10])
+        np.testing.assert_array_equal(
+            candles.to_matrix(), resample(base, TradeInterval.FOUR_HOUR).to_matrix()
+        )
+
+    def test_rejects_intervals_that_are_not_multiples(self):
+        with self.assertRaises(Exception):
+            CandleResampler(TradeInterval.ONE_HOUR, TradeInterval.FOUR_HOUR)
+
+
+if __name__ == "__main__":
+    unittest.main()
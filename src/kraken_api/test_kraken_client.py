@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+import unittest
+
+from kraken_api.configuration.kraken_config import KrakenConfiguration
+from kraken_api.kraken_client import (
+    REQUEST_DURATION,
+    REQUEST_ERRORS,
+    REQUEST_RETRIES,
+    RESPONSE_BYTES,
+    KrakenClient,
+)
+from kraken_api.model.api_error import KrakenApiError
+from kraken_api.paths.kraken_api_paths import KrakenPaths
+from kraken_api.response_cache import ResponseCache
+from kraken_api.transport import KrakenTransport
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode()
+
+
+class FakeTransport(KrakenTransport):
+    def __init__(self, responses, max_retries=3, delay=0):
+        super().__init__(max_retries=max_retries, backoff_base=0)
+        self.responses = responses
+        self.delay = delay
+        self.calls = 0
+
+    def get(self, uri, params=None, headers=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.responses.pop(0)
+
+
+class TestKrakenClient(unittest.TestCase):
+    def test_retries_internal_errors_and_server_errors(self):
+        transport = FakeTransport(
+            [
+                FakeResponse(502, {}),
+                FakeResponse(200, {"error": ["EGeneral:Internal error"]}),
+                FakeResponse(200, {"error": [], "result": {"XBTUSD": {}}}),
+            ]
+        )
+        client = KrakenClient(KrakenConfiguration(), transport)
+
+        result = client.perform_request(KrakenPaths.TICKER_INFO_PATH)
+
+        self.assertEqual(result, {"XBTUSD": {}})
+        self.assertEqual(transport.calls, 3)
+
+    def test_records_request_metrics(self):
+        path = KrakenPaths.ASSET_INFO_PATH
+        responses = [
+            FakeResponse(502, {}),
+            FakeResponse(200, {"error": [], "result": {"XBTUSD": {}}}),
+        ]
+        num_bytes = sum(len(response.content) for response in responses)
+        before = (
+            REQUEST_DURATION.get_count(path=path.name),
+            RESPONSE_BYTES.get(path=path.name),
+            REQUEST_ERRORS.get(path=path.name, status=502),
+            REQUEST_RETRIES.get(path=path.name),
+        )
+        client = KrakenClient(KrakenConfiguration(), FakeTransport(responses))
+
+        client.perform_request(path)
+
+        after = (
+            REQUEST_DURATION.get_count(path=path.name),
+            RESPONSE_BYTES.get(path=path.name),
+            REQUEST_ERRORS.get(path=path.name, status=502),
+            REQUEST_RETRIES.get(path=path.name),
+        )
+        self.assertEqual([a - b for a, b in zip(after, before)], [2, num_bytes, 1, 1])
+
+    def test_does_not_retry_other_errors(self):
+        transport = FakeTransport(
+            [FakeResponse(200, {"error": ["EQuery:Unknown asset pair"]})]
+        )
+        client = KrakenClient(KrakenConfiguration(), transport)
+
+        with self.assertRaises(KrakenApiError):
+            client.perform_request(KrakenPaths.TICKER_INFO_PATH)
+        self.assertEqual(transport.calls, 1)
+
+    def test_gives_up_after_max_retries(self):
+        transport = FakeTransport([FakeResponse(503, {})] * 3, max_retries=2)
+        client = KrakenClient(KrakenConfiguration(), transport)
+
+        with self.assertRaises(KrakenApiError):
+            client.perform_request(KrakenPaths.TICKER_INFO_PATH)
+        self.assertEqual(transport.calls, 3)
+
+    def test_caches_public_responses_by_path_and_params(self):
+        transport = FakeTransport(
+            [
+                FakeResponse(200, {"error": [], "result": {"XBTUSD": {}}}),
+                FakeResponse(200, {"error": [], "result": {"ETHUSD": {}}}),
+            ]
+        )
+        client = KrakenClient(KrakenConfiguration(), transport)
+
+        first = client.perform_request(KrakenPaths.TICKER_INFO_PATH)
+        second = client.perform_request(KrakenPaths.TICKER_INFO_PATH)
+        other = client.perform_request(
+            KrakenPaths.TICKER_INFO_PATH, params={"pair": "ETHUSD"}
+        )
+
+        self.assertIs(first, second)
+        self.assertEqual(other, {"ETHUSD": {}})
+        self.assertEqual(transport.calls, 2)
+        self.assertEqual(client.response_cache.get_stats()["hits"], 1)
+        self.assertEqual(client.response_cache.get_stats()["misses"], 2)
+
+    def test_concurrent_callers_share_one_request(self):
+        transport = FakeTransport(
+            [FakeResponse(200, {"error": [], "result": {"XBTUSD": {}}})], delay=0.2
+        )
+        client = KrakenClient(KrakenConfiguration(), transport)
+        results = []
+
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    client.perform_request(KrakenPaths.TICKER_INFO_PATH)
+                )
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [{"XBTUSD": {}}] * 5)
+        self.assertEqual(transport.calls, 1)
+        self.assertEqual(client.response_cache.get_stats()["shared"], 4)
+
+    def test_response_cache_expires_and_evicts_least_recently_used(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", 1, ttl=60)
+        cache.put("b", 2, ttl=60)
+        cache.get("a")
+        cache.put("c", 3, ttl=60)
+
+        self.assertEqual(cache.get("a"), (True, 1))
+        self.assertEqual(cache.get("b"), (False, None))
+
+        cache.put("d", 4, ttl=0)
+        self.assertEqual(cache.get("d"), (False, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from kraken_api.market_stream import MarketStream
+from kraken_api.model.candle_series import CandleSeries
+
+
+def ticker_message(last_price, volume_today):
+    entry = {
+        "a": ["1.1", 1, "1.0"],
+        "b": ["1.0", 1, "1.0"],
+        "c": [last_price, "1.0"],
+        "v": [volume_today, "200"],
+        "p": ["1.0", "1.0"],
+        "t": [10, 20],
+        "l": ["0.9", "0.9"],
+        "h": ["1.2", "1.2"],
+        "o": ["1.0", "1.0"],
+    }
+    return [42, entry, "ticker", "XBT/USD"]
+
+
+def ohlc_message(end_time, close):
+    entry = [str(end_time - 10), f"{end_time}.0", "1", "2", "0.5", close, "1", "5", 3]
+    return [43, entry, "ohlc-60", "XBT/USD"]
+
+
+class TestMarketStream(unittest.TestCase):
+    def test_ticker_listeners_compare_ticks_a_ticker_interval_apart(self):
+        now = [0]
+        stream = MarketStream({"XBTUSD": "XBT/USD"}, clock=lambda: now[0])
+        updates = []
+        stream.on_ticker(
+            lambda prev, cur: updates.append((prev.volume.today, cur.volume.today))
+        )
+
+        for second, volume in [(0, "100"), (10, "101"), (20, "102"), (31, "106")]:
+            now[0] = second
+            stream.handle_ticker("XBTUSD", ticker_message("1.0", volume)[1])
+        self.assertEqual(updates, [(100.0, 106.0)])
+        self.assertEqual(stream.tickers["XBTUSD"].volume.today, 106.0)
+
+        now[0] = 45
+        stream.handle_ticker("XBTUSD", ticker_message("1.0", "107")[1])
+        self.assertEqual(len(updates), 1)
+
+    def test_streams_updates_and_resyncs_after_reconnect(self):
+        subscriptions = []
+
+        async def websocket_handler(request):
+            websocket = web.WebSocketResponse()
+            await websocket.prepare(request)
+            subscriptions.append(await websocket.receive_json())
+            subscriptions.append(await websocket.receive_json())
+            await websocket.send_json({"event": "subscriptionStatus", "status": "subscribed"})
+            await websocket.send_json(ticker_message("1.0", "100"))
+            await websocket.send_json(ticker_message("1.1", "110"))
+            await websocket.send_json(ohlc_message(7200, "1.7"))
+            await websocket.send_json(ohlc_message(10800, "1.8"))
+            await websocket.close()
+            return websocket
+
+        loaded = []
+
+        def candle_loader(ticker):
+            loaded.append(ticker)
+            return CandleSeries.from_rows(
+                [[0, 1, 1, 1, 1, 1, 1, 1], [3600, 1, 1, 1, 1.5, 1, 1, 1]]
+            )
+
+        ticker_updates = []
+        candle_updates = []
+
+        async def run():
+            app = web.Application()
+            app.router.add_get("/", websocket_handler)
+            async with TestServer(app) as server:
+                stream = MarketStream(
+                    {"XBTUSD": "XBT/USD"},
+                    candle_loader=candle_loader,
+                    url=str(server.make_url("/")),
+                    reconnect_delay=0.01,
+                    ticker_interval=0,
+                )
+                stream.on_ticker(lambda prev, cur: ticker_updates.append((prev, cur)))
+                stream.on_candle(lambda ticker, candles: candle_updates.append(candles))
+                task = asyncio.create_task(stream.run())
+                while stream.connections < 2 or len(candle_updates) < 4:
+                    await asyncio.sleep(0.01)
+                stream.stop()
+                await asyncio.wait_for(task, 5)
+                return stream
+
+        stream = asyncio.run(run())
+
+        self.assertEqual(subscriptions[1]["subscription"], {"name": "ohlc", "interval": 60})
+        self.assertEqual(loaded, ["XBTUSD", "XBTUSD"])
+        prev, cur = ticker_updates[0]
+        self.assertEqual((prev.volume.today, cur.volume.today), (100.0, 110.0))
+        self.assertEqual(list(candle_updates[0].close), [1.0, 1.7])
+        self.assertEqual(list(candle_updates[0].timestamp), [0, 3600])
+        self.assertEqual(list(candle_updates[1].timestamp), [3600, 7200])
+        self.assertEqual(list(stream.candles["XBTUSD"].close), [1.7, 1.8])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import threading
+import time
+import unittest
+
+from kraken_api.model.priority import Priority
+from kraken_api.rate_budget import RateBudget
+
+
+class TestRateBudget(unittest.TestCase):
+    def test_acquire_does_not_block_within_limit(self):
+        budget = RateBudget(5, 1)
+        start = time.monotonic()
+
+        for _ in range(5):
+            budget.acquire(1)
+
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertAlmostEqual(budget.level(), 5, delta=0.1)
+
+    def test_waiting_calls_are_served_by_priority(self):
+        budget = RateBudget(2, 20)
+        budget.acquire(2)
+        served = []
+
+        def call(priority):
+            budget.acquire(1, priority)
+            served.append(priority)
+
+        with budget.condition:
+            threads = [
+                threading.Thread(target=call, args=[priority])
+                for priority in [Priority.LOW, Priority.MEDIUM, Priority.HIGH]
+            ]
+            for thread in threads:
+                thread.start()
+            while budget.queue.qsize() < 3:
+                budget.condition.wait(0.01)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(served, [Priority.HIGH, Priority.MEDIUM, Priority.LOW])
+
+
+if __name__ == "__main__":
+    unittest.main()
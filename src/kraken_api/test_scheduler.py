@@ -0,0 +1,110 @@
+import unittest
+
+from kraken_api.model.interval import TradeInterval
+from kraken_api.scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def run_inline(func, *args):
+    func(*args)
+
+
+class TestScheduler(unittest.TestCase):
+    def test_jobs_run_just_after_the_interval_boundary(self):
+        clock = FakeClock(3590)
+        scheduler = Scheduler(clock=clock)
+        slots = []
+        scheduler.add_interval_job("candles", TradeInterval.ONE_HOUR, slots.append)
+
+        self.assertEqual(scheduler.run_pending(run_inline), 3602)
+        self.assertEqual(slots, [])
+
+        clock.now = 3602.5
+        self.assertEqual(scheduler.run_pending(run_inline), 7202)
+        self.assertEqual(slots, [3600])
+
+    def test_start_now_runs_the_current_slot_with_its_offset(self):
+        clock = FakeClock(100)
+        scheduler = Scheduler(clock=clock)
+        slots = []
+        scheduler.add_job("tickers", 30, slots.append, offset=5, start_now=True)
+
+        self.assertEqual(scheduler.run_pending(run_inline), 105)
+        clock.now = 105
+        self.assertEqual(scheduler.run_pending(run_inline), 125)
+        self.assertEqual(slots, [90])
+
+    def test_jobs_sharing_a_first_slot_all_run_it(self):
+        clock = FakeClock(3605)
+        scheduler = Scheduler(clock=clock)
+        runs = []
+        for offset in (2, 10):
+            scheduler.add_job(
+                offset,
+                3600,
+                lambda slot, offset=offset: runs.append((offset, slot, clock.now)),
+                offset=offset,
+                first_slot=3600,
+            )
+
+        self.assertEqual(scheduler.run_pending(run_inline), 3610)
+        clock.now = 3610
+        self.assertEqual(scheduler.run_pending(run_inline), 7202)
+        self.assertEqual(runs, [(2, 3600, 3605), (10, 3600, 3610)])
+
+    def test_overlapping_runs_are_recorded_as_missed(self):
+        clock = FakeClock(0)
+        scheduler = Scheduler(clock=clock)
+        submitted = []
+        missed = []
+        scheduler.add_job(
+            "positions",
+            60,
+            lambda slot: None,
+            on_missed=missed.append,
+        )
+
+        clock.now = 60
+        scheduler.run_pending(lambda *args: submitted.append(args))
+        clock.now = 120
+        scheduler.run_pending(lambda *args: submitted.append(args))
+
+        self.assertEqual(len(submitted), 1)
+        self.assertEqual(missed, [120])
+        self.assertEqual(
+            scheduler.missed_slots[0].reason, "previous run still in progress"
+        )
+
+        clock.now = 125
+        run_inline(*submitted[0])
+        clock.now = 180
+        scheduler.run_pending(run_inline)
+        self.assertEqual(
+            scheduler.get_stats()["positions"], {"completed": 2, "missed": 1, "late": 1}
+        )
+
+    def test_slots_past_their_deadline_are_skipped(self):
+        clock = FakeClock(0)
+        scheduler = Scheduler(clock=clock)
+        slots = []
+        scheduler.add_job("candles", 60, slots.append, deadline=10)
+
+        clock.now = 75
+        self.assertEqual(scheduler.run_pending(run_inline), 120)
+        self.assertEqual(slots, [])
+        self.assertEqual(scheduler.missed_slots[0].slot, 60)
+
+        clock.now = 125
+        scheduler.run_pending(run_inline)
+        self.assertEqual(slots, [120])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import itertools
+import threading
+import unittest
+
+from kraken_api.snapshot_bus import SnapshotBus
+
+
+class TestSnapshotBus(unittest.TestCase):
+    def test_subscribers_receive_versioned_snapshots(self):
+        counter = itertools.count(1)
+        snapshot_bus = SnapshotBus()
+        snapshot_bus.add_source("tickers", lambda: next(counter), refresh_rate=0.01)
+        received = []
+        snapshot_bus.subscribe("tickers", received.append)
+
+        with snapshot_bus:
+            snapshot = snapshot_bus.wait_for_version("tickers", 2, timeout=5)
+
+        self.assertGreaterEqual(snapshot.version, 3)
+        self.assertEqual(snapshot.value, snapshot.version)
+        self.assertEqual(
+            [snapshot.version for snapshot in received],
+            list(range(1, len(received) + 1)),
+        )
+
+    def test_failed_fetches_do_not_publish(self):
+        snapshot_bus = SnapshotBus()
+        source = snapshot_bus.add_source("positions", lambda: 1 / 0, refresh_rate=1)
+
+        self.assertIsNone(source.refresh())
+        self.assertIsNone(snapshot_bus.get_snapshot("positions"))
+
+    def test_stop_wakes_waiting_consumers(self):
+        snapshot_bus = SnapshotBus()
+        snapshot_bus.add_source("candles", dict, refresh_rate=60)
+        results = []
+
+        with snapshot_bus:
+            first = snapshot_bus.wait_for_version("candles", timeout=5)
+            waiter = threading.Thread(
+                target=lambda: results.append(
+                    snapshot_bus.wait_for_version("candles", first.version)
+                )
+            )
+            waiter.start()
+
+        waiter.join(timeout=5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(results, [None])
+        self.assertFalse(
+            snapshot_bus.get_source("candles").data_fetching_thread.is_alive()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
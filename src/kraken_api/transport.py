@@ -0,0 +1,66 @@
+import random
+import time
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from kraken_api.paths.kraken_api_paths import BASE_HOST
+
+DEFAULT_POOL_SIZE = 10
+
+
+class KrakenTransport:
+    def __init__(
+        self,
+        pool_sizes: Dict[str, int] = {BASE_HOST: DEFAULT_POOL_SIZE},
+        connect_timeout=3.05,
+        read_timeout=15,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=8,
+    ):
+        self.pool_sizes = dict(pool_sizes)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "User-Agent": "Python API Client",
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+            }
+        )
+        for host, pool_size in pool_sizes.items():
+            self.set_pool_size(host, pool_size)
+
+    def set_pool_size(self, host, pool_size):
+        self.pool_sizes[host] = pool_size
+        self.session.mount(
+            host, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        )
+
+    def get_pool_size(self, host):
+        return self.pool_sizes.get(host, DEFAULT_POOL_SIZE)
+
+    def get_backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def wait_before_retry(self, attempt):
+        time.sleep(self.get_backoff(attempt))
+
+    def get(self, uri, params=None, headers=None) -> requests.Response:
+        return self.session.get(
+            uri, params=params, headers=headers, timeout=self.timeout
+        )
+
+    def post(self, uri, params=None, data=None, headers=None) -> requests.Response:
+        return self.session.post(
+            uri, params=params, data=data, headers=headers, timeout=self.timeout
+        )
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,221 @@
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def format_labels(names, values):
+    if len(names) == 0:
+        return ""
+    labels = ",".join(
+        f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + labels + "}"
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(self, name, documentation, label_names: List[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values: Dict[Tuple[str, ...], object] = {}
+        self.lock = Lock()
+
+    def get_key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise Exception(
+                f"{self.name} expects labels {self.label_names}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def get_samples(self) -> List[tuple]:
+        # (sample name, label names, label values, value)
+        with self.lock:
+            return [
+                (self.name, self.label_names, key, value)
+                for key, value in self.values.items()
+            ]
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for name, label_names, label_values, value in self.get_samples():
+            labels = format_labels(label_names, label_values)
+            lines.append(f"{name}{labels} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self.lock:
+            return self.values.get(self.get_key(labels), 0)
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, label_names: List[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self.functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value, **labels):
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def set_function(self, function: Callable[[], float], **labels):
+        # Read at scrape time, for values that already live elsewhere.
+        key = self.get_key(labels)
+        with self.lock:
+            self.functions[key] = function
+
+    def get(self, **labels):
+        key = self.get_key(labels)
+        with self.lock:
+            function = self.functions.get(key)
+            if function is None:
+                return self.values.get(key, 0)
+        return function()
+
+    def get_samples(self):
+        samples = super().get_samples()
+        with self.lock:
+            functions = list(self.functions.items())
+        for key, function in functions:
+            samples.append((self.name, self.label_names, key, function()))
+        return samples
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name,
+        documentation,
+        label_names: List[str] = (),
+        buckets=DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.get_key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Per-bucket counts; cumulative counts are built when rendered.
+                state = [[0] * (len(self.buckets) + 1), 0.0]
+                self.values[key] = state
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_count(self, **labels):
+        with self.lock:
+            state = self.values.get(self.get_key(labels))
+            return 0 if state is None else sum(state[0])
+
+    def get_samples(self):
+        samples = []
+        label_names = self.label_names + ("le",)
+        with self.lock:
+            states = [
+                (key, list(counts), total)
+                for key, (counts, total) in self.values.items()
+            ]
+        for key, counts, total in states:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(
+                    (
+                        f"{self.name}_bucket",
+                        label_names,
+                        key + (format_value(float(bound)),),
+                        cumulative,
+                    )
+                )
+            samples.append((f"{self.name}_sum", self.label_names, key, total))
+            samples.append((f"{self.name}_count", self.label_names, key, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.lock = Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        # Registering a name twice hands back the existing metric, so modules
+        # can declare what they record without coordinating.
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is None:
+                self.metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric):
+            raise Exception(f"Metric {metric.name} is already a {existing.type_name}")
+        return existing
+
+    def counter(self, name, documentation, label_names: List[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names: List[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name,
+        documentation,
+        label_names: List[str] = (),
+        buckets=DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
+
+    def dump(self, file_path):
+        with open(file_path, "w") as out:
+            out.write(self.render())
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,85 @@
+import logging
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics.registry import CONTENT_TYPE, MetricsRegistry, registry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9108
+
+
+class MetricsServer:
+    def __init__(
+        self,
+        metrics_registry: MetricsRegistry = registry,
+        host=DEFAULT_HOST,
+        port=DEFAULT_PORT,
+    ):
+        self.registry = metrics_registry
+        self.host = host
+        self.port = port
+        self.server: ThreadingHTTPServer = None
+        self.server_thread: threading.Thread = None
+
+    def create_handler(self):
+        metrics_registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics_registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"metrics: {format % args}")
+
+        return MetricsHandler
+
+    def start(self):
+        if self.server is not None:
+            return
+        self.server = ThreadingHTTPServer((self.host, self.port), self.create_handler())
+        self.server.daemon_threads = True
+        # Port 0 picks a free port; keep the one actually bound.
+        self.port = self.server.server_address[1]
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever, name="metrics-server", daemon=True
+        )
+        self.server_thread.start()
+        logging.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+        self.server = None
+        self.server_thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+
+def dump_on_signal(
+    file_path, metrics_registry: MetricsRegistry = registry, signum=signal.SIGUSR1
+):
+    # `kill -USR1 <pid>` writes the current metrics to file_path.
+    def dump(*_):
+        try:
+            metrics_registry.dump(file_path)
+        except Exception as e:
+            logging.error(f"Could not dump metrics to {file_path}: {e}")
+
+    signal.signal(signum, dump)
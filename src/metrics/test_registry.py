@@ -0,0 +1,88 @@
+import os
+import signal
+import tempfile
+import unittest
+import urllib.request
+
+from metrics.registry import MetricsRegistry
+from metrics.server import MetricsServer, dump_on_signal
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_renders_prometheus_text_format(self):
+        errors = self.registry.counter("errors_total", "Errors.", ["path"])
+        level = self.registry.gauge("budget_level", "Budget.", ["request_type"])
+        errors.inc(path="TICKER_INFO_PATH")
+        errors.inc(2, path="TICKER_INFO_PATH")
+        level.set_function(lambda: 7.5, request_type="Public")
+
+        self.assertEqual(
+            self.registry.render(),
+            "# HELP budget_level Budget.\n"
+            "# TYPE budget_level gauge\n"
+            'budget_level{request_type="Public"} 7.5\n'
+            "# HELP errors_total Errors.\n"
+            "# TYPE errors_total counter\n"
+            'errors_total{path="TICKER_INFO_PATH"} 3\n',
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram("latency_seconds", "Latency.", buckets=(1, 5))
+        for value in (0.5, 1, 3, 10):
+            latency.observe(value)
+
+        lines = self.registry.render().splitlines()[2:]
+        self.assertEqual(
+            lines,
+            [
+                'latency_seconds_bucket{le="1"} 2',
+                'latency_seconds_bucket{le="5"} 3',
+                'latency_seconds_bucket{le="+Inf"} 4',
+                "latency_seconds_sum 14.5",
+                "latency_seconds_count 4",
+            ],
+        )
+
+    def test_registering_twice_returns_the_same_metric(self):
+        first = self.registry.counter("sends_total", "Sends.")
+
+        self.assertIs(self.registry.counter("sends_total", "Sends."), first)
+        with self.assertRaises(Exception):
+            self.registry.gauge("sends_total", "Sends.")
+        with self.assertRaises(Exception):
+            first.inc(channel="strategies")
+
+    def test_server_and_dump_expose_the_registry(self):
+        self.registry.counter("sends_total", "Sends.").inc()
+
+        with MetricsServer(self.registry, port=0) as server:
+            url = f"http://{server.host}:{server.port}/metrics"
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "metrics.prom")
+            self.registry.dump(file_path)
+            with open(file_path) as dumped:
+                self.assertEqual(dumped.read(), body)
+
+        self.assertIn("sends_total 1\n", body)
+
+    def test_sigusr1_dumps_the_registry(self):
+        self.registry.counter("sends_total", "Sends.").inc()
+        previous_handler = signal.getsignal(signal.SIGUSR1)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "metrics.prom")
+            try:
+                dump_on_signal(file_path, self.registry)
+                os.kill(os.getpid(), signal.SIGUSR1)
+            finally:
+                signal.signal(signal.SIGUSR1, previous_handler)
+            with open(file_path) as dumped:
+                self.assertEqual(dumped.read(), self.registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
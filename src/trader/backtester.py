@@ -0,0 +1,153 @@
+import logging
+import math
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from importlib import resources
+from typing import Dict, List
+
+import numpy as np
+
+from kraken_api.candle_store import CandleStore
+from kraken_api.model.candle_matrix import CandleWindowMatrix
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.interval import TradeInterval
+from trader.strategy.indicators import IndicatorSet
+from trader.strategy.strategy import BatchStrategyEvaluator, strategies
+
+# Importing the finder registers its strategies, including in pool workers.
+import trader.trade_finder  # noqa: F401
+
+FORWARD_HOURS = [1, 4, 24]
+WINDOW_LENGTH = 14 * 24
+
+Signal = namedtuple(
+    "Signal", ["strategy", "ticker", "timestamp", "price", "forward_returns"]
+)
+StrategyStats = namedtuple(
+    "StrategyStats", ["strategy", "signals", "hit_rates", "mean_returns"]
+)
+
+
+def get_forward_returns(
+    candles: CandleSeries, interval: TradeInterval, hours=FORWARD_HOURS
+) -> np.ndarray:
+    forward_returns = np.full((len(hours), len(candles)), np.nan)
+    for row, num_hours in enumerate(hours):
+        if (num_hours * 60) % interval.value != 0:
+            continue
+        steps = num_hours * 60 // interval.value
+        if 0 < steps < len(candles):
+            forward_returns[row, :-steps] = (
+                candles.close[steps:] / candles.close[:-steps] - 1
+            )
+
+    return forward_returns
+
+
+def backtest_candles(
+    ticker, candles: CandleSeries, interval=TradeInterval.ONE_HOUR, window=WINDOW_LENGTH
+) -> List[Signal]:
+    if len(candles) < window:
+        return []
+
+    windows = CandleWindowMatrix(candles, window, IndicatorSet())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        results = BatchStrategyEvaluator().evaluate(windows)
+        forward_returns = get_forward_returns(candles, interval)
+
+    signals = []
+    for name in dict.fromkeys(strategy.name for strategy in strategies):
+        for row in np.nonzero(results[name])[0]:
+            index = row + window - 1
+            signals.append(
+                Signal(
+                    name,
+                    ticker,
+                    int(candles.timestamp[index]),
+                    float(candles.close[index]),
+                    tuple(float(value) for value in forward_returns[:, index]),
+                )
+            )
+
+    return signals
+
+
+def backtest_ticker(
+    store_directory, ticker, interval=TradeInterval.ONE_HOUR, window=WINDOW_LENGTH
+) -> List[Signal]:
+    candles = CandleStore(store_directory).read(ticker, interval)
+    try:
+        return backtest_candles(ticker, candles, interval, window)
+    except Exception as e:
+        logging.error(f"Could not backtest {ticker}: {e}")
+        return []
+
+
+def run_backtest(
+    store_directory,
+    tickers: List[str] = None,
+    interval=TradeInterval.ONE_HOUR,
+    window=WINDOW_LENGTH,
+    max_workers=None,
+) -> List[Signal]:
+    if tickers is None:
+        tickers = CandleStore(store_directory).get_stored_tickers(interval)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        signals_by_ticker = executor.map(
+            backtest_ticker,
+            [store_directory] * len(tickers),
+            tickers,
+            [interval] * len(tickers),
+            [window] * len(tickers),
+        )
+        return [signal for signals in signals_by_ticker for signal in signals]
+
+
+def summarize(signals: List[Signal]) -> Dict[str, StrategyStats]:
+    signals_by_strategy = {}
+    for signal in signals:
+        signals_by_strategy.setdefault(signal.strategy, []).append(
+            signal.forward_returns
+        )
+
+    stats = {}
+    for strategy, forward_returns in signals_by_strategy.items():
+        forward_returns = np.array(forward_returns, dtype=np.float64)
+        known = ~np.isnan(forward_returns)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hit_rates = (forward_returns > 0).sum(axis=0) / known.sum(axis=0)
+            mean_returns = np.nansum(forward_returns, axis=0) / known.sum(axis=0)
+        stats[strategy] = StrategyStats(
+            strategy,
+            len(forward_returns),
+            tuple(float(rate) for rate in hit_rates),
+            tuple(float(mean) for mean in mean_returns),
+        )
+
+    return stats
+
+
+def format_report(stats: Dict[str, StrategyStats], hours=FORWARD_HOURS):
+    header = ["strategy", "signals"] + [
+        f"{label} {num_hours}h" for num_hours in hours for label in ("hit", "mean")
+    ]
+    lines = [",".join(header)]
+    for strategy_stats in sorted(stats.values(), key=lambda s: -s.signals):
+        values = []
+        for hit_rate, mean_return in zip(
+            strategy_stats.hit_rates, strategy_stats.mean_returns
+        ):
+            values.append("" if math.isnan(hit_rate) else f"{hit_rate:.3f}")
+            values.append("" if math.isnan(mean_return) else f"{mean_return:.5f}")
+        lines.append(
+            ",".join([strategy_stats.strategy, str(strategy_stats.signals)] + values)
+        )
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    signals = run_backtest(str(resources.files("local_files").joinpath("candles")))
+    print(format_report(summarize(signals)))
@@ -1,8 +1,9 @@
 class Position:
-    def __init__(self, ticker, avg_price, quantity):
+    def __init__(self, ticker, avg_price, quantity, realized_pnl=0.0):
         self.ticker = ticker
         self.avg_price = avg_price
         self.quantity = quantity
+        self.realized_pnl = realized_pnl
 
     def __str__(self):
         return f"[ticker={self.ticker}, avg_price={self.avg_price}, quantity={self.quantity}]"
@@ -0,0 +1,348 @@
+import math
+from collections import deque
+from typing import Callable, Dict
+
+import numpy as np
+
+from kraken_api.model.candle_series import CandleSeries
+
+# Indicators are fed every committed candle once, in order. The last candle of
+# a series is treated as the still-forming head: it is only ever passed to
+# peek(), so replacing it on the next fetch needs no rollback.
+
+
+class RollingMeanStd:
+    def __init__(self, window, field="close"):
+        self.window = window
+        self.field = field
+        self.values = deque()
+        self.total = 0.0
+        self.total_of_squares = 0.0
+
+    def update(self, candle):
+        value = getattr(candle, self.field)
+        self.values.append(value)
+        self.total += value
+        self.total_of_squares += value * value
+        if len(self.values) > self.window:
+            oldest = self.values.popleft()
+            self.total -= oldest
+            self.total_of_squares -= oldest * oldest
+
+    def _with_head(self, head):
+        count, total, total_of_squares = (
+            len(self.values),
+            self.total,
+            self.total_of_squares,
+        )
+        if head is not None:
+            value = getattr(head, self.field)
+            if count == self.window:
+                oldest = self.values[0]
+                total -= oldest
+                total_of_squares -= oldest * oldest
+                count -= 1
+            count += 1
+            total += value
+            total_of_squares += value * value
+        return count, total, total_of_squares
+
+    def mean(self, head=None):
+        count, total, _ = self._with_head(head)
+        return total / count if count > 0 else math.nan
+
+    def std(self, head=None):
+        count, total, total_of_squares = self._with_head(head)
+        if count == 0:
+            return math.nan
+        mean = total / count
+        return math.sqrt(max(total_of_squares / count - mean * mean, 0.0))
+
+    def peek(self, head=None):
+        return self.mean(head)
+
+
+class SMA(RollingMeanStd):
+    pass
+
+
+class RollingStd(RollingMeanStd):
+    def peek(self, head=None):
+        return self.std(head)
+
+
+class EMA:
+    def __init__(self, period, field="close"):
+        self.alpha = 2 / (period + 1)
+        self.field = field
+        self.value = None
+
+    def update(self, candle):
+        self.value = self.peek(candle)
+
+    def peek(self, head=None):
+        if head is None:
+            return math.nan if self.value is None else self.value
+        value = getattr(head, self.field)
+        if self.value is None:
+            return value
+        return self.alpha * value + (1 - self.alpha) * self.value
+
+
+class RollingExtreme:
+    def __init__(self, window, field, is_better: Callable[[float, float], bool]):
+        self.window = window
+        self.field = field
+        self.is_better = is_better
+        self.count = 0
+        self.candidates = deque()
+
+    def update(self, candle):
+        value = getattr(candle, self.field)
+        while self.candidates and not self.is_better(self.candidates[-1][1], value):
+            self.candidates.pop()
+        self.candidates.append((self.count, value))
+        self.count += 1
+        if self.candidates[0][0] <= self.count - 1 - self.window:
+            self.candidates.popleft()
+
+    def peek(self, head=None):
+        if head is None:
+            return self.candidates[0][1] if self.candidates else math.nan
+
+        # With a head the committed part of the window shrinks by one.
+        first_index = self.count - self.window + 1
+        best = getattr(head, self.field)
+        for index, value in self.candidates:
+            if index >= first_index:
+                if self.is_better(value, best):
+                    best = value
+                break
+        return best
+
+
+class RollingMax(RollingExtreme):
+    def __init__(self, window, field="high"):
+        super().__init__(window, field, lambda a, b: a > b)
+
+
+class RollingMin(RollingExtreme):
+    def __init__(self, window, field="low"):
+        super().__init__(window, field, lambda a, b: a < b)
+
+
+class ATR:
+    def __init__(self, period=14):
+        self.period = period
+        self.previous_close = None
+        self.true_ranges = []
+        self.value = None
+
+    def get_true_range(self, candle):
+        if self.previous_close is None:
+            return candle.high - candle.low
+        return max(
+            candle.high - candle.low,
+            abs(candle.high - self.previous_close),
+            abs(candle.low - self.previous_close),
+        )
+
+    def _next_value(self, true_range):
+        if self.value is not None:
+            return (self.value * (self.period - 1) + true_range) / self.period
+        if len(self.true_ranges) + 1 == self.period:
+            return (sum(self.true_ranges) + true_range) / self.period
+        return None
+
+    def update(self, candle):
+        true_range = self.get_true_range(candle)
+        self.value = self._next_value(true_range)
+        if self.value is None:
+            self.true_ranges.append(true_range)
+        self.previous_close = candle.close
+
+    def peek(self, head=None):
+        if head is not None:
+            value = self._next_value(self.get_true_range(head))
+        else:
+            value = self.value
+        return math.nan if value is None else value
+
+
+class RSI:
+    def __init__(self, period=14):
+        self.period = period
+        self.previous_close = None
+        self.changes = []
+        self.averages = None
+
+    def get_change(self, close):
+        change = close - self.previous_close
+        return max(change, 0.0), max(-change, 0.0)
+
+    def _next_averages(self, change):
+        gain, loss = change
+        if self.averages is not None:
+            average_gain, average_loss = self.averages
+            return (
+                (average_gain * (self.period - 1) + gain) / self.period,
+                (average_loss * (self.period - 1) + loss) / self.period,
+            )
+        if len(self.changes) + 1 == self.period:
+            return (
+                (sum(gain for gain, _ in self.changes) + gain) / self.period,
+                (sum(loss for _, loss in self.changes) + loss) / self.period,
+            )
+        return None
+
+    def update(self, candle):
+        if self.previous_close is not None:
+            change = self.get_change(candle.close)
+            self.averages = self._next_averages(change)
+            if self.averages is None:
+                self.changes.append(change)
+        self.previous_close = candle.close
+
+    def peek(self, head=None):
+        averages = self.averages
+        if head is not None:
+            averages = (
+                None
+                if self.previous_close is None
+                else self._next_averages(self.get_change(head.close))
+            )
+        if averages is None:
+            return math.nan
+
+        average_gain, average_loss = averages
+        if average_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + average_gain / average_loss)
+
+
+class SupportStack:
+    def __init__(self):
+        self.previous = None
+        self.stack = deque()
+
+    def update(self, candle):
+        previous = self.previous
+        self.previous = (candle.timestamp, candle.close, candle.is_red())
+        if previous is None:
+            return
+
+        previous_timestamp, previous_close, previous_is_red = previous
+        if previous_is_red != candle.is_red():
+            close = min(previous_close, candle.close)
+            while len(self.stack) > 0 and self.stack[-1][1] > close:
+                self.stack.pop()
+            self.stack.append((previous_timestamp, close))
+
+    def expire(self, first_timestamp):
+        # Entries are in time order, so those older than the window sit at
+        # the bottom of the stack.
+        while len(self.stack) > 0 and self.stack[0][0] < first_timestamp:
+            self.stack.popleft()
+
+    def peek(self, head=None):
+        return [close for _, close in self.stack]
+
+
+indicator_factories: Dict[str, Callable[[], object]] = {}
+
+
+def add_indicator(name, factory):
+    indicator_factories[name] = factory
+
+
+add_indicator("close_sma_20", lambda: SMA(20, "close"))
+add_indicator("close_ema_20", lambda: EMA(20, "close"))
+add_indicator("volume_mean_120", lambda: SMA(120, "volume"))
+add_indicator("volume_std_120", lambda: RollingStd(120, "volume"))
+add_indicator("atr_14", lambda: ATR(14))
+add_indicator("rsi_14", lambda: RSI(14))
+add_indicator("low_min_24", lambda: RollingMin(24, "low"))
+add_indicator("high_max_24", lambda: RollingMax(24, "high"))
+add_indicator("support_stack", SupportStack)
+
+
+class IndicatorSet:
+    def __init__(self):
+        self.indicators = {}
+        self.last_timestamp = None
+        self.candles = None
+
+    def _feed(self, indicators, candles, start):
+        for index in range(start, len(candles) - 1):
+            candle = candles[index]
+            for indicator in indicators:
+                indicator.update(candle)
+
+    def _get_first_new_index(self, candles):
+        if self.last_timestamp is None:
+            return 0
+        if isinstance(candles, CandleSeries):
+            return int(np.searchsorted(candles.timestamp, self.last_timestamp, "right"))
+        index = len(candles)
+        while index > 0 and candles[index - 1].timestamp > self.last_timestamp:
+            index -= 1
+        return index
+
+    def update(self, candles):
+        if len(candles) == 0:
+            return self
+        if (
+            self.last_timestamp is not None
+            and len(candles) > 1
+            and candles[-2].timestamp < self.last_timestamp
+        ):
+            # The window moved backwards, so rebuild from it on the next get().
+            self.indicators = {}
+            self.last_timestamp = None
+        start = self._get_first_new_index(candles)
+        self._feed(self.indicators.values(), candles, start)
+        if len(candles) > 1 and (
+            self.last_timestamp is None or candles[-2].timestamp > self.last_timestamp
+        ):
+            self.last_timestamp = candles[-2].timestamp
+        first_timestamp = candles[0].timestamp
+        for indicator in self.indicators.values():
+            if hasattr(indicator, "expire"):
+                indicator.expire(first_timestamp)
+        self.candles = candles
+
+        return self
+
+    def get(self, name):
+        if name not in self.indicators:
+            indicator = indicator_factories[name]()
+            if self.candles is not None:
+                # A new indicator is built once from the current window.
+                self._feed([indicator], self.candles, 0)
+                if hasattr(indicator, "expire"):
+                    indicator.expire(self.candles[0].timestamp)
+            self.indicators[name] = indicator
+
+        head = self.candles[-1] if self.candles is not None else None
+        return self.indicators[name].peek(head)
+
+    def get_committed(self, name):
+        self.get(name)
+        return self.indicators[name].peek()
+
+
+def get_indicator_set(candles) -> IndicatorSet:
+    indicator_set = getattr(candles, "indicators", None)
+    if indicator_set is None:
+        indicator_set = IndicatorSet()
+        if isinstance(candles, CandleSeries):
+            candles.indicators = indicator_set
+    return indicator_set.update(candles)
+
+
+def get_indicator(candles, name):
+    return get_indicator_set(candles).get(name)
+
+
+def get_committed_indicator(candles, name):
+    return get_indicator_set(candles).get_committed(name)
@@ -0,0 +1,175 @@
+import importlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.shared_candle_buffer import (
+    SharedCandleBuffer,
+    SharedCandleMatrix,
+    attach_shared_candles,
+)
+from trader.strategy.strategy import STRATEGY_DURATION, BatchStrategyEvaluator
+
+DEFAULT_MAX_RESTARTS = 2
+
+
+def import_strategy_modules(module_names: Iterable[str]):
+    # Strategies register themselves on import, which a spawned worker has to
+    # redo; forked workers inherit the registry.
+    for module_name in module_names:
+        importlib.import_module(module_name)
+
+
+def get_default_context():
+    # Workers start from a clean interpreter rather than a fork of a process
+    # that may already be running threads.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def evaluate_shard(buffer_name, shape, tickers, lengths, start, stop):
+    columns = attach_shared_candles(buffer_name, shape)
+    candle_matrix = SharedCandleMatrix(tickers, columns[:, start:stop], lengths)
+    evaluator = BatchStrategyEvaluator()
+    results = evaluator.evaluate(candle_matrix)
+    names = list(results)
+    bits = np.zeros((len(names), stop - start), dtype=bool)
+    for index, name in enumerate(names):
+        bits[index] = results[name]
+
+    # Only one bit per pair and strategy goes back to the parent, along with
+    # the shard's strategy timings.
+    return names, np.packbits(bits, axis=1), evaluator.last_durations
+
+
+class ParallelStrategyEvaluator:
+    def __init__(
+        self,
+        max_workers=None,
+        strategy_modules: Iterable[str] = (),
+        max_restarts=DEFAULT_MAX_RESTARTS,
+        mp_context=None,
+    ):
+        self.max_workers = max_workers or os.cpu_count()
+        self.strategy_modules = tuple(strategy_modules)
+        self.max_restarts = max_restarts
+        self.mp_context = mp_context or get_default_context()
+        self.executor: ProcessPoolExecutor = None
+        self.buffer: SharedCandleBuffer = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=self.mp_context,
+                initializer=import_strategy_modules,
+                initargs=(self.strategy_modules,),
+            )
+        return self.executor
+
+    def start(self):
+        # Brings the pool up and imports the strategies in a worker, so that
+        # the first sweep does not pay for it.
+        self.get_executor().submit(
+            import_strategy_modules, self.strategy_modules
+        ).result()
+
+    def restart(self, wait=False):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+            self.executor = None
+
+    def get_buffer(self, num_pairs, length) -> SharedCandleBuffer:
+        # The watchlist rarely changes shape between sweeps, so the block is
+        # reused and workers stay attached to it.
+        if self.buffer is None or self.buffer.shape[1:] != (num_pairs, length):
+            if self.buffer is not None:
+                self.buffer.close()
+            self.buffer = SharedCandleBuffer(num_pairs, length)
+        return self.buffer
+
+    def get_shards(self, num_pairs) -> List[tuple]:
+        # Contiguous shards in watchlist order, one per worker.
+        bounds = np.linspace(0, num_pairs, min(self.max_workers, num_pairs) + 1)
+        bounds = bounds.astype(int).tolist()
+        return [(start, stop) for start, stop in zip(bounds, bounds[1:])]
+
+    def evaluate(
+        self, candles_by_ticker: Dict[str, CandleSeries]
+    ) -> Dict[str, np.ndarray]:
+        tickers = list(candles_by_ticker.keys())
+        if len(tickers) == 0:
+            return {}
+        length = max(len(candles) for candles in candles_by_ticker.values())
+
+        buffer = self.get_buffer(len(tickers), length)
+        lengths = buffer.write(candles_by_ticker)
+        shard_results = {}
+        pending = self.get_shards(len(tickers))
+        restarts = 0
+        while len(pending) > 0:
+            executor = self.get_executor()
+            futures = [
+                (
+                    (start, stop),
+                    executor.submit(
+                        evaluate_shard,
+                        buffer.name,
+                        buffer.shape,
+                        tickers[start:stop],
+                        lengths[start:stop],
+                        start,
+                        stop,
+                    ),
+                )
+                for start, stop in pending
+            ]
+            failed = []
+            for shard, future in futures:
+                try:
+                    shard_results[shard] = future.result()
+                except BrokenProcessPool:
+                    failed.append(shard)
+
+            if len(failed) > 0:
+                restarts += 1
+                if restarts > self.max_restarts:
+                    raise Exception(
+                        f"Strategy workers failed {restarts} times, giving up"
+                    )
+                logging.warning(
+                    f"Strategy worker died, restarting pool for {len(failed)} shards"
+                )
+                self.restart()
+            pending = failed
+
+        # Shards are stitched back in watchlist order, whatever order the
+        # workers finished in.
+        results = {}
+        for (start, stop), (names, bits, durations) in sorted(shard_results.items()):
+            for name, duration in durations.items():
+                STRATEGY_DURATION.observe(duration, strategy=name)
+            unpacked = np.unpackbits(bits, axis=1, count=stop - start).astype(bool)
+            for index, name in enumerate(names):
+                results.setdefault(name, []).append(unpacked[index])
+
+        return {name: np.concatenate(parts) for name, parts in results.items()}
+
+    def close(self):
+        self.restart(wait=True)
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,232 @@
+import functools
+import itertools
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+from threading import Lock
+from typing import Callable, Dict, List
+
+import numpy as np
+
+MAX_RECORDED_DURATIONS = 1000
+MAX_RECORDED_LENGTHS = 256
+MIN_GROWTH_SAMPLES = 8
+# Inputs must span at least this ratio of lengths before growth is judged.
+MIN_GROWTH_SPREAD = 2
+# Below this, timings are dominated by noise and not worth vectorizing anyway.
+MIN_GROWTH_DURATION = 1e-5
+DEFAULT_GROWTH_THRESHOLD = 0.5
+DEFAULT_REPORT_INTERVAL = 300
+
+StrategyProfile = namedtuple(
+    "StrategyProfile",
+    [
+        "name",
+        "kind",
+        "calls",
+        "sampled",
+        "total_s",
+        "mean_s",
+        "p99_s",
+        "hit_rate",
+        "growth_exponent",
+    ],
+)
+
+
+def get_input_length(args):
+    if len(args) == 0:
+        return None
+    try:
+        return len(args[0])
+    except TypeError:
+        return None
+
+
+def get_hit_value(result) -> float:
+    # Delta strategies return (is_successful, message); batch forms return a
+    # boolean array, which counts as the fraction of pairs that hit.
+    if isinstance(result, tuple):
+        return float(bool(result[0]))
+    if isinstance(result, np.ndarray):
+        return float(result.mean()) if result.size else 0.0
+    return float(bool(result))
+
+
+class StrategyStats:
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.call_counter = itertools.count()
+        self.calls = 0
+        self.sampled = 0
+        self.total_s = 0.0
+        self.hits = 0.0
+        self.durations = deque(maxlen=MAX_RECORDED_DURATIONS)
+        self.lengths = deque(maxlen=MAX_RECORDED_LENGTHS)
+
+    def record(self, duration, length, result):
+        self.sampled += 1
+        self.total_s += duration
+        self.hits += get_hit_value(result)
+        self.durations.append(duration)
+        if length is not None and length > 0 and duration > 0:
+            self.lengths.append((length, duration))
+
+    def get_growth_exponent(self):
+        # Slope of log(duration) over log(input length): ~0 for constant time,
+        # ~1 for strategies that scan their whole input.
+        if len(self.lengths) < MIN_GROWTH_SAMPLES:
+            return None
+        samples = np.array(self.lengths, dtype=np.float64)
+        if samples[:, 0].max() < MIN_GROWTH_SPREAD * samples[:, 0].min():
+            return None
+        if np.median(samples[:, 1]) < MIN_GROWTH_DURATION:
+            return None
+        slope, _ = np.polyfit(np.log(samples[:, 0]), np.log(samples[:, 1]), 1)
+        return float(slope)
+
+    def get_profile(self) -> StrategyProfile:
+        durations = np.array(self.durations)
+        return StrategyProfile(
+            self.name,
+            self.kind,
+            self.calls,
+            self.sampled,
+            self.total_s,
+            self.total_s / self.sampled if self.sampled else 0.0,
+            float(np.percentile(durations, 99)) if len(durations) else 0.0,
+            self.hits / self.sampled if self.sampled else None,
+            self.get_growth_exponent(),
+        )
+
+
+class StrategyProfiler:
+    def __init__(self, sample_rate=1.0, growth_threshold=DEFAULT_GROWTH_THRESHOLD):
+        self.enabled = False
+        self.sample_every = 1
+        self.set_sample_rate(sample_rate)
+        self.growth_threshold = growth_threshold
+        self.stats: Dict[str, StrategyStats] = {}
+        self.lock = Lock()
+        self.stop_event = threading.Event()
+        self.reporting_thread: threading.Thread = None
+
+    def set_sample_rate(self, sample_rate):
+        # Every n-th call is timed, which keeps the cost of an unsampled call
+        # to a counter increment.
+        if not 0 < sample_rate <= 1:
+            raise Exception(f"Sample rate must be in (0, 1], got {sample_rate}")
+        self.sample_every = max(round(1 / sample_rate), 1)
+
+    def enable(self, sample_rate=None):
+        if sample_rate is not None:
+            self.set_sample_rate(sample_rate)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.stats = {
+                name: StrategyStats(name, stats.kind)
+                for name, stats in self.stats.items()
+            }
+
+    def get_stats(self, name, kind) -> StrategyStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            with self.lock:
+                stats = self.stats.setdefault(name, StrategyStats(name, kind))
+        return stats
+
+    def wrap(self, function: Callable, kind):
+        name = function.__name__
+
+        @functools.wraps(function)
+        def profiled(*args, **kwargs):
+            if not self.enabled:
+                return function(*args, **kwargs)
+
+            stats = self.get_stats(name, kind)
+            call = next(stats.call_counter)
+            stats.calls = call + 1
+            if call % self.sample_every != 0:
+                return function(*args, **kwargs)
+
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            duration = time.perf_counter() - start
+            with self.lock:
+                stats.record(duration, get_input_length(args), result)
+            return result
+
+        return profiled
+
+    def get_profiles(self) -> List[StrategyProfile]:
+        with self.lock:
+            profiles = [stats.get_profile() for stats in self.stats.values()]
+        return sorted(profiles, key=lambda profile: profile.total_s, reverse=True)
+
+    def get_slowest(self, limit=10) -> List[StrategyProfile]:
+        return self.get_profiles()[:limit]
+
+    def get_growing(self) -> List[StrategyProfile]:
+        return [
+            profile
+            for profile in self.get_profiles()
+            if profile.growth_exponent is not None
+            and profile.growth_exponent >= self.growth_threshold
+        ]
+
+    def format_report(self, limit=10):
+        slowest = self.get_slowest(limit)
+        width = max([len("strategy")] + [len(profile.name) for profile in slowest])
+        lines = [
+            f"{'strategy':<{width}} {'kind':<20} {'calls':>8} {'total':>9} "
+            f"{'p99':>9} {'hits':>6} {'growth':>6}"
+        ]
+        for profile in slowest:
+            hit_rate = "-" if profile.hit_rate is None else f"{profile.hit_rate:.0%}"
+            growth = (
+                "-"
+                if profile.growth_exponent is None
+                else f"{profile.growth_exponent:.2f}"
+            )
+            lines.append(
+                f"{profile.name:<{width}} {profile.kind:<20} {profile.calls:>8} "
+                f"{profile.total_s * 1000:>7.1f}ms {profile.p99_s * 1000:>7.3f}ms "
+                f"{hit_rate:>6} {growth:>6}"
+            )
+        growing = [profile.name for profile in self.get_growing()]
+        if len(growing) > 0:
+            lines.append(f"Runtime grows with input length: {', '.join(growing)}")
+        return "\n".join(lines)
+
+    def log_report(self, limit=10):
+        logging.info(f"Slowest strategies:\n{self.format_report(limit)}")
+
+    def start_reporting(self, interval=DEFAULT_REPORT_INTERVAL, limit=10):
+        if self.reporting_thread is not None:
+            return
+        self.stop_event.clear()
+
+        def report():
+            while not self.stop_event.wait(interval):
+                self.log_report(limit)
+
+        self.reporting_thread = threading.Thread(
+            target=report, name="strategy-profiler", daemon=True
+        )
+        self.reporting_thread.start()
+
+    def stop_reporting(self):
+        self.stop_event.set()
+        if self.reporting_thread is not None:
+            self.reporting_thread.join()
+            self.reporting_thread = None
+
+
+profiler = StrategyProfiler()
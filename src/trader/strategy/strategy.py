@@ -1,19 +1,43 @@
-from typing import Callable, List
+import time
+from typing import Callable, Dict, List, Union
+
+import numpy as np
 
 from kraken_api.model.candle import Candle
+from kraken_api.model.candle_matrix import CandleMatrix
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.market_snapshot import MarketSnapshot
 from kraken_api.model.ticker import Ticker
+from metrics.registry import registry
+from trader.strategy.profiler import profiler
+
+Candles = Union[List[Candle], CandleSeries]
+
+STRATEGY_DURATION = registry.histogram(
+    "strategy_evaluation_duration_seconds",
+    "Time spent evaluating one strategy, over the watchlist in a batch sweep or "
+    "over one pair when streaming.",
+    ["strategy"],
+)
 
 
 class StrategyNode:
-    def __init__(self, strategy: Callable[[List[Candle]], bool]):
+    def __init__(self, strategy: Callable[[Candles], bool]):
         self.strategy = strategy
         self.depends_on: List[StrategyNode] = []
 
+    @property
+    def name(self):
+        return self.strategy.__name__
+
     def add_dependency(self, strategy_node):
         self.depends_on.append(strategy_node)
 
-    def satisfies_dependencies(self, candles: List[Candle]):
-        return all(strategy_node.strategy(candles) for strategy_node in self.depends_on)
+    def satisfies_dependencies(self, candles: Candles, results: Dict[str, bool] = None):
+        results = {} if results is None else results
+        return all(
+            strategy_node.execute(candles, results) for strategy_node in self.depends_on
+        )
 
     def __str__(self):
         str_repr = ""
@@ -27,54 +51,249 @@ class StrategyNode:
     def __repr__(self):
         return str(self)
 
-    def execute(self, candles: List[Candle]) -> bool:
-        return self.satisfies_dependencies(candles) and self.strategy(candles)
+    def execute(self, candles: Candles, results: Dict[str, bool] = None) -> bool:
+        results = {} if results is None else results
+        if self.name not in results:
+            results[self.name] = self.satisfies_dependencies(
+                candles, results
+            ) and bool(self.strategy(candles))
+
+        return results[self.name]
+
+
+class StrategyEvaluator:
+    def __init__(self):
+        self.last_results: Dict[str, tuple] = {}
+
+    def get_candles_version(candles: Candles):
+        if isinstance(candles, CandleSeries) and len(candles) > 0:
+            return (
+                len(candles),
+                int(candles.timestamp[-1]),
+                float(candles.close[-1]),
+                float(candles.volume[-1]),
+            )
+        return None
+
+    def evaluate(self, candles: Candles, ticker=None) -> Dict[str, bool]:
+        version = StrategyEvaluator.get_candles_version(candles)
+        if ticker is not None and version is not None:
+            last_version, last_results = self.last_results.get(ticker, (None, None))
+            if last_version == version:
+                return last_results
+
+        # Dependencies come earlier in the order and are cached in results, so
+        # each timing covers only the strategy itself.
+        results = {}
+        durations = []
+        for strategy_node in strategy_order:
+            start = time.perf_counter()
+            strategy_node.execute(candles, results)
+            durations.append((strategy_node.name, time.perf_counter() - start))
+
+        for name, duration in durations:
+            STRATEGY_DURATION.observe(duration, strategy=name)
+        if ticker is not None and version is not None:
+            self.last_results[ticker] = (version, results)
+        return results
 
 
-strategy_node_lookup = {}
+class BatchStrategyEvaluator:
+    def __init__(self):
+        self.last_durations: Dict[str, float] = {}
+
+    def evaluate(self, candle_matrix: CandleMatrix) -> Dict[str, np.ndarray]:
+        results = {}
+        durations = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for strategy_node in strategy_order:
+                start = time.perf_counter()
+                satisfied = np.ones(len(candle_matrix), dtype=bool)
+                for dependency_node in strategy_node.depends_on:
+                    satisfied &= results[dependency_node.name]
+
+                batch_strategy = batch_strategies.get(strategy_node.name)
+                if batch_strategy is not None:
+                    result = satisfied & batch_strategy(candle_matrix)
+                else:
+                    # Strategies without a vectorized form run per pair.
+                    result = np.array(
+                        [
+                            is_satisfied
+                            and bool(
+                                strategy_node.strategy(candle_matrix.get_candles(row))
+                            )
+                            for row, is_satisfied in enumerate(satisfied)
+                        ],
+                        dtype=bool,
+                    )
+                results[strategy_node.name] = result
+                durations[strategy_node.name] = time.perf_counter() - start
+
+        for name, duration in durations.items():
+            STRATEGY_DURATION.observe(duration, strategy=name)
+        self.last_durations = durations
+        return results
+
+
+strategy_node_lookup: Dict[str, StrategyNode] = {}
 strategies: List[StrategyNode] = []
+strategy_order: List[StrategyNode] = []
+batch_strategies: Dict[str, Callable[[CandleMatrix], np.ndarray]] = {}
 delta_strategies: List[Callable[[Ticker, Ticker], bool]] = []
+batch_delta_strategies: Dict[
+    str, Callable[[MarketSnapshot, MarketSnapshot], np.ndarray]
+] = {}
 requirements = []
+batch_requirements: Dict[str, Callable[[MarketSnapshot], np.ndarray]] = {}
+
+
+def evaluate_requirements(snapshot: MarketSnapshot) -> np.ndarray:
+    satisfied = np.ones(len(snapshot), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for requirement in requirements:
+            batch_requirement = batch_requirements.get(requirement.__name__)
+            if batch_requirement is not None:
+                satisfied &= batch_requirement(snapshot)
+            else:
+                satisfied &= np.array(
+                    [bool(requirement(ticker)) for ticker in snapshot], dtype=bool
+                )
+
+    return satisfied
+
+
+def evaluate_delta_strategies_in_batch(
+    prev: MarketSnapshot, cur: MarketSnapshot
+) -> Dict[str, np.ndarray]:
+    # Both snapshots must hold the same pairs in the same row order.
+    results = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for delta_strategy in delta_strategies:
+            batch_delta_strategy = batch_delta_strategies.get(delta_strategy.__name__)
+            if batch_delta_strategy is not None:
+                result = batch_delta_strategy(prev, cur)
+            else:
+                result = np.array(
+                    [
+                        delta_strategy(prev_ticker, cur_ticker)[0]
+                        for prev_ticker, cur_ticker in zip(prev, cur)
+                    ],
+                    dtype=bool,
+                )
+            results[delta_strategy.__name__] = result
+
+    return results
+
+
+def sort_strategies():
+    order = []
+    visit_state = {}
+
+    def visit(strategy_node: StrategyNode, path: List[str]):
+        state = visit_state.get(strategy_node.name)
+        if state == "done":
+            return
+        if state == "visiting":
+            raise Exception(
+                f"Strategy dependency cycle found: {' -> '.join(path + [strategy_node.name])}"
+            )
+
+        visit_state[strategy_node.name] = "visiting"
+        for dependency_node in strategy_node.depends_on:
+            visit(dependency_node, path + [strategy_node.name])
+        visit_state[strategy_node.name] = "done"
+        order.append(strategy_node)
+
+    for strategy_node in strategy_node_lookup.values():
+        visit(strategy_node, [])
+
+    strategy_order[:] = order
 
 
 def add_strategy(strategy):
     if strategy.__name__ not in strategy_node_lookup:
-        strategy_node = StrategyNode(strategy)
+        strategy_node = StrategyNode(profiler.wrap(strategy, "strategy"))
         strategy_node_lookup[strategy.__name__] = strategy_node
 
     strategies.append(strategy_node_lookup[strategy.__name__])
+    sort_strategies()
 
     return strategy
 
 
+def add_batch_strategy(strategy):
+    def wrapper(batch_strategy):
+        batch_strategies[strategy.__name__] = profiler.wrap(
+            batch_strategy, "batch_strategy"
+        )
+
+        return batch_strategy
+
+    return wrapper
+
+
 def add_requirement(requirement):
-    requirements.append(requirement)
+    requirements.append(profiler.wrap(requirement, "requirement"))
 
     return requirement
 
 
+def add_batch_requirement(requirement):
+    def wrapper(batch_requirement):
+        batch_requirements[requirement.__name__] = profiler.wrap(
+            batch_requirement, "batch_requirement"
+        )
+
+        return batch_requirement
+
+    return wrapper
+
+
 def depends_on(
     *strategy_dependencies: List[Callable[[Ticker, Ticker], tuple[bool, str]]]
 ):
     def wrapper(strategy):
         if strategy.__name__ not in strategy_node_lookup:
-            strategy_node_lookup[strategy.__name__] = StrategyNode(strategy)
+            strategy_node_lookup[strategy.__name__] = StrategyNode(
+                profiler.wrap(strategy, "strategy")
+            )
 
         strategy_node = strategy_node_lookup[strategy.__name__]
+        previous_dependencies = list(strategy_node.depends_on)
         for dependency in strategy_dependencies:
             if dependency.__name__ not in strategy_node_lookup:
-                strategy_node_lookup[dependency.__name__] = StrategyNode(dependency)
+                strategy_node_lookup[dependency.__name__] = StrategyNode(
+                    profiler.wrap(dependency, "strategy")
+                )
 
             dependency_node = strategy_node_lookup[dependency.__name__]
 
             strategy_node.add_dependency(dependency_node)
 
+        try:
+            sort_strategies()
+        except Exception:
+            strategy_node.depends_on = previous_dependencies
+            raise
+
         return strategy
 
     return wrapper
 
 
 def add_delta_strategy(strategy: Callable[[Ticker, Ticker], tuple[bool, str]]):
-    delta_strategies.append(strategy)
+    delta_strategies.append(profiler.wrap(strategy, "delta_strategy"))
 
     return strategy
+
+
+def add_batch_delta_strategy(strategy):
+    def wrapper(batch_delta_strategy):
+        batch_delta_strategies[strategy.__name__] = profiler.wrap(
+            batch_delta_strategy, "batch_delta_strategy"
+        )
+
+        return batch_delta_strategy
+
+    return wrapper
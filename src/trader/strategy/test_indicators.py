@@ -0,0 +1,118 @@
+import math
+import random
+import statistics
+import unittest
+
+from kraken_api.model.candle_series import CandleSeries
+from trader.strategy.indicators import (
+    RSI,
+    SMA,
+    ATR,
+    EMA,
+    RollingMax,
+    RollingMin,
+    RollingStd,
+    get_committed_indicator,
+    get_indicator,
+)
+
+
+def random_rows(rng: random.Random, start, length):
+    rows = []
+    close = 10.0
+    for timestamp in range(start, start + length):
+        open_price = close * rng.uniform(0.97, 1.03)
+        close = open_price * rng.uniform(0.97, 1.03)
+        high = max(open_price, close) * rng.uniform(1, 1.02)
+        low = min(open_price, close) * rng.uniform(0.98, 1)
+        rows.append([timestamp, open_price, high, low, close, 0, rng.uniform(1, 9), 1])
+    return rows
+
+
+def feed(indicator, candles):
+    for candle in candles[:-1]:
+        indicator.update(candle)
+    return indicator.peek(candles[-1])
+
+
+def support_stack(candles):
+    stack = []
+    prev = candles[0]
+    for current_candle in candles[1:-1]:
+        if prev.is_red() != current_candle.is_red():
+            close = min(prev.close, current_candle.close)
+            while len(stack) > 0 and stack[-1] > close:
+                stack.pop()
+            stack.append(close)
+        prev = current_candle
+    return stack
+
+
+class TestIndicators(unittest.TestCase):
+    def setUp(self):
+        self.candles = CandleSeries.from_rows(random_rows(random.Random(3), 0, 200))
+
+    def test_rolling_windows_match_full_recomputation(self):
+        closes = list(self.candles.close)
+        volumes = list(self.candles.volume)
+
+        self.assertAlmostEqual(feed(SMA(20), self.candles), statistics.mean(closes[-20:]))
+        self.assertAlmostEqual(
+            feed(RollingStd(30, "volume"), self.candles),
+            statistics.pstdev(volumes[-30:]),
+        )
+        self.assertEqual(feed(RollingMax(24), self.candles), max(self.candles.high[-24:]))
+        self.assertEqual(feed(RollingMin(24), self.candles), min(self.candles.low[-24:]))
+
+    def test_smoothed_indicators_match_reference_formulas(self):
+        closes = list(self.candles.close)
+        ema = closes[0]
+        for close in closes[1:]:
+            ema = 2 / 21 * close + (1 - 2 / 21) * ema
+        self.assertAlmostEqual(feed(EMA(20), self.candles), ema)
+
+        true_ranges = [self.candles[0].high - self.candles[0].low] + [
+            max(c.high - c.low, abs(c.high - p.close), abs(c.low - p.close))
+            for p, c in zip(self.candles, self.candles[1:])
+        ]
+        atr = statistics.mean(true_ranges[:14])
+        for true_range in true_ranges[14:]:
+            atr = (atr * 13 + true_range) / 14
+        self.assertAlmostEqual(feed(ATR(14), self.candles), atr)
+
+        changes = [b - a for a, b in zip(closes, closes[1:])]
+        gain = statistics.mean(max(c, 0) for c in changes[:14])
+        loss = statistics.mean(max(-c, 0) for c in changes[:14])
+        for change in changes[14:]:
+            gain = (gain * 13 + max(change, 0)) / 14
+            loss = (loss * 13 + max(-change, 0)) / 14
+        self.assertAlmostEqual(feed(RSI(14), self.candles), 100 - 100 / (1 + gain / loss))
+
+    def test_indicator_set_tracks_a_sliding_window_incrementally(self):
+        rows = random_rows(random.Random(5), 0, 400)
+        window = CandleSeries.from_rows(rows[:150])
+        for end in range(151, 400):
+            # The previous head is replaced and the window slides forward.
+            window = window.merge(CandleSeries.from_rows(rows[end - 2 : end]), since=end - 150)
+            self.assertEqual(len(window), 150)
+
+            self.assertEqual(get_indicator(window, "support_stack"), support_stack(window))
+            self.assertAlmostEqual(
+                get_indicator(window, "volume_mean_120"),
+                statistics.mean(window.volume[-120:]),
+            )
+            self.assertAlmostEqual(
+                get_committed_indicator(window, "volume_mean_120"),
+                statistics.mean(window.volume[-121:-1]),
+            )
+        self.assertIsNotNone(window.indicators)
+
+    def test_indicators_work_on_short_histories(self):
+        candles = self.candles[:2]
+
+        self.assertTrue(math.isnan(feed(RSI(14), candles)))
+        self.assertEqual(get_indicator(candles, "support_stack"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
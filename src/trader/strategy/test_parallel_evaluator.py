@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import trader.trade_finder  # noqa: F401 registers the strategies
+from kraken_api.model.candle_matrix import CandleMatrix
+from kraken_api.model.candle_series import CandleSeries
+from trader.strategy import strategy as strategy_module
+from trader.strategy.parallel_evaluator import ParallelStrategyEvaluator
+from trader.strategy.strategy import (
+    BatchStrategyEvaluator,
+    add_strategy,
+    strategy_node_lookup,
+)
+
+
+def random_candles(num_pairs, num_candles, seed=0):
+    random = np.random.default_rng(seed)
+    candles_by_ticker = {}
+    for pair in range(num_pairs):
+        length = num_candles - pair % 3
+        close = 100 + random.normal(0, 1, length).cumsum()
+        open = close + random.normal(0, 0.5, length)
+        candles_by_ticker[f"PAIR{pair}USD"] = CandleSeries(
+            np.arange(length) * 3600,
+            open,
+            np.maximum(open, close) + random.random(length),
+            np.minimum(open, close) - random.random(length),
+            close,
+            (open + close) / 2,
+            random.random(length) * 1000,
+            random.integers(1, 50, length),
+        )
+    return candles_by_ticker
+
+
+class TestParallelStrategyEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.saved_lookup = dict(strategy_node_lookup)
+        self.saved_strategies = list(strategy_module.strategies)
+        self.evaluator = ParallelStrategyEvaluator(
+            max_workers=3, mp_context=multiprocessing.get_context("fork")
+        )
+
+    def tearDown(self):
+        self.evaluator.close()
+        strategy_node_lookup.clear()
+        strategy_node_lookup.update(self.saved_lookup)
+        strategy_module.strategies[:] = self.saved_strategies
+        strategy_module.sort_strategies()
+
+    def test_matches_in_process_evaluation(self):
+        candles_by_ticker = random_candles(20, 150)
+
+        expected = BatchStrategyEvaluator().evaluate(CandleMatrix(candles_by_ticker))
+        for _ in range(2):
+            results = self.evaluator.evaluate(candles_by_ticker)
+            self.assertEqual(list(results), list(expected))
+            for name in expected:
+                np.testing.assert_array_equal(results[name], expected[name])
+
+    def test_default_workers_import_the_strategies_themselves(self):
+        candles_by_ticker = random_candles(6, 150)
+        expected = BatchStrategyEvaluator().evaluate(CandleMatrix(candles_by_ticker))
+
+        with ParallelStrategyEvaluator(
+            max_workers=2, strategy_modules=("trader.trade_finder",)
+        ) as evaluator:
+            self.assertNotEqual(evaluator.mp_context.get_start_method(), "fork")
+            evaluator.start()
+            results = evaluator.evaluate(candles_by_ticker)
+
+        self.assertEqual(list(results), list(expected))
+        for name in expected:
+            np.testing.assert_array_equal(results[name], expected[name])
+
+    def test_restarts_workers_that_die(self):
+        with tempfile.TemporaryDirectory() as directory:
+            marker = os.path.join(directory, "crashed")
+
+            @add_strategy
+            def crash_once(candles):
+                if not os.path.exists(marker):
+                    open(marker, "w").close()
+                    os._exit(1)
+                return True
+
+            results = self.evaluator.evaluate(random_candles(4, 150))
+
+        self.assertTrue(results["crash_once"].all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import time
+import unittest
+
+import numpy as np
+
+from trader.strategy.profiler import StrategyProfiler
+
+
+class TestStrategyProfiler(unittest.TestCase):
+    def test_disabled_profiler_records_nothing(self):
+        profiler = StrategyProfiler()
+        is_even = profiler.wrap(lambda value: value % 2 == 0, "requirement")
+
+        self.assertTrue(is_even(2))
+        self.assertEqual(profiler.get_profiles(), [])
+
+    def test_records_calls_hits_and_sampling(self):
+        profiler = StrategyProfiler()
+        profiler.enable(sample_rate=0.5)
+
+        def delta(prev, cur):
+            return (cur > prev, None)
+
+        profiled = profiler.wrap(delta, "delta_strategy")
+        for value in range(10):
+            profiled(5, value)
+
+        profile = profiler.get_profiles()[0]
+        self.assertEqual(profiled.__name__, "delta")
+        self.assertEqual((profile.name, profile.kind), ("delta", "delta_strategy"))
+        self.assertEqual((profile.calls, profile.sampled), (10, 5))
+        # Values 0, 2, 4, 6 and 8 are sampled; two of them beat 5.
+        self.assertAlmostEqual(profile.hit_rate, 0.4)
+        self.assertGreaterEqual(profile.p99_s, profile.mean_s)
+
+    def test_batch_results_count_the_fraction_of_hits(self):
+        profiler = StrategyProfiler()
+        profiler.enable()
+        profiler.wrap(lambda candles: candles > 1, "batch_strategy")(np.arange(4))
+
+        self.assertAlmostEqual(profiler.get_profiles()[0].hit_rate, 0.5)
+
+    def test_flags_strategies_that_grow_with_input_length(self):
+        profiler = StrategyProfiler()
+        profiler.enable()
+
+        def scans_everything(candles):
+            time.sleep(len(candles) * 0.0002)
+            return False
+
+        def reads_last_candle(candles):
+            return candles[-1] > 0
+
+        growing = profiler.wrap(scans_everything, "strategy")
+        constant = profiler.wrap(reads_last_candle, "strategy")
+        for length in [5, 10, 20, 40] * 2:
+            growing(list(range(length)))
+            constant(list(range(length)))
+
+        self.assertEqual(
+            [profile.name for profile in profiler.get_growing()], ["scans_everything"]
+        )
+        self.assertEqual(profiler.get_slowest(1)[0].name, "scans_everything")
+        self.assertIn("Runtime grows with input length", profiler.format_report())
+
+
+if __name__ == "__main__":
+    unittest.main()
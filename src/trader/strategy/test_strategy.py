@@ -0,0 +1,104 @@
+import unittest
+
+from kraken_api.model.candle_series import CandleSeries
+from trader.strategy import strategy as strategy_module
+from trader.strategy.strategy import (
+    STRATEGY_DURATION,
+    StrategyEvaluator,
+    add_strategy,
+    depends_on,
+    strategy_node_lookup,
+    strategy_order,
+)
+
+
+class TestStrategyEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.saved_lookup = dict(strategy_node_lookup)
+        self.saved_strategies = list(strategy_module.strategies)
+        strategy_node_lookup.clear()
+        strategy_module.strategies.clear()
+        strategy_order.clear()
+
+    def tearDown(self):
+        strategy_node_lookup.clear()
+        strategy_node_lookup.update(self.saved_lookup)
+        strategy_module.strategies[:] = self.saved_strategies
+        strategy_module.sort_strategies()
+
+    def test_shared_dependency_is_evaluated_once(self):
+        calls = []
+
+        def shared_indicator(candles):
+            calls.append("shared_indicator")
+            return True
+
+        @add_strategy
+        @depends_on(shared_indicator)
+        def first(candles):
+            return True
+
+        @add_strategy
+        @depends_on(shared_indicator)
+        def second(candles):
+            return False
+
+        candles = CandleSeries.from_rows([[1, 1, 1, 1, 1, 1, 1, 1]])
+        evaluator = StrategyEvaluator()
+        results = evaluator.evaluate(candles, "XBTUSD")
+        evaluator.evaluate(candles, "XBTUSD")
+
+        self.assertEqual(calls, ["shared_indicator"])
+        self.assertEqual(results, {"shared_indicator": True, "first": True, "second": False})
+        self.assertLess(
+            [node.name for node in strategy_order].index("shared_indicator"),
+            [node.name for node in strategy_order].index("first"),
+        )
+
+    def test_dependents_short_circuit_when_prerequisite_fails(self):
+        calls = []
+
+        def prerequisite(candles):
+            return False
+
+        @add_strategy
+        @depends_on(prerequisite)
+        def dependent(candles):
+            calls.append("dependent")
+            return True
+
+        results = StrategyEvaluator().evaluate([])
+
+        self.assertFalse(results["dependent"])
+        self.assertEqual(calls, [])
+
+    def test_each_evaluated_strategy_is_timed(self):
+        @add_strategy
+        def timed_strategy(candles):
+            return True
+
+        candles = CandleSeries.from_rows([[1, 1, 1, 1, 1, 1, 1, 1]])
+        count = STRATEGY_DURATION.get_count(strategy="timed_strategy")
+        evaluator = StrategyEvaluator()
+        evaluator.evaluate(candles, "XBTUSD")
+        evaluator.evaluate(candles, "XBTUSD")
+
+        self.assertEqual(
+            STRATEGY_DURATION.get_count(strategy="timed_strategy"), count + 1
+        )
+
+    def test_cycles_are_rejected_at_registration(self):
+        def a(candles):
+            return True
+
+        @depends_on(a)
+        def b(candles):
+            return True
+
+        with self.assertRaises(Exception):
+            depends_on(b)(a)
+        self.assertEqual(strategy_node_lookup["a"].depends_on, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
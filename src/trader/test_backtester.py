@@ -0,0 +1,58 @@
+import random
+import tempfile
+import unittest
+
+from kraken_api.candle_store import CandleStore
+from kraken_api.model.interval import TradeInterval
+from trader.backtester import backtest_candles, run_backtest, summarize
+from trader.strategy.strategy import StrategyEvaluator, strategies
+from trader.test_trade_finder import random_candle_series
+
+
+class TestBacktester(unittest.TestCase):
+    def setUp(self):
+        self.candles = random_candle_series(random.Random(11), 400)
+
+    def test_signals_match_evaluating_each_window(self):
+        window = 150
+        signals = backtest_candles("XBTUSD", self.candles, window=window)
+
+        expected = set()
+        names = set(strategy.name for strategy in strategies)
+        for end in range(window, len(self.candles) + 1):
+            results = StrategyEvaluator().evaluate(self.candles[end - window : end])
+            for name in names:
+                if results[name]:
+                    expected.add((name, int(self.candles.timestamp[end - 1])))
+
+        self.assertEqual(set((s.strategy, s.timestamp) for s in signals), expected)
+        self.assertGreater(len(signals), 0)
+
+        signal = signals[0]
+        index = int(signal.timestamp)
+        self.assertAlmostEqual(
+            signal.forward_returns[1],
+            self.candles.close[index + 4] / self.candles.close[index] - 1,
+        )
+
+    def test_run_backtest_reads_the_store_in_worker_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = CandleStore(directory)
+            store.append("XBTUSD", TradeInterval.ONE_HOUR, self.candles)
+            store.append("ETHUSD", TradeInterval.ONE_HOUR, self.candles)
+
+            signals = run_backtest(directory, window=150, max_workers=2)
+
+        stats = summarize(signals)
+        self.assertEqual(
+            sum(strategy_stats.signals for strategy_stats in stats.values()),
+            len(signals),
+        )
+        self.assertEqual(
+            len([s for s in signals if s.ticker == "XBTUSD"]),
+            len([s for s in signals if s.ticker == "ETHUSD"]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
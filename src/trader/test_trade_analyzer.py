@@ -0,0 +1,126 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from kraken_api.model.in_memory_storage import InMemoryStorage
+from kraken_api.model.market_snapshot import MarketSnapshot
+from kraken_api.model.trade_history_record import TradeHistoryRecord
+from trader.trade_analyzer import PnlCsvWriter, PnlEngine, TradeAnalyzer
+from trader.trades.ledger import TradeLedger
+
+
+def ticker_entry(price):
+    return {
+        "a": [str(price), "1", "1"],
+        "b": [str(price), "1", "1"],
+        "c": [str(price), "1"],
+        "v": ["1", "1"],
+        "p": [str(price), str(price)],
+        "t": [1, 1],
+        "l": [str(price), str(price)],
+        "h": [str(price), str(price)],
+        "o": str(price),
+    }
+
+
+def market_snapshot(prices):
+    return MarketSnapshot.from_ticker_data(
+        {pair: ticker_entry(price) for pair, price in prices.items()}
+    )
+
+
+def trade(txid, timestamp, pair, trade_type, price, quantity):
+    return TradeHistoryRecord(
+        timestamp, pair, trade_type, price * quantity, 0, price, quantity, txid
+    )
+
+
+class TestTradeAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.ledger = TradeLedger(":memory:")
+        self.ledger.append(
+            [
+                trade("T1", 1, "XBTUSD", "buy", 100, 2),
+                trade("T2", 2, "XBTUSD", "sell", 150, 1),
+                trade("T3", 3, "ETHUSD", "buy", 10, 5),
+                trade("T4", 4, "SOLUSD", "buy", 20, 1),
+                trade("T5", 5, "SOLUSD", "sell", 10, 1),
+            ]
+        )
+
+    def test_only_changed_prices_are_recomputed(self):
+        engine = PnlEngine(
+            self.ledger.get_positions(), self.ledger.get_realized_pnl_by_pair()
+        )
+
+        first = engine.update_snapshot(
+            market_snapshot({"XBTUSD": 120, "ETHUSD": 12, "ADAUSD": 1})
+        )
+        second = engine.update_snapshot(market_snapshot({"XBTUSD": 120, "ETHUSD": 11}))
+
+        self.assertEqual(sorted(row.pair for row in first), ["ETHUSD", "XBTUSD"])
+        self.assertEqual([row.pair for row in second], ["ETHUSD"])
+        self.assertAlmostEqual(second[0].unrealized_pnl, 5)
+        totals = engine.get_totals()
+        self.assertAlmostEqual(totals.market_value, 120 + 55)
+        self.assertAlmostEqual(totals.unrealized_pnl, 20 + 5)
+        self.assertAlmostEqual(totals.realized_pnl, 50 - 10)
+
+    def test_changed_rows_are_appended_to_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "cur_val_data.csv")
+            analyzer = TradeAnalyzer(None, self.ledger, PnlCsvWriter(file_path))
+
+            analyzer.pnl_engine.update_snapshot(market_snapshot({"XBTUSD": 120}))
+            analyzer.write_rows(
+                analyzer.pnl_engine.update_snapshot(
+                    market_snapshot({"XBTUSD": 130, "ETHUSD": 12})
+                )
+            )
+            self.ledger.append([trade("T6", 6, "XBTUSD", "sell", 130, 0.5)])
+            analyzer.refresh_positions()
+
+            with open(file_path) as pnl_file:
+                rows = list(csv.DictReader(pnl_file))
+
+        self.assertEqual(
+            [(row["pair"], float(row["quantity"])) for row in rows],
+            [("XBTUSD", 1), ("ETHUSD", 5), ("XBTUSD", 0.5)],
+        )
+        self.assertAlmostEqual(analyzer.get_totals().realized_pnl, 50 - 10 + 15)
+
+    def test_closed_positions_emit_an_exit_row(self):
+        engine = PnlEngine(
+            self.ledger.get_positions(), self.ledger.get_realized_pnl_by_pair()
+        )
+        engine.update_snapshot(market_snapshot({"XBTUSD": 120, "ETHUSD": 12}))
+        self.ledger.append([trade("T6", 6, "XBTUSD", "sell", 130, 1)])
+
+        rows = engine.set_positions(
+            self.ledger.get_positions(), self.ledger.get_realized_pnl_by_pair()
+        )
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0].pair, rows[0].quantity), ("XBTUSD", 0))
+        self.assertAlmostEqual(rows[0].unrealized_pnl, 0)
+        self.assertAlmostEqual(rows[0].realized_pnl, 50 + 30)
+        self.assertAlmostEqual(engine.get_totals().realized_pnl, 50 + 30 - 10)
+
+    def test_analyzer_follows_price_and_position_sources(self):
+        analyzer = TradeAnalyzer(None, self.ledger)
+        tickers = InMemoryStorage(None, None, "tickers")
+        positions = InMemoryStorage(None, None, "positions")
+        tickers.subscribe(analyzer.on_snapshot)
+        positions.subscribe(analyzer.on_positions)
+
+        tickers.publish(market_snapshot({"XBTUSD": 120, "ETHUSD": 12}))
+        self.ledger.append([trade("T6", 6, "ETHUSD", "buy", 12, 5)])
+        positions.publish(tuple(self.ledger.get_positions()))
+
+        self.assertAlmostEqual(analyzer.get_totals().market_value, 120 + 120)
+        self.assertAlmostEqual(analyzer.get_totals().unrealized_pnl, 20 + 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,91 @@
+import random
 import unittest
 from kraken_api.model.candle import Candle
-from trader.trade_finder import bullish_engulfing, hammer
+from kraken_api.model.candle_matrix import CandleMatrix
+from kraken_api.model.candle_series import CandleSeries
+from kraken_api.model.market_snapshot import MarketSnapshot
+from kraken_api.model.ticker import Ticker
+from kraken_api.scheduler import Scheduler
+from kraken_api.test_scheduler import FakeClock, run_inline
+from trader.trade_finder import (
+    bullish_engulfing,
+    gap,
+    hammer,
+    schedule_candle_refreshes,
+)
+from trader.strategy.strategy import (
+    BatchStrategyEvaluator,
+    StrategyEvaluator,
+    batch_strategies,
+    delta_strategies,
+    evaluate_delta_strategies_in_batch,
+    evaluate_requirements,
+    requirements,
+    strategy_node_lookup,
+)
+
+
+def random_candle_series(rng: random.Random, length):
+    rows = []
+    close = 10.0
+    for timestamp in range(length):
+        open_price = close * rng.uniform(0.97, 1.03)
+        close = open_price * rng.uniform(0.97, 1.03)
+        high = max(open_price, close) * rng.uniform(1, 1.02)
+        low = min(open_price, close) * rng.uniform(0.95, 1)
+        volume = rng.uniform(50, 150)
+        rows.append([timestamp, open_price, high, low, close, 0, volume, 1])
+    return CandleSeries.from_rows(rows)
+
+
+def random_ticker_data(rng: random.Random, num_pairs):
+    ticker_data = {}
+    for i in range(num_pairs):
+        price = rng.uniform(0.5, 50)
+        low = 0 if i % 10 == 0 else price * rng.uniform(0.85, 1)
+        high = price * rng.uniform(1, 1.2)
+        volume = rng.choice([0, rng.uniform(1e3, 1e6)])
+        ticker_data[f"PAIR{i}USD"] = {
+            "a": [str(price * 1.001), "1", "1.000"],
+            "b": [str(price * 0.999), "2", "2.000"],
+            "c": [str(price), "0.5"],
+            "v": [str(volume / 2), str(volume)],
+            "p": [str(price), str(price)],
+            "t": [rng.randint(0, 100), rng.randint(100, 500)],
+            "l": [str(low), str(low)],
+            "h": [str(high), str(high)],
+            "o": str(price),
+        }
+    return ticker_data
+
+
+class FakeCandleCache:
+    def get_candle_data_for_ticker(self, ticker, interval):
+        return ticker
+
+
+class PublishRecorder:
+    def __init__(self, clock):
+        self.clock = clock
+        self.published = []
+
+    def publish(self, value):
+        self.published.append((self.clock(), len(value)))
 
 
 class TestTradeFinder(unittest.TestCase):
+    def test_candle_refreshes_started_after_a_boundary_publish_that_slot(self):
+        clock = FakeClock(3605)
+        scheduler = Scheduler(clock=clock)
+        candle_source = PublishRecorder(clock)
+        tickers = [f"PAIR{i}USD" for i in range(20)]
+        schedule_candle_refreshes(scheduler, candle_source, FakeCandleCache(), tickers)
+
+        while clock.now < 7300:
+            clock.now = max(clock.now, scheduler.run_pending(run_inline))
+
+        self.assertEqual(candle_source.published, [(3640, 20), (7240, 20)])
+
     def test_bullish_engulfing_succeeds(self):
         candle_one = Candle(1, 100, 120, 35, 50, 0, 0, 0)
         candle_two = Candle(2, 45, 150, 40, 120, 0, 0, 0)
@@ -27,6 +109,100 @@ class TestTradeFinder(unittest.TestCase):
 
         self.assertFalse(hammer([candle, None]))
 
+    def test_candle_series_from_rows_matches_candles(self):
+        rows = [
+            [1, "100", "120", "35", "50", "60", "10", 3],
+            [2, "45", "150", "40", "120", "80", "12.5", 4],
+        ]
+        series = CandleSeries.from_rows(rows)
+        candles = [Candle(*row) for row in rows]
+
+        self.assertEqual(len(series), 2)
+        for view, candle in zip(series, candles):
+            self.assertEqual(str(view), str(candle))
+            self.assertEqual(view.is_red(), candle.is_red())
+        self.assertEqual(series[-1].volume, 12.5)
+        self.assertFalse(series.close.flags.writeable)
+
+    def test_bullish_engulfing_succeeds_for_candle_series(self):
+        series = CandleSeries.from_rows(
+            [[1, 100, 120, 35, 50, 0, 0, 0], [2, 45, 150, 40, 120, 0, 0, 0], [3, 0, 0, 0, 0, 0, 0, 0]]
+        )
+
+        self.assertTrue(bullish_engulfing(series))
+
+    def test_gap_executes_on_candle_series(self):
+        rows = [[i, 10, 11, 9, 10.5, 0, 100, 1] for i in range(130)]
+        rows.append([130, 11, 13, 10.9, 12.5, 0, 200, 1])
+        series = CandleSeries.from_rows(rows)
+
+        self.assertTrue(strategy_node_lookup[gap.__name__].execute(series))
+        self.assertTrue(
+            strategy_node_lookup[gap.__name__].execute([Candle(*row) for row in rows])
+        )
+
+    def test_batch_strategies_match_scalar_strategies(self):
+        rng = random.Random(7)
+        candles_by_ticker = {
+            f"PAIR{i}USD": random_candle_series(rng, rng.randint(125, 200))
+            for i in range(200)
+        }
+        candle_matrix = CandleMatrix(candles_by_ticker)
+
+        for name, batch_strategy in batch_strategies.items():
+            scalar_strategy = strategy_node_lookup[name].strategy
+            expected = [
+                bool(scalar_strategy(candles)) for candles in candles_by_ticker.values()
+            ]
+            self.assertEqual(list(batch_strategy(candle_matrix)), expected, name)
+
+        batch_results = BatchStrategyEvaluator().evaluate(candle_matrix)
+        for row, candles in enumerate(candles_by_ticker.values()):
+            scalar_results = StrategyEvaluator().evaluate(candles)
+            self.assertEqual(
+                {name: bool(result[row]) for name, result in batch_results.items()},
+                scalar_results,
+            )
+        self.assertTrue(any(result.any() for result in batch_results.values()))
+
+    def test_market_snapshot_views_match_tickers(self):
+        ticker_data = random_ticker_data(random.Random(3), 5)
+        snapshot = MarketSnapshot.from_ticker_data(ticker_data)
+
+        self.assertEqual(len(snapshot), 5)
+        for ticker in snapshot:
+            entry = ticker_data[ticker.ticker]
+            expected = Ticker(
+                ticker.ticker,
+                *(entry[key] for key in ["a", "b", "c", "v", "p", "t", "l", "h", "o"]),
+            )
+            self.assertEqual(str(ticker), str(expected))
+        self.assertEqual(
+            snapshot.volume_past_24_hrs[1],
+            snapshot.get_ticker("PAIR1USD").volume.past_24_hrs,
+        )
+        self.assertEqual(
+            snapshot.take(["PAIR3USD", "MISSINGUSD", "PAIR0USD"]).pairs,
+            ["PAIR3USD", "PAIR0USD"],
+        )
+
+    def test_batch_requirements_and_delta_strategies_match_scalar(self):
+        rng = random.Random(5)
+        prev = MarketSnapshot.from_ticker_data(random_ticker_data(rng, 300))
+        cur = MarketSnapshot.from_ticker_data(random_ticker_data(rng, 300))
+
+        expected = [all(r(ticker) for r in requirements) for ticker in cur]
+        self.assertEqual(list(evaluate_requirements(cur)), expected)
+
+        results = evaluate_delta_strategies_in_batch(prev, cur)
+        for delta_strategy in delta_strategies:
+            expected = [
+                delta_strategy(prev_ticker, cur_ticker)[0]
+                for prev_ticker, cur_ticker in zip(prev, cur)
+            ]
+            self.assertEqual(list(results[delta_strategy.__name__]), expected)
+            self.assertTrue(any(expected))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,97 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from functools import reduce
+from collections import defaultdict
+from itertools import chain
+
+from trader.trade_handler import TradeHandler, flush_open_handlers
+
+HEADER = "batch,coin,eventType,positionType,date,amount,quantity\n"
+
+
+def group_trades(trades, criteria):
+    # The original reduce-based grouping, kept as the reference behaviour.
+    def reduction_function(accumulator, element):
+        accumulator[(element.batch, element.positionType)].append(element)
+        return accumulator
+
+    trades_by_batch = reduce(reduction_function, trades, defaultdict(list))
+    return list(
+        chain.from_iterable(
+            values for values in trades_by_batch.values() if criteria(values)
+        )
+    )
+
+
+def is_open(values):
+    return not any(trade.eventType == "SELL" for trade in values)
+
+
+class TestTradeHandler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, "transaction_data.csv")
+        with open(self.file_path, "w") as out:
+            out.write(HEADER)
+            out.write("1,UMA/USD,BUY,LONG,2024-01-26,4.52,4.4\n")
+            out.write("1,UMA/USD,SELL,LONG,2024-01-26,5.2,4.4\n")
+            out.write("2,ENS/USD,BUY,SHORT,2024-01-26,19.96,1.0\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_indexes_match_regrouping_all_trades(self):
+        rng = random.Random(1)
+        handler = TradeHandler(self.file_path, flush_size=7)
+        for i in range(300):
+            coin = rng.choice(["UMA/USD", "ENS/USD", "XBT/USD", "SOL/USD"])
+            event_type = "SELL" if rng.random() < 0.2 else "BUY"
+            position_type = rng.choice(["LONG", "SHORT"])
+            handler.add_trade(coin, event_type, position_type, "2024-02-01", 1.0, 1.0)
+
+            open_trades = group_trades(handler.trades, is_open)
+            closed_trades = group_trades(handler.trades, lambda v: not is_open(v))
+            self.assertEqual(handler.get_open_trades(), open_trades)
+            self.assertEqual(handler.get_closed_trades(), closed_trades)
+            self.assertEqual(
+                handler.get_trades_for_coin_pair(coin),
+                [trade for trade in open_trades if trade.coin == coin],
+            )
+            self.assertEqual(
+                handler.get_new_batch(),
+                max(int(trade.batch) for trade in handler.trades) + 1,
+            )
+
+    def test_appends_are_batched_and_reloaded(self):
+        with TradeHandler(self.file_path, flush_size=10) as handler:
+            handler.add_trade("ENS/USD", "SELL", "SHORT", "2024-01-27", 18.0, 1.0)
+            handler.add_trade("XBT/USD", "BUY", "LONG", "2024-01-27", 40000.0, 0.1)
+            with open(self.file_path) as f:
+                self.assertEqual(len(f.readlines()), 4)
+
+        reloaded = TradeHandler(self.file_path)
+        self.assertEqual(
+            [str(trade) for trade in reloaded.trades],
+            [str(trade) for trade in handler.trades],
+        )
+        self.assertEqual(
+            [trade.batch for trade in reloaded.get_trades_for_batch(2)], ["2", "2"]
+        )
+        self.assertEqual(reloaded.get_trades_for_coin_pair("XBT/USD")[0].batch, "3")
+
+    def test_pending_rows_are_flushed_without_a_context_manager(self):
+        handler = TradeHandler(self.file_path)
+        handler.add_trade("XBT/USD", "BUY", "LONG", "2024-01-27", 40000.0, 0.1)
+        flush_open_handlers()
+        self.assertEqual(len(TradeHandler(self.file_path).trades), 4)
+
+        handler.add_trade("XBT/USD", "SELL", "LONG", "2024-01-28", 41000.0, 0.1)
+        del handler
+        self.assertEqual(len(TradeHandler(self.file_path).trades), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
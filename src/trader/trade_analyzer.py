@@ -1,12 +1,35 @@
-from statistics import mean
 import csv
-import itertools
-from kraken_api.kraken_client import KrakenClient
+import os
+import time
+from collections import namedtuple
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
 
+from kraken_api.kraken_client import KrakenClient
+from kraken_api.model.in_memory_storage import Snapshot
+from kraken_api.model.market_snapshot import MarketSnapshot
+from kraken_api.model.ticker import Ticker
+from trader.model.position import Position
+from trader.trades.ledger import TradeLedger
 
-class TradeAnalyzer:
-    def __init__(self, kraken_client: KrakenClient):
-        self.kraken_client = kraken_client
+PositionPnl = namedtuple(
+    "PositionPnl",
+    [
+        "pair",
+        "quantity",
+        "avg_price",
+        "price",
+        "cost_basis",
+        "market_value",
+        "unrealized_pnl",
+        "unrealized_percent",
+        "realized_pnl",
+    ],
+)
+PortfolioTotals = namedtuple(
+    "PortfolioTotals",
+    ["cost_basis", "market_value", "unrealized_pnl", "realized_pnl"],
+)
 
 
 def calculate_gain_loss(bought_value, position_type, cur_value):
@@ -16,68 +39,169 @@ def calculate_gain_loss(bought_value, position_type, cur_value):
         return (bought_value - cur_value) / bought_value
 
 
-def get_current_value_of_ticker(self, coin):
-    return self.kraken_client.get_ticker_lookup()[coin]
+def get_position_pnl(position: Position, price) -> PositionPnl:
+    cost_basis = position.avg_price * position.quantity
+    market_value = price * position.quantity
+    position_type = "LONG" if position.quantity > 0 else "SHORT"
+    return PositionPnl(
+        position.ticker,
+        position.quantity,
+        position.avg_price,
+        price,
+        cost_basis,
+        market_value,
+        market_value - cost_basis,
+        calculate_gain_loss(position.avg_price, position_type, price),
+        position.realized_pnl,
+    )
 
 
-def get_current_value_of_trades(self, open_trades, closed_trades, columns):
-    current_ticker_lookup = self.kraken_client.get_ticker_lookup()
+class PnlEngine:
+    def __init__(
+        self,
+        positions: Iterable[Position],
+        realized_pnl_by_pair: Dict[str, float] = None,
+    ):
+        self.prices: Dict[str, float] = {}
+        self.rows: Dict[str, PositionPnl] = {}
+        self.set_positions(positions, realized_pnl_by_pair)
 
-    with open("local/cur_val_data.csv", "w") as out:
-        columns = [c for c in columns]
-        columns.extend(
-            ["curValue", "unrealizedPercentGainLoss", "realizedPercentGainLoss"]
+    def set_positions(
+        self,
+        positions: Iterable[Position],
+        realized_pnl_by_pair: Dict[str, float] = None,
+    ) -> List[PositionPnl]:
+        realized_pnl_by_pair = realized_pnl_by_pair or {}
+        self.positions: Dict[str, Position] = {
+            position.ticker: position for position in positions
+        }
+        # Realized gains of pairs that are no longer held still count.
+        self.closed_realized_pnl = sum(
+            realized_pnl
+            for pair, realized_pnl in realized_pnl_by_pair.items()
+            if pair not in self.positions
         )
-
-        writer = csv.DictWriter(out, columns)
-        writer.writeheader()
-        for trade in open_trades:
-            ticker = trade.coin.split("/")[0]
-            cur_value = current_ticker_lookup[ticker]
-
-            writer.writerow(
-                {
-                    "batch": trade.batch,
-                    "coin": trade.coin,
-                    "eventType": trade.eventType,
-                    "positionType": trade.positionType,
-                    "date": trade.date,
-                    "amount": trade.amount,
-                    "quantity": trade.quantity,
-                    "curValue": cur_value,
-                    "unrealizedPercentGainLoss": calculate_gain_loss(
-                        float(trade.amount), trade.positionType, cur_value
-                    ),
-                }
+        previous_rows = self.rows
+        self.rows = {
+            pair: get_position_pnl(position, self.prices[pair])
+            for pair, position in self.positions.items()
+            if pair in self.prices
+        }
+        # A position that closed gets one last row with nothing left open.
+        exits = [
+            row._replace(
+                quantity=0.0,
+                cost_basis=0.0,
+                market_value=0.0,
+                unrealized_pnl=0.0,
+                unrealized_percent=0.0,
+                realized_pnl=realized_pnl_by_pair.get(pair, row.realized_pnl),
             )
+            for pair, row in previous_rows.items()
+            if pair not in self.positions
+        ]
+        return exits + [
+            row for pair, row in self.rows.items() if previous_rows.get(pair) != row
+        ]
+
+    def update_price(self, pair, price) -> Optional[PositionPnl]:
+        if pair not in self.positions or self.prices.get(pair) == price:
+            return None
+
+        self.prices[pair] = price
+        self.rows[pair] = get_position_pnl(self.positions[pair], price)
+        return self.rows[pair]
+
+    def update_snapshot(self, snapshot: MarketSnapshot) -> List[PositionPnl]:
+        # Only held pairs are read from the snapshot, and only pairs whose last
+        # price moved are recomputed.
+        held = snapshot.take(self.positions.keys())
+        changed = [
+            self.update_price(pair, price)
+            for pair, price in zip(held.pairs, held.last_trade_closed_price.tolist())
+        ]
+        return [row for row in changed if row is not None]
+
+    def update_ticker(self, ticker: Ticker) -> List[PositionPnl]:
+        row = self.update_price(ticker.ticker, ticker.last_trade_closed.price)
+        return [] if row is None else [row]
+
+    def get_totals(self) -> PortfolioTotals:
+        rows = self.rows.values()
+        return PortfolioTotals(
+            sum(row.cost_basis for row in rows),
+            sum(row.market_value for row in rows),
+            sum(row.unrealized_pnl for row in rows),
+            self.closed_realized_pnl
+            + sum(position.realized_pnl for position in self.positions.values()),
+        )
+
+
+class PnlCsvWriter:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.columns = ["timestamp"] + list(PositionPnl._fields)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            with open(file_path, "w") as out:
+                csv.DictWriter(out, self.columns).writeheader()
 
-        closed_trades.sort(key=lambda a: (a.batch, a.eventType))
-        for batch, trades_in_batch in itertools.groupby(
-            closed_trades, key=lambda a: a.batch
-        ):
-            trades_by_event_type = [
-                (event_type, list(trades))
-                for event_type, trades in itertools.groupby(
-                    trades_in_batch, key=lambda a: a.eventType
-                )
-            ]
-
-            _, buys = trades_by_event_type[0]
-            _, sells = trades_by_event_type[1]
-            avg_buy_price = mean(buy.amount for buy in buys)
-            avg_sell_price = mean(sell.amount for sell in sells)
-
-            ticker = buys[0].coin.split("/")[0]
-            position_type = buys[0].positionType
-            cur_value = current_ticker_lookup[ticker]
-            writer.writerow(
-                {
-                    "batch": batch,
-                    "coin": ticker,
-                    "positionType": position_type,
-                    "date": max([trade.date for trade in sells]),
-                    "realizedPercentGainLoss": calculate_gain_loss(
-                        float(avg_buy_price), position_type, avg_sell_price
-                    ),
-                }
+    def write_rows(self, rows: List[PositionPnl], timestamp=None):
+        if len(rows) == 0:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        with open(self.file_path, "a") as out:
+            writer = csv.DictWriter(out, self.columns)
+            writer.writerows({"timestamp": timestamp} | row._asdict() for row in rows)
+
+
+class TradeAnalyzer:
+    def __init__(
+        self,
+        kraken_client: KrakenClient,
+        ledger: TradeLedger,
+        output: PnlCsvWriter = None,
+    ):
+        self.kraken_client = kraken_client
+        self.ledger = ledger
+        self.output = output
+        self.pnl_engine = PnlEngine(
+            ledger.get_positions(), ledger.get_realized_pnl_by_pair()
+        )
+        # Prices and positions arrive from different snapshot bus sources.
+        self.lock = Lock()
+
+    def refresh_positions(self):
+        self.set_positions(self.ledger.get_positions())
+
+    def set_positions(self, positions: Iterable[Position]):
+        with self.lock:
+            rows = self.pnl_engine.set_positions(
+                positions, self.ledger.get_realized_pnl_by_pair()
             )
+            return self.write_rows(rows)
+
+    def write_rows(self, rows: List[PositionPnl]):
+        if self.output is not None:
+            self.output.write_rows(rows)
+        return rows
+
+    def on_snapshot(self, snapshot: Snapshot):
+        with self.lock:
+            return self.write_rows(self.pnl_engine.update_snapshot(snapshot.value))
+
+    def on_positions(self, snapshot: Snapshot):
+        return self.set_positions(snapshot.value)
+
+    def on_ticker(self, prev_ticker: Ticker, cur_ticker: Ticker):
+        with self.lock:
+            return self.write_rows(self.pnl_engine.update_ticker(cur_ticker))
+
+    def update_from_market(self) -> PortfolioTotals:
+        market = self.kraken_client.get_ticker_data()
+        with self.lock:
+            self.write_rows(self.pnl_engine.update_snapshot(market))
+            return self.pnl_engine.get_totals()
+
+    def get_totals(self) -> PortfolioTotals:
+        with self.lock:
+            return self.pnl_engine.get_totals()
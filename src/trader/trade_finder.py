@@ -1,27 +1,69 @@
-from statistics import mean
+import argparse
+import asyncio
+import functools
+import math
+import signal
 import csv
-import time
 import logging
-from typing import List, Set
-from threading import Thread
+from typing import Set
 from kraken_api.kraken_client import KrakenClient
+from kraken_api.candle_cache import CandleCache
+from kraken_api.candle_store import CandleStore
+from kraken_api.market_stream import MarketStream
+from kraken_api.model.in_memory_storage import InMemoryStorage
+from kraken_api.model.interval import TradeInterval
+from kraken_api.paths.kraken_api_paths import KrakenPaths
+from kraken_api.scheduler import DEFAULT_SETTLE_DELAY, Scheduler
+from kraken_api.snapshot_bus import SnapshotBus
 from kraken_api.configuration.kraken_config import KrakenConfiguration
 from trader.strategy.strategy import (
+    add_batch_delta_strategy,
+    add_batch_requirement,
+    add_batch_strategy,
     add_delta_strategy,
     add_requirement,
     add_strategy,
     depends_on,
     strategies,
-    requirements,
     delta_strategies,
+    Candles,
+    BatchStrategyEvaluator,
+    StrategyEvaluator,
+    evaluate_delta_strategies_in_batch,
+    evaluate_requirements,
+)
+from trader.strategy.parallel_evaluator import ParallelStrategyEvaluator
+from trader.strategy.indicators import (
+    SMA,
+    add_indicator,
+    get_committed_indicator,
+    get_indicator,
 )
 from importlib import resources
 from collections import defaultdict
+from threading import Lock, Thread
+from types import MappingProxyType
+
+import numpy as np
 
 from kraken_api.kraken_client import KrakenClient
 from kraken_api.model.candle import Candle
+from kraken_api.model.candle_matrix import CandleMatrix
+from kraken_api.model.market_snapshot import MarketSnapshot
 from discord_bot.discord_bot import DiscordBot
 from kraken_api.model.ticker import Ticker
+from metrics.registry import registry
+from metrics.server import MetricsServer, dump_on_signal
+from trader.trade_analyzer import PnlCsvWriter, TradeAnalyzer
+from trader.trades.account_handler import get_ledger, update_disk_transactions
+from trader.trades.ledger import TradeLedger
+
+SWEEP_DURATION = registry.histogram(
+    "strategy_sweep_duration_seconds",
+    "Time taken by one evaluation cycle over the watchlist.",
+    ["sweep"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
 
 
 @add_requirement
@@ -33,13 +75,25 @@ def spread_between_highs_and_lows(ticker: Ticker):
     return rate_of_change >= 1 + min_spread
 
 
+@add_batch_requirement(spread_between_highs_and_lows)
+def spread_between_highs_and_lows_batch(snapshot: MarketSnapshot):
+    min_spread = 0.05
+    low = snapshot.low_past_24_hrs
+    return (low != 0) & (snapshot.high_past_24_hrs / low >= 1 + min_spread)
+
+
 @add_requirement
 def avg_volume_greater_than_threshold(ticker: Ticker):
     return ticker.volume.past_24_hrs * ticker.high.past_24_hrs > 2000000
 
 
+@add_batch_requirement(avg_volume_greater_than_threshold)
+def avg_volume_greater_than_threshold_batch(snapshot: MarketSnapshot):
+    return snapshot.volume_past_24_hrs * snapshot.high_past_24_hrs > 2000000
+
+
 @add_strategy
-def bullish_engulfing(candles: List[Candle]):
+def bullish_engulfing(candles: Candles):
     previous, current = candles[-3], candles[-2]
     return (
         previous.open < current.close
@@ -48,8 +102,18 @@ def bullish_engulfing(candles: List[Candle]):
     )
 
 
+@add_batch_strategy(bullish_engulfing)
+def bullish_engulfing_batch(candles: CandleMatrix):
+    previous_open, previous_close = candles.open[:, -3], candles.close[:, -3]
+    return (
+        (previous_open < candles.close[:, -2])
+        & (previous_close > candles.open[:, -2])
+        & (previous_open > previous_close)
+    )
+
+
 @add_strategy
-def thrust(candles: List[Candle]):
+def thrust(candles: Candles):
 
     prev: Candle = candles[-3]
     cur: Candle = candles[-2]
@@ -64,8 +128,23 @@ def thrust(candles: List[Candle]):
     )
 
 
+@add_batch_strategy(thrust)
+def thrust_batch(candles: CandleMatrix):
+    is_red = candles.is_red()
+    prev_open, prev_close = candles.open[:, -3], candles.close[:, -3]
+    cur_close = candles.close[:, -2]
+    midpoint_of_prev = (prev_close + prev_open) / 2
+    acceptable_range = 0.25 * (prev_open - prev_close)
+    return (
+        is_red[:, -3]
+        & ~is_red[:, -2]
+        & (midpoint_of_prev - acceptable_range <= cur_close)
+        & (cur_close <= midpoint_of_prev + acceptable_range)
+    )
+
+
 @add_strategy
-def hammer(candles: List[Candle]):
+def hammer(candles: Candles):
     last_candle = candles[-2]
     high_maximum = 0.01
     ratio_between_open_and_close_max = 0.01
@@ -81,13 +160,39 @@ def hammer(candles: List[Candle]):
     )
 
 
-def higher_than_avg_volume(candles: List[Candle]):
-    num_intervals = 24 * 5
-    avg_volume = mean(candle.volume for candle in candles[-num_intervals:-1])
+@add_batch_strategy(hammer)
+def hammer_batch(candles: CandleMatrix):
+    high_maximum = 0.01
+    ratio_between_open_and_close_max = 0.01
+    low_requirement = 0.03
+
+    max_open_or_close = np.maximum(candles.open[:, -2], candles.close[:, -2])
+    min_open_or_close = np.minimum(candles.open[:, -2], candles.close[:, -2])
+
+    return (
+        ((max_open_or_close / min_open_or_close) - 1 <= ratio_between_open_and_close_max)
+        & ((candles.high[:, -2] / max_open_or_close) - 1 <= high_maximum)
+        & ((min_open_or_close / candles.low[:, -2]) - 1 >= low_requirement)
+    )
+
+
+add_indicator("volume_mean_119", lambda: SMA(24 * 5 - 1, "volume"))
+
+
+def higher_than_avg_volume(candles: Candles):
+    avg_volume = get_committed_indicator(candles, "volume_mean_119")
 
     return candles[-1].volume > avg_volume * 1.05
 
 
+@add_batch_strategy(higher_than_avg_volume)
+def higher_than_avg_volume_batch(candles: CandleMatrix):
+    num_intervals = 24 * 5
+    avg_volume = np.nanmean(candles.volume[:, -num_intervals:-1], axis=1)
+
+    return candles.volume[:, -1] > avg_volume * 1.05
+
+
 # @add_strategy
 # def low_volume_but_high_price_movement(candles: List[Candle]):
 #     num_intervals = 24 * 5
@@ -104,9 +209,8 @@ def higher_than_avg_volume(candles: List[Candle]):
 
 
 @add_strategy
-def increased_volume_with_bullish_price_movement(candles: List[Candle]):
-    num_intervals = 24 * 5
-    avg_volume = mean(candle.volume for candle in candles[-num_intervals:])
+def increased_volume_with_bullish_price_movement(candles: Candles):
+    avg_volume = get_indicator(candles, "volume_mean_120")
 
     cur_candle = candles[-1]
     high_price_requirement = 0.01
@@ -118,9 +222,20 @@ def increased_volume_with_bullish_price_movement(candles: List[Candle]):
     return result
 
 
+@add_batch_strategy(increased_volume_with_bullish_price_movement)
+def increased_volume_with_bullish_price_movement_batch(candles: CandleMatrix):
+    num_intervals = 24 * 5
+    avg_volume = np.nanmean(candles.volume[:, -num_intervals:], axis=1)
+
+    high_price_requirement = 0.01
+    return (candles.volume[:, -1] >= 1.1 * avg_volume) & (
+        candles.close[:, -1] / candles.open[:, -1] - 1 >= high_price_requirement
+    )
+
+
 @add_strategy
 @depends_on(higher_than_avg_volume)
-def gap(candles: List[Candle]):
+def gap(candles: Candles):
     prev_candle, cur_candle = candles[-2], candles[-1]
 
     return (
@@ -130,63 +245,186 @@ def gap(candles: List[Candle]):
     )
 
 
+@add_batch_strategy(gap)
+def gap_batch(candles: CandleMatrix):
+    is_red = candles.is_red()
+    return (candles.open[:, -1] > candles.close[:, -2]) & ~is_red[:, -2] & ~is_red[:, -1]
+
+
 @add_strategy
-def is_within_threshold_to_support(candles: List[Candle]):
-    stack = []
-    prev = candles[0]
-    for current_candle in candles[1:-1]:
-        if (prev.is_red() and not current_candle.is_red()) or (
-            not prev.is_red() and current_candle.is_red()
-        ):
-            close = min(prev.close, current_candle.close)
-            while len(stack) > 0 and stack[-1] > close:
-                stack.pop()
-            stack.append(close)
-        prev = current_candle
-
-    for close in stack:
+def is_within_threshold_to_support(candles: Candles):
+    for close in get_indicator(candles, "support_stack"):
         if abs(candles[-1].close - close) < 0.1 * (candles[-1].high - candles[-1].low):
             return True
 
 
+def filter_watchlist(snapshot: MarketSnapshot) -> MarketSnapshot:
+    return snapshot.select(evaluate_requirements(snapshot))
+
+
 def create_watchlist(kraken_client: KrakenClient):
-    tickers_to_watch = []
     print("Creating watchlist")
-    tickers = kraken_client.get_ticker_data()
-    for ticker in tickers:
-        if all(r(ticker) for r in requirements):
-            tickers_to_watch.append(ticker)
+    tickers_to_watch = filter_watchlist(kraken_client.get_ticker_data())
 
     with resources.files("trader.local").joinpath("watchlist.csv").open("w") as out:
-        out.write(
-            "ticker\n" + "\n".join(sorted(ticker.ticker for ticker in tickers_to_watch))
+        out.write("ticker\n" + "\n".join(sorted(tickers_to_watch.pairs)))
+
+
+def create_candle_cache(kraken_client: KrakenClient):
+    return CandleCache(
+        kraken_client,
+        CandleStore(str(resources.files("local_files").joinpath("candles"))),
+    )
+
+
+strategy_evaluator = StrategyEvaluator()
+batch_strategy_evaluator = BatchStrategyEvaluator()
+
+
+def report_strategies(
+    ticker, evaluation, previous_successful_strategies, discord_bot: DiscordBot
+):
+    results = [(strategy, bool(evaluation[strategy.name])) for strategy in strategies]
+    successes = [result for result in results if result[1]]
+
+    if len(successes) > 0 and previous_successful_strategies.get(ticker, []) != successes:
+        logging.info(f"Found successful strategies for {ticker}")
+        discord_bot.send_basic_message(
+            "strategies",
+            f"{ticker} - {len(successes)} strategies in place - {[result[0] for result in successes]}",
         )
 
+    previous_successful_strategies[ticker] = successes
 
-def perform_strategies(kraken_client: KrakenClient, discord_bot: DiscordBot, tickers):
-    previous_successful_strategies = {}
-    while True:
-        logging.info("Evaluating strategies")
-        for ticker in tickers:
-            candle_data = kraken_client.get_candle_data_for_ticker(ticker)
-            results = [
-                (strategy, strategy.execute(candle_data)) for strategy in strategies
-            ]
-            successes = [result for result in results if result[1]]
-
-            if (
-                len(successes) > 0
-                and previous_successful_strategies.get(ticker, []) != successes
-            ):
-                logging.info(f"Found successful strategies for {ticker}")
-                discord_bot.send_basic_message(
-                    "strategies",
-                    f"{ticker} - {len(successes)} strategies in place - {[result[0] for result in successes]}",
+
+def evaluate_strategies(
+    ticker, candle_data, previous_successful_strategies, discord_bot: DiscordBot
+):
+    evaluation = strategy_evaluator.evaluate(candle_data, ticker)
+    report_strategies(ticker, evaluation, previous_successful_strategies, discord_bot)
+
+
+def evaluate_strategies_in_batch(
+    candles_by_ticker,
+    previous_successful_strategies,
+    discord_bot: DiscordBot,
+    parallel_evaluator: ParallelStrategyEvaluator = None,
+):
+    if parallel_evaluator is not None:
+        evaluation = parallel_evaluator.evaluate(candles_by_ticker)
+    else:
+        evaluation = batch_strategy_evaluator.evaluate(CandleMatrix(candles_by_ticker))
+    for row, ticker in enumerate(candles_by_ticker.keys()):
+        report_strategies(
+            ticker,
+            {name: result[row] for name, result in evaluation.items()},
+            previous_successful_strategies,
+            discord_bot,
+        )
+
+
+def schedule_candle_refreshes(
+    scheduler: Scheduler,
+    candle_source: InMemoryStorage,
+    candle_cache: CandleCache,
+    tickers,
+    interval=TradeInterval.ONE_HOUR,
+):
+    # Each pair is fetched just after its candle closes, staggered so the
+    # requests drain at the rate the public budget refills. Every pair starts
+    # from the same current slot, and the watchlist is published once every
+    # pair of a slot has been fetched or missed.
+    spacing = (
+        KrakenPaths.CANDLE_INFO_PATH.cost_to_call / KrakenClient.PUBLIC_DECAY_PER_SECOND
+    )
+    period = interval.value * 60
+    first_slot = math.floor(scheduler.clock() / period) * period
+    latest_candles = {}
+    finished_by_slot = {}
+    lock = Lock()
+
+    def finish_slot(ticker, slot):
+        with lock:
+            finished = finished_by_slot.setdefault(slot, set())
+            finished.add(ticker)
+            if len(finished) < len(tickers):
+                return
+            # Older slots can no longer complete once a newer one has.
+            for finished_slot in [key for key in finished_by_slot if key <= slot]:
+                del finished_by_slot[finished_slot]
+            candles = MappingProxyType(dict(latest_candles))
+        candle_source.publish(candles)
+
+    def create_refresh(ticker):
+        def refresh(slot):
+            try:
+                latest_candles[ticker] = candle_cache.get_candle_data_for_ticker(
+                    ticker, interval=interval
                 )
+            finally:
+                finish_slot(ticker, slot)
+
+        return refresh
+
+    for index, ticker in enumerate(tickers):
+        scheduler.add_interval_job(
+            ("candles", ticker, interval),
+            interval,
+            create_refresh(ticker),
+            offset=DEFAULT_SETTLE_DELAY + index * spacing,
+            on_missed=functools.partial(finish_slot, ticker),
+            first_slot=first_slot,
+        )
+
+
+def create_snapshot_bus(
+    kraken_client: KrakenClient, tickers, scheduler: Scheduler, ledger: TradeLedger
+) -> SnapshotBus:
+    def fetch_positions():
+        # New trades are synced into the ledger, which folds them into positions.
+        update_disk_transactions(kraken_client, ledger)
+        return tuple(ledger.get_positions())
+
+    snapshot_bus = SnapshotBus()
+    ticker_source = snapshot_bus.add_source("tickers", kraken_client.get_ticker_data)
+    candle_source = snapshot_bus.add_source("candles", None)
+    position_source = snapshot_bus.add_source("positions", fetch_positions)
+
+    scheduler.add_job(
+        "tickers", 30, lambda slot: ticker_source.refresh(), start_now=True
+    )
+    scheduler.add_job(
+        "positions", 60, lambda slot: position_source.refresh(), start_now=True
+    )
+    schedule_candle_refreshes(
+        scheduler, candle_source, create_candle_cache(kraken_client), tickers
+    )
 
-            previous_successful_strategies[ticker] = successes
+    return snapshot_bus
 
-        time.sleep(300)
+
+def perform_strategies(
+    snapshot_bus: SnapshotBus,
+    discord_bot: DiscordBot,
+    parallel_evaluator: ParallelStrategyEvaluator = None,
+):
+    previous_successful_strategies = {}
+    version = 0
+    while snapshot := snapshot_bus.wait_for_version("candles", version):
+        version = snapshot.version
+        if len(snapshot.value) == 0:
+            continue
+        logging.info("Evaluating strategies")
+        try:
+            with SWEEP_DURATION.time(sweep="strategies"):
+                evaluate_strategies_in_batch(
+                    dict(snapshot.value),
+                    previous_successful_strategies,
+                    discord_bot,
+                    parallel_evaluator,
+                )
+        except Exception as e:
+            logging.error(f"Could not evaluate strategies: {e}")
 
 
 @add_delta_strategy
@@ -210,72 +448,203 @@ def significant_rate_of_change_in_volume_with_bullish_trajectory(
         )
 
 
-def transform_ticker_data(ticker_data: List[Ticker], tickers_in_scope: Set[str]):
-    return {
-        ticker.ticker: ticker
-        for ticker in ticker_data
-        if ticker.ticker in tickers_in_scope
-    }
+@add_batch_delta_strategy(significant_rate_of_change_in_volume_with_bullish_trajectory)
+def significant_rate_of_change_in_volume_with_bullish_trajectory_batch(
+    prev: MarketSnapshot, cur: MarketSnapshot
+):
+    diff = cur.volume_today - prev.volume_today
 
+    return (
+        (prev.volume_today != 0)
+        & (diff != 0)
+        & (diff / prev.volume_today > 0.05)
+        & (cur.last_trade_closed_price > prev.last_trade_closed_price)
+    )
 
-def perform_delta_strategies(
-    kraken_client: KrakenClient, discord_bot: DiscordBot, tickers_in_scope: Set[str]
+
+def evaluate_delta_strategies(
+    prev_ticker: Ticker, cur_ticker: Ticker, discord_bot: DiscordBot
 ):
-    interval = 30
-    previous_tickers = transform_ticker_data(
-        kraken_client.get_ticker_data(), tickers_in_scope
-    )
-    time.sleep(interval)
-    while True:
-        logging.info("Evaluating delta strategies")
-        current_tickers = transform_ticker_data(
-            kraken_client.get_ticker_data(), tickers_in_scope
+    results = [
+        (delta_strategy.__name__, delta_strategy(prev_ticker, cur_ticker))
+        for delta_strategy in delta_strategies
+    ]
+    successes = [result for result in results if result[1][0]]
+    if len(successes) > 0:
+        logging.info(f"Found successful delta strategies for {cur_ticker.ticker}")
+        discord_bot.send_basic_message(
+            "delta-strategies",
+            f"{cur_ticker.ticker} - {len(successes)} delta strategies in place - {[f'{result[0]}: {result[1][1]}' for result in successes]}",
         )
 
-        for ticker_name, cur_ticker in current_tickers.items():
-            prev_ticker = previous_tickers.get(ticker_name, None)
-            if not prev_ticker:
-                logging.error(f"{ticker_name} has no previous ticker")
-                continue
-
-            results = [
-                (delta_strategy.__name__, delta_strategy(prev_ticker, cur_ticker))
-                for delta_strategy in delta_strategies
-            ]
-            successes = [result for result in results if result[1][0]]
-            if len(successes) > 0:
-                logging.info(
-                    f"Found successful delta strategies for {cur_ticker.ticker}"
-                )
-                discord_bot.send_basic_message(
-                    "delta-strategies",
-                    f"{cur_ticker.ticker} - {len(successes)} delta strategies in place - {[f'{result[0]}: {result[1][1]}' for result in successes]}",
+
+def evaluate_market_delta_strategies(
+    prev_snapshot: MarketSnapshot, cur_snapshot: MarketSnapshot, discord_bot: DiscordBot
+):
+    for ticker_name in cur_snapshot.pairs:
+        if ticker_name not in prev_snapshot:
+            logging.error(f"{ticker_name} has no previous ticker")
+
+    prev_snapshot = prev_snapshot.take(cur_snapshot.pairs)
+    cur_snapshot = cur_snapshot.take(prev_snapshot.pairs)
+    results = evaluate_delta_strategies_in_batch(prev_snapshot, cur_snapshot)
+    hits = np.zeros(len(cur_snapshot), dtype=bool)
+    for result in results.values():
+        hits |= result
+
+    # Only pairs that hit a strategy are materialized as Ticker objects.
+    for row in np.nonzero(hits)[0]:
+        ticker_name = cur_snapshot.pairs[row]
+        evaluate_delta_strategies(
+            prev_snapshot.get_ticker(ticker_name),
+            cur_snapshot.get_ticker(ticker_name),
+            discord_bot,
+        )
+
+
+def perform_delta_strategies(
+    snapshot_bus: SnapshotBus, discord_bot: DiscordBot, tickers_in_scope: Set[str]
+):
+    previous = snapshot_bus.wait_for_version("tickers")
+    while previous and (
+        current := snapshot_bus.wait_for_version("tickers", previous.version)
+    ):
+        logging.info("Evaluating delta strategies")
+        try:
+            with SWEEP_DURATION.time(sweep="delta_strategies"):
+                evaluate_market_delta_strategies(
+                    previous.value.take(tickers_in_scope),
+                    current.value.take(tickers_in_scope),
+                    discord_bot,
                 )
+        except Exception as e:
+            logging.error(f"Could not evaluate delta strategies: {e}")
+
+        previous = current
+
+
+def stream_strategies(kraken_client: KrakenClient, discord_bot: DiscordBot, tickers):
+    previous_successful_strategies = {}
+    candle_cache = create_candle_cache(kraken_client)
+    stream = MarketStream(
+        kraken_client.get_websocket_names(set(tickers)),
+        candle_loader=candle_cache.get_candle_data_for_ticker,
+    )
 
-        previous_tickers = current_tickers
-        time.sleep(interval)
+    @stream.on_candle
+    def on_candle(ticker, candles):
+        with SWEEP_DURATION.time(sweep="stream_strategies"):
+            evaluate_strategies(
+                ticker, candles, previous_successful_strategies, discord_bot
+            )
+
+    @stream.on_ticker
+    def on_ticker(prev_ticker, cur_ticker):
+        with SWEEP_DURATION.time(sweep="stream_delta_strategies"):
+            evaluate_delta_strategies(prev_ticker, cur_ticker, discord_bot)
+
+    asyncio.run(stream.run())
+
+
+def run_scheduled_strategies(
+    kraken_client: KrakenClient,
+    discord_bot: DiscordBot,
+    tickers,
+    parallel_evaluator: ParallelStrategyEvaluator = None,
+):
+    # Runs until interrupted; the bus stopping is what ends both loops.
+    scheduler = Scheduler()
+    ledger = get_ledger()
+    snapshot_bus = create_snapshot_bus(kraken_client, tickers, scheduler, ledger)
+    analyzer = TradeAnalyzer(
+        kraken_client,
+        ledger,
+        PnlCsvWriter(str(resources.files("trader.local").joinpath("pnl_data.csv"))),
+    )
+    snapshot_bus.subscribe("tickers", analyzer.on_snapshot)
+    snapshot_bus.subscribe("positions", analyzer.on_positions)
+    threads = [
+        Thread(
+            target=perform_strategies,
+            args=[snapshot_bus, discord_bot, parallel_evaluator],
+            name="strategies",
+        ),
+        Thread(
+            target=perform_delta_strategies,
+            args=[snapshot_bus, discord_bot, set(tickers)],
+            name="delta-strategies",
+        ),
+    ]
+    for thread in threads:
+        thread.start()
+    scheduler.start()
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        logging.info("Stopping scheduled strategies")
+        scheduler.stop()
+        snapshot_bus.stop()
+        for thread in threads:
+            thread.join()
+        ledger.close()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert on strategy signals")
+    parser.add_argument(
+        "--mode",
+        choices=["stream", "scheduled"],
+        default="stream",
+        help="react to the WebSocket feed, or poll just after candles close",
+    )
+    parser.add_argument(
+        "--parallel-workers",
+        type=int,
+        default=0,
+        help="evaluate scheduled sweeps across this many worker processes",
+    )
+    args = parser.parse_args()
+    if args.parallel_workers > 0 and args.mode != "scheduled":
+        parser.error("--parallel-workers needs --mode scheduled")
+
+    # The worker pool is brought up before any thread of ours is started.
+    parallel_evaluator = None
+    if args.parallel_workers > 0:
+        parallel_evaluator = ParallelStrategyEvaluator(
+            args.parallel_workers, strategy_modules=("trader.trade_finder",)
+        )
+        parallel_evaluator.start()
+
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    # SIGTERM shuts down the same way as Ctrl-C.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
     kraken_client = KrakenClient(
         KrakenConfiguration.read_from_resource_file(
             "kraken_api.resources", "config.yaml"
         )
     )
     discord_bot = DiscordBot()
+    metrics_server = MetricsServer()
+    metrics_server.start()
+    # Also written to trader/local/metrics.prom on SIGUSR1.
+    dump_on_signal(str(resources.files("trader.local").joinpath("metrics.prom")))
     create_watchlist(kraken_client)
     with resources.open_text("local", "watchlist.csv") as watchlist_file:
         watchlist = csv.DictReader(watchlist_file)
         tickers = [row["ticker"] for row in watchlist]
 
-    strategy_thread = Thread(
-        target=perform_strategies, args=[kraken_client, discord_bot, tickers]
-    )
-    strategy_thread.start()
-
-    delta_strategies_thread = Thread(
-        target=perform_delta_strategies, args=[kraken_client, discord_bot, tickers]
-    )
-    delta_strategies_thread.start()
-    # perform_strategies(kraken_client, discord_bot, tickers)
+    try:
+        if args.mode == "scheduled":
+            run_scheduled_strategies(
+                kraken_client, discord_bot, tickers, parallel_evaluator
+            )
+        else:
+            stream_strategies(kraken_client, discord_bot, tickers)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        discord_bot.close()
+        metrics_server.stop()
+        if parallel_evaluator is not None:
+            parallel_evaluator.close()
@@ -1,62 +1,119 @@
+import atexit
 import csv
-from datetime import date
-from typing import List
+import weakref
+from typing import Dict, List, Tuple
 
-from model.trade import Trade
-from functools import reduce
-from itertools import chain
-from collections import defaultdict
+from trader.model.trade import Trade
 
 FILE_PATH = 'local/transaction_data.csv'
+FLUSH_SIZE = 100
+
+# Handlers with rows still buffered, flushed if the interpreter exits first.
+open_handlers = weakref.WeakSet()
+
+
+@atexit.register
+def flush_open_handlers():
+    for handler in list(open_handlers):
+        handler.flush()
 
 
 class TradeHandler:
+    # New trades are buffered and only written every flush_size rows. Use the
+    # handler as a context manager (or call flush) to write them promptly;
+    # rows still pending are otherwise written when the handler is collected
+    # or the interpreter exits, and are lost if the process is killed.
 
-    def __init__(self):
-        with open(FILE_PATH) as f:
+    def __init__(self, file_path=FILE_PATH, flush_size=FLUSH_SIZE):
+        self.file_path = file_path
+        self.flush_size = flush_size
+        self.trades: List[Trade] = []
+        # Trades grouped by (batch, positionType) in order of first appearance;
+        # a group is closed once it contains a SELL.
+        self.trades_by_group: Dict[Tuple[str, str], List[Trade]] = {}
+        self.closed_groups = set()
+        self.trades_by_batch: Dict[str, List[Trade]] = {}
+        self.open_groups_by_coin: Dict[str, Dict[Tuple[str, str], List[Trade]]] = {}
+        self.max_batch = 0
+        self.pending_rows = []
+
+        with open(file_path) as f:
             reader = csv.DictReader(f)
-            self.trades = list(Trade(row['batch'], row['coin'], row['eventType'],
-                               row['positionType'],row['date'], float(row['amount']), float(row['quantity'])) for row in reader)
+            for row in reader:
+                self.index_trade(Trade(row['batch'], row['coin'], row['eventType'],
+                                       row['positionType'], row['date'], float(row['amount']), float(row['quantity'])))
             self.columns = list(reader.fieldnames)
 
+    def index_trade(self, trade: Trade):
+        key = (trade.batch, trade.positionType)
+        self.trades.append(trade)
+        self.trades_by_batch.setdefault(trade.batch, []).append(trade)
+        self.trades_by_group.setdefault(key, []).append(trade)
+        self.max_batch = max(self.max_batch, int(trade.batch))
+
+        if key in self.closed_groups:
+            return
+        if trade.eventType == 'SELL':
+            self.closed_groups.add(key)
+            for coin in set(group_trade.coin for group_trade in self.trades_by_group[key]):
+                self.open_groups_by_coin.get(coin, {}).pop(key, None)
+        else:
+            self.open_groups_by_coin.setdefault(trade.coin, {}).setdefault(key, []).append(trade)
+
     def get_trades_for_coin_pair(self, coin_pair):
-        return [trade for trade in self.get_open_trades() if trade.coin == coin_pair]
-    
+        return [trade for trades in self.open_groups_by_coin.get(coin_pair, {}).values() for trade in trades]
+
+    def get_trades_for_batch(self, batch):
+        return list(self.trades_by_batch.get(str(batch), []))
+
     def get_new_batch(self):
-        return max(int(trade.batch) for trade in self.trades) + 1
-        
+        return self.max_batch + 1
+
     def add_trade(self, coin, eventType, positionType, date, amount, quantity):
         coin_pair = coin
         existing_trades = self.get_trades_for_coin_pair(coin_pair)
         if len(existing_trades) > 0:
             batch = existing_trades[0].batch
         else:
-            batch = self.get_new_batch()
-        with open(FILE_PATH, 'a') as out:
+            batch = str(self.get_new_batch())
+        self.index_trade(Trade(batch, coin, eventType, positionType, date, amount, quantity))
+        self.pending_rows.append({
+            'batch': batch,
+            'coin': coin,
+            'eventType': eventType,
+            'positionType': positionType,
+            'date': date,
+            'amount': amount,
+            'quantity': quantity
+        })
+        open_handlers.add(self)
+        if len(self.pending_rows) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.pending_rows) == 0:
+            return
+        with open(self.file_path, 'a') as out:
             dict_writer = csv.DictWriter(out, self.columns)
-            dict_writer.writerow({
-                'batch': batch,
-                'coin': coin,
-                'eventType': eventType,
-                'positionType': positionType,
-                'date': date,
-                'amount': amount,
-                'quantity': quantity
-            })
-    
+            dict_writer.writerows(self.pending_rows)
+        self.pending_rows = []
+        open_handlers.discard(self)
+
+    def __del__(self):
+        if len(getattr(self, 'pending_rows', [])) > 0:
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.flush()
+
     def get_open_trades(self):
-        return self.get_trades_with_criteria(lambda values: not any([trade.eventType == 'SELL' for trade in values]))
-    
+        return self.get_trades_with_criteria(lambda key: key not in self.closed_groups)
+
     def get_closed_trades(self) -> List[Trade]:
-        return self.get_trades_with_criteria(lambda values: any([trade.eventType == 'SELL' for trade in values]))
-    
-    def get_trades_with_criteria(self, criteria_for_trade_func):
-        def reduction_function(accumulator, element: Trade):
-            accumulator[(element.batch, element.positionType)].append(element)
-
-            return accumulator
-        
-        trades_by_batch = reduce(reduction_function, self.trades, defaultdict(list))
-        
-        return list(chain.from_iterable([values for values in trades_by_batch.values() if criteria_for_trade_func(values)]))
-        
\ No newline at end of file
+        return self.get_trades_with_criteria(lambda key: key in self.closed_groups)
+
+    def get_trades_with_criteria(self, criteria_for_group_func):
+        return [trade for key, trades in self.trades_by_group.items() if criteria_for_group_func(key) for trade in trades]
@@ -1,13 +1,17 @@
 from importlib import resources
 import csv
+import logging
 import time
 from typing import List
 from kraken_api.configuration.kraken_config import KrakenConfiguration
 from kraken_api.kraken_client import KrakenClient
 from kraken_api.model.trade_history_record import TradeHistoryRecord
 from trader.model.position import Position
+from trader.trades.ledger import SyncCursor, TradeLedger
 
 HEADERS = ["timestamp", "ticker", "type", "cost", "fee", "price", "quantity"]
+TRADES_HISTORY_CURSOR = "trades_history"
+TRADE_BATCH_SIZE = 500
 
 
 def get_open_transactions_from_disk() -> List[TradeHistoryRecord]:
@@ -29,67 +33,76 @@ def get_open_transactions_from_disk() -> List[TradeHistoryRecord]:
     ]
 
 
-def update_disk_transactions(client: KrakenClient):
-    current_transactions = get_open_transactions_from_disk()
-    last_recorded_time = max(
-        [transaction.timestamp for transaction in current_transactions] + [0]
-    )
+def get_ledger() -> TradeLedger:
+    ledger = TradeLedger(str(resources.files("local_files").joinpath("ledger.sqlite3")))
+    if len(ledger) == 0:
+        import_disk_transactions(ledger)
+    return ledger
+
+
+def import_disk_transactions(ledger: TradeLedger):
+    # transactions.csv predates the ledger and has no txids, so rows are keyed
+    # by their contents to keep the import idempotent.
+    if not resources.files("local_files").joinpath("transactions.csv").is_file():
+        return 0
+    records = get_open_transactions_from_disk()
+    for record in records:
+        record.txid = (
+            f"csv:{record.timestamp}:{record.ticker}:{record.type}:{record.quantity}"
+        )
+    return ledger.append(records)
 
-    now = time.time()
-    offset = 0
-    with resources.files("local_files").joinpath("transactions.csv").open(
-        "a"
-    ) as transaction_file:
-        writer = csv.DictWriter(transaction_file, HEADERS)
-        while (
-            len(
-                trade_records := client.get_trade_history(
-                    last_recorded_time, now, offset
-                )
-            )
-            != 0
-            and max(record.timestamp for record in trade_records) > last_recorded_time
-        ):
-            writer.writerows(
-                [
-                    {
-                        "timestamp": record.timestamp,
-                        "ticker": record.ticker,
-                        "cost": record.cost,
-                        "fee": record.fee,
-                        "type": record.type,
-                        "price": record.price,
-                        "quantity": record.quantity,
-                    }
-                    for record in trade_records
-                    if record.timestamp > last_recorded_time
-                ]
-            )
-            offset += 50
-
-
-def get_current_positions(client: KrakenClient) -> List[Position]:
-
-    trade_history_records = sorted(
-        get_open_transactions_from_disk(), key=lambda record: record.timestamp
+
+def iter_resumed_history(client: KrakenClient, cursor: SyncCursor):
+    # The page before the saved offset has to end with the last stored txid;
+    # if it doesn't, history shifted inside the window and offsets can no
+    # longer be trusted, so the window is synced again from the top.
+    if cursor.offset == 0 or cursor.last_txid is None:
+        yield from client.iter_trade_history(cursor.start, cursor.end, cursor.offset)
+        return
+
+    pages = client.iter_trade_history(cursor.start, cursor.end, cursor.offset - 1)
+    records, offset = next(pages, ([], cursor.offset))
+    if len(records) == 0 or records[0].txid != cursor.last_txid:
+        logging.warning(
+            f"Trade history changed since offset {cursor.offset}, syncing again"
+        )
+        yield from client.iter_trade_history(cursor.start, cursor.end, 0)
+        return
+    if len(records) > 1:
+        yield records[1:], offset
+    yield from pages
+
+
+def update_disk_transactions(
+    client: KrakenClient, ledger: TradeLedger, batch_size=TRADE_BATCH_SIZE
+):
+    # An unfinished sync resumes from its saved window and offset; a new one
+    # covers everything after the last stored trade up to now. The start is
+    # exclusive, so a refresh with nothing new writes nothing.
+    saved_cursor = ledger.get_cursor(TRADES_HISTORY_CURSOR)
+    cursor = saved_cursor or SyncCursor(
+        TRADES_HISTORY_CURSOR, ledger.get_last_timestamp() or 0, time.time(), 0, None
     )
+    if cursor.offset > 0:
+        logging.info(f"Resuming trade history sync at offset {cursor.offset}")
 
-    weighted_cost_by_ticker = {}
-    for record in trade_history_records:
-        total_cost, quantity = weighted_cost_by_ticker.get(record.ticker, (0, 0))
-        if record.type == "buy":
-            weighted_cost_by_ticker[record.ticker] = (
-                total_cost + record.price * record.quantity,
-                quantity + record.quantity,
-            )
-        else:
-            weighted_cost_by_ticker[record.ticker] = (
-                total_cost - total_cost * (record.quantity / quantity),
-                quantity - record.quantity,
-            )
+    batch = []
+    appended = False
+    for records, offset in iter_resumed_history(client, cursor):
+        batch.extend(record for record in records if record.timestamp > cursor.start)
+        cursor = cursor._replace(offset=offset, last_txid=records[-1].txid)
+        if len(batch) >= batch_size:
+            ledger.append(batch, cursor)
+            batch = []
+            appended = True
 
-    return [
-        Position(ticker, total_cost / quantity, quantity)
-        for ticker, (total_cost, quantity) in weighted_cost_by_ticker.items()
-        if abs(quantity) > 0.01
-    ]
+    if len(batch) > 0:
+        ledger.append(batch, cursor)
+        appended = True
+    if appended or saved_cursor is not None:
+        ledger.finish_sync(TRADES_HISTORY_CURSOR)
+
+
+def get_current_positions(ledger: TradeLedger) -> List[Position]:
+    return ledger.get_positions()
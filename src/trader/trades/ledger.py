@@ -0,0 +1,287 @@
+import sqlite3
+from collections import namedtuple
+from threading import RLock
+from typing import Dict, Iterable, List, Set
+
+from kraken_api.model.trade_history_record import TradeHistoryRecord
+from trader.model.position import Position
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    txid TEXT PRIMARY KEY,
+    time REAL NOT NULL,
+    pair TEXT NOT NULL,
+    type TEXT NOT NULL,
+    cost REAL NOT NULL,
+    fee REAL NOT NULL,
+    price REAL NOT NULL,
+    quantity REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_pair_time ON trades (pair, time);
+CREATE INDEX IF NOT EXISTS trades_time ON trades (time);
+CREATE TABLE IF NOT EXISTS positions (
+    pair TEXT PRIMARY KEY,
+    total_cost REAL NOT NULL,
+    quantity REAL NOT NULL,
+    last_time REAL NOT NULL,
+    realized_pnl REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    name TEXT PRIMARY KEY,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    offset INTEGER NOT NULL,
+    last_txid TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_pairs (
+    name TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    PRIMARY KEY (name, pair)
+);
+"""
+# Bumped whenever the way positions are folded from trades changes.
+POSITIONS_VERSION = 1
+# SQLite caps the number of bound parameters per statement.
+LOOKUP_CHUNK_SIZE = 500
+
+SyncCursor = namedtuple("SyncCursor", ["name", "start", "end", "offset", "last_txid"])
+
+
+def fold_trade(total_cost, quantity, record: TradeHistoryRecord):
+    # Quantities are signed, shorts being negative with a negative cost. A
+    # trade against the position first closes it at the average price, and
+    # whatever is left past zero opens a position the other way at its price.
+    signed_quantity = record.quantity if record.type == "buy" else -record.quantity
+    if quantity == 0 or (quantity > 0) == (signed_quantity > 0):
+        return (
+            total_cost + record.price * signed_quantity,
+            quantity + signed_quantity,
+            0.0,
+        )
+
+    direction = 1 if quantity > 0 else -1
+    closed = min(abs(signed_quantity), abs(quantity))
+    avg_price = total_cost / quantity
+    realized_pnl = (record.price - avg_price) * closed * direction
+    if closed == abs(quantity):
+        total_cost, quantity = 0.0, 0.0
+    else:
+        total_cost, quantity = (
+            total_cost - avg_price * closed * direction,
+            quantity - closed * direction,
+        )
+
+    remaining = abs(signed_quantity) - closed
+    if remaining > 0:
+        total_cost = -direction * record.price * remaining
+        quantity = -direction * remaining
+    return total_cost, quantity, realized_pnl
+
+
+def apply_trade(total_cost, quantity, record: TradeHistoryRecord):
+    return fold_trade(total_cost, quantity, record)[:2]
+
+
+def get_record(row) -> TradeHistoryRecord:
+    txid, timestamp, pair, trade_type, cost, fee, price, quantity = row
+    return TradeHistoryRecord(
+        timestamp, pair, trade_type, cost, fee, price, quantity, txid
+    )
+
+
+class TradeLedger:
+    def __init__(self, path):
+        self.path = path
+        self.lock = RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        columns = [
+            row[1] for row in self.connection.execute("PRAGMA table_info(positions)")
+        ]
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        with self.connection:
+            if "realized_pnl" not in columns:
+                self.connection.execute(
+                    "ALTER TABLE positions ADD realized_pnl REAL NOT NULL DEFAULT 0"
+                )
+            # Positions folded by an older version of fold_trade are replayed.
+            if version < POSITIONS_VERSION:
+                for (pair,) in self.connection.execute(
+                    "SELECT DISTINCT pair FROM trades"
+                ).fetchall():
+                    self.rebuild_position(pair)
+                self.connection.execute(f"PRAGMA user_version = {POSITIONS_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def get_last_timestamp(self):
+        with self.lock:
+            (last_timestamp,) = self.connection.execute(
+                "SELECT MAX(time) FROM trades"
+            ).fetchone()
+        return last_timestamp
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+
+    def get_existing_txids(self, txids: List[str]) -> Set[str]:
+        existing = set()
+        for start in range(0, len(txids), LOOKUP_CHUNK_SIZE):
+            chunk = txids[start : start + LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT txid FROM trades WHERE txid IN ({placeholders})", chunk
+            )
+            existing.update(txid for (txid,) in rows)
+        return existing
+
+    def append(
+        self, records: Iterable[TradeHistoryRecord], cursor: SyncCursor = None
+    ) -> int:
+        # Trades are keyed by txid, so re-ingesting a page is a no-op. Positions
+        # are folded forward as trades arrive; a trade older than a pair's last
+        # applied trade forces that pair to be replayed in time order. A sync
+        # cursor passed along is saved in the same transaction as the trades,
+        # along with the pairs they touched; their positions are left to
+        # finish_sync, since history pages arrive newest first and would
+        # otherwise replay the pair on every batch.
+        records = sorted(records, key=lambda record: record.timestamp)
+        with self.lock, self.connection:
+            seen = self.get_existing_txids([record.txid for record in records])
+            new_records = []
+            for record in records:
+                if record.txid not in seen:
+                    seen.add(record.txid)
+                    new_records.append(record)
+
+            self.connection.executemany(
+                "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        record.txid,
+                        record.timestamp,
+                        record.ticker,
+                        record.type,
+                        record.cost,
+                        record.fee,
+                        record.price,
+                        record.quantity,
+                    )
+                    for record in new_records
+                ),
+            )
+            if cursor is None:
+                self.update_positions(new_records)
+            else:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO sync_pairs VALUES (?, ?)",
+                    (
+                        (cursor.name, pair)
+                        for pair in {record.ticker for record in new_records}
+                    ),
+                )
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO sync_cursors VALUES (?, ?, ?, ?, ?)",
+                    cursor,
+                )
+
+        return len(new_records)
+
+    def update_positions(self, records: List[TradeHistoryRecord]):
+        positions = {}
+        stale_pairs = set()
+        for record in records:
+            if record.ticker not in positions:
+                positions[record.ticker] = self.connection.execute(
+                    "SELECT total_cost, quantity, last_time, realized_pnl "
+                    "FROM positions WHERE pair = ?",
+                    (record.ticker,),
+                ).fetchone() or (0.0, 0.0, float("-inf"), 0.0)
+            total_cost, quantity, last_time, realized_pnl = positions[record.ticker]
+            if record.timestamp < last_time:
+                stale_pairs.add(record.ticker)
+                continue
+            total_cost, quantity, trade_pnl = fold_trade(total_cost, quantity, record)
+            positions[record.ticker] = (
+                total_cost,
+                quantity,
+                record.timestamp,
+                realized_pnl + trade_pnl,
+            )
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?)",
+            (
+                (pair,) + position
+                for pair, position in positions.items()
+                if pair not in stale_pairs
+            ),
+        )
+        for pair in stale_pairs:
+            self.rebuild_position(pair)
+
+    def get_cursor(self, name) -> SyncCursor:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT name, start, end, offset, last_txid FROM sync_cursors "
+                "WHERE name = ?",
+                (name,),
+            ).fetchone()
+        return None if row is None else SyncCursor(*row)
+
+    def finish_sync(self, name):
+        # Every pair the sync inserted trades for is replayed once; a sync
+        # that found nothing new replays nothing.
+        with self.lock, self.connection:
+            pairs = self.connection.execute(
+                "SELECT pair FROM sync_pairs WHERE name = ?", (name,)
+            ).fetchall()
+            for (pair,) in pairs:
+                self.rebuild_position(pair)
+            self.connection.execute("DELETE FROM sync_pairs WHERE name = ?", (name,))
+            self.connection.execute("DELETE FROM sync_cursors WHERE name = ?", (name,))
+
+    def rebuild_position(self, pair):
+        total_cost, quantity, last_time, realized_pnl = 0.0, 0.0, float("-inf"), 0.0
+        for record in self.get_trades(pair):
+            total_cost, quantity, trade_pnl = fold_trade(total_cost, quantity, record)
+            realized_pnl += trade_pnl
+            last_time = record.timestamp
+        self.connection.execute(
+            "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?)",
+            (pair, total_cost, quantity, last_time, realized_pnl),
+        )
+
+    def get_trades(self, pair, start=None, end=None) -> List[TradeHistoryRecord]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT txid, time, pair, type, cost, fee, price, quantity FROM trades "
+                "WHERE pair = ? AND time >= ? AND time <= ? ORDER BY time, txid",
+                (
+                    pair,
+                    float("-inf") if start is None else start,
+                    float("inf") if end is None else end,
+                ),
+            ).fetchall()
+        return [get_record(row) for row in rows]
+
+    def get_positions(self, min_quantity=0.01) -> List[Position]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT pair, total_cost, quantity, realized_pnl FROM positions "
+                "WHERE ABS(quantity) > ?",
+                (min_quantity,),
+            ).fetchall()
+        return [
+            Position(pair, total_cost / quantity, quantity, realized_pnl)
+            for pair, total_cost, quantity, realized_pnl in rows
+        ]
+
+    def get_realized_pnl_by_pair(self) -> Dict[str, float]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT pair, realized_pnl FROM positions"
+            ).fetchall()
+        return dict(rows)
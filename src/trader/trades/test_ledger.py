@@ -0,0 +1,236 @@
+import random
+import unittest
+
+from kraken_api.configuration.kraken_config import KrakenConfiguration
+from kraken_api.kraken_client import KrakenClient
+from kraken_api.model.trade_history_record import TradeHistoryRecord
+from trader.trades.account_handler import (
+    TRADES_HISTORY_CURSOR,
+    update_disk_transactions,
+)
+from trader.trades.ledger import SyncCursor, TradeLedger, apply_trade
+
+
+def random_trades(rng: random.Random, num_trades):
+    return [
+        TradeHistoryRecord(
+            1700000000 + i * 60,
+            rng.choice(["XBTUSD", "ETHUSD", "SOLUSD"]),
+            "buy" if rng.random() < 0.7 else "sell",
+            0,
+            0,
+            rng.uniform(1, 100),
+            rng.uniform(0.1, 2),
+            f"T{i:05d}",
+        )
+        for i in range(num_trades)
+    ]
+
+
+def replay_positions(records):
+    positions = {}
+    for record in sorted(records, key=lambda record: record.timestamp):
+        positions[record.ticker] = apply_trade(
+            *positions.get(record.ticker, (0.0, 0.0)), record
+        )
+    return {
+        pair: (total_cost / quantity, quantity)
+        for pair, (total_cost, quantity) in positions.items()
+        if abs(quantity) > 0.01
+    }
+
+
+def record_rebuilds(ledger: TradeLedger):
+    rebuilt = []
+    rebuild_position = ledger.rebuild_position
+
+    def counting_rebuild(pair):
+        rebuilt.append(pair)
+        rebuild_position(pair)
+
+    ledger.rebuild_position = counting_rebuild
+    return rebuilt
+
+
+class PagedKrakenClient(KrakenClient):
+    def __init__(self, trades, page_size=50, fail_at_offset=None):
+        super().__init__(KrakenConfiguration())
+        self.trades = sorted(trades, key=lambda record: -record.timestamp)
+        self.page_size = page_size
+        self.fail_at_offset = fail_at_offset
+        self.offsets = []
+
+    def perform_request(self, path, params={}, payload={}, priority=None):
+        offset = payload["ofs"]
+        if offset == self.fail_at_offset:
+            raise Exception("connection lost")
+        self.offsets.append(offset)
+        page = self.trades[offset : offset + self.page_size]
+        return {
+            "trades": {
+                record.txid: {
+                    "time": record.timestamp,
+                    "pair": record.ticker,
+                    "type": record.type,
+                    "cost": record.cost,
+                    "fee": record.fee,
+                    "price": record.price,
+                    "vol": record.quantity,
+                }
+                for record in page
+            },
+            "count": len(self.trades),
+        }
+
+
+class TestTradeLedger(unittest.TestCase):
+    def assertPositionsEqual(self, ledger: TradeLedger, expected):
+        positions = {
+            position.ticker: (position.avg_price, position.quantity)
+            for position in ledger.get_positions()
+        }
+        self.assertEqual(positions.keys(), expected.keys())
+        for pair, (avg_price, quantity) in expected.items():
+            self.assertAlmostEqual(positions[pair][0], avg_price)
+            self.assertAlmostEqual(positions[pair][1], quantity)
+
+    def test_incremental_positions_match_full_replay(self):
+        trades = random_trades(random.Random(1), 300)
+        ledger = TradeLedger(":memory:")
+        for start in range(0, len(trades), 50):
+            ledger.append(trades[start : start + 50])
+
+        self.assertEqual(len(ledger), 300)
+        self.assertEqual(ledger.get_last_timestamp(), trades[-1].timestamp)
+        self.assertPositionsEqual(ledger, replay_positions(trades))
+
+    def test_reingesting_trades_does_not_duplicate(self):
+        trades = random_trades(random.Random(2), 100)
+        ledger = TradeLedger(":memory:")
+
+        self.assertEqual(ledger.append(trades), 100)
+        self.assertEqual(ledger.append(trades[40:60]), 0)
+        self.assertEqual(len(ledger), 100)
+        self.assertPositionsEqual(ledger, replay_positions(trades))
+
+    def test_out_of_order_trades_replay_the_pair(self):
+        trades = random_trades(random.Random(3), 200)
+        ledger = TradeLedger(":memory:")
+        ledger.append(trades[100:])
+        ledger.append(trades[:100])
+
+        self.assertPositionsEqual(ledger, replay_positions(trades))
+        xbt_trades = ledger.get_trades("XBTUSD")
+        self.assertEqual(
+            [trade.timestamp for trade in xbt_trades],
+            sorted(trade.timestamp for trade in xbt_trades),
+        )
+
+    def test_interrupted_sync_resumes_from_checkpoint(self):
+        trades = random_trades(random.Random(4), 400)
+        ledger = TradeLedger(":memory:")
+
+        with self.assertRaises(Exception):
+            update_disk_transactions(
+                PagedKrakenClient(trades, fail_at_offset=250), ledger, batch_size=100
+            )
+        self.assertEqual(ledger.get_cursor(TRADES_HISTORY_CURSOR).offset, 200)
+        self.assertEqual(len(ledger), 200)
+
+        client = PagedKrakenClient(trades)
+        update_disk_transactions(client, ledger, batch_size=100)
+
+        self.assertEqual(client.offsets[0], 199)
+        self.assertEqual(len(ledger), 400)
+        self.assertIsNone(ledger.get_cursor(TRADES_HISTORY_CURSOR))
+        self.assertPositionsEqual(ledger, replay_positions(trades))
+
+    def test_sync_replays_each_pair_once(self):
+        trades = random_trades(random.Random(5), 400)
+        ledger = TradeLedger(":memory:")
+        rebuilt = record_rebuilds(ledger)
+
+        update_disk_transactions(PagedKrakenClient(trades), ledger, batch_size=100)
+
+        self.assertEqual(sorted(rebuilt), ["ETHUSD", "SOLUSD", "XBTUSD"])
+        self.assertPositionsEqual(ledger, replay_positions(trades))
+
+    def test_sync_only_replays_pairs_it_inserted(self):
+        trades = random_trades(random.Random(7), 100)
+        ledger = TradeLedger(":memory:")
+        ledger.append(trades)
+        rebuilt = record_rebuilds(ledger)
+        cursor = SyncCursor("sync", trades[-1].timestamp, trades[-1].timestamp, 1, None)
+
+        ledger.append(trades[-1:], cursor)
+        ledger.finish_sync("sync")
+        self.assertEqual(rebuilt, [])
+
+        new_trade = TradeHistoryRecord(
+            trades[-1].timestamp + 60, "XBTUSD", "buy", 0, 0, 10, 1, "NEW"
+        )
+        ledger.append([new_trade], cursor)
+        ledger.finish_sync("sync")
+        self.assertEqual(rebuilt, ["XBTUSD"])
+        self.assertPositionsEqual(ledger, replay_positions(trades + [new_trade]))
+
+    def test_refresh_without_new_trades_writes_nothing(self):
+        trades = random_trades(random.Random(8), 200)
+        ledger = TradeLedger(":memory:")
+        update_disk_transactions(PagedKrakenClient(trades), ledger)
+        rebuilt = record_rebuilds(ledger)
+        appended = []
+        ledger.append = lambda records, cursor=None: appended.append(records)
+
+        # The mock ignores the window, so the stored trades all come back.
+        update_disk_transactions(PagedKrakenClient(trades), ledger)
+
+        self.assertEqual(rebuilt, [])
+        self.assertEqual(appended, [])
+        self.assertIsNone(ledger.get_cursor(TRADES_HISTORY_CURSOR))
+
+    def test_resume_restarts_when_history_shifted(self):
+        trades = random_trades(random.Random(6), 400)
+        ledger = TradeLedger(":memory:")
+        with self.assertRaises(Exception):
+            update_disk_transactions(
+                PagedKrakenClient(trades, fail_at_offset=250), ledger, batch_size=100
+            )
+
+        # A late trade inside the window moves every older trade down a slot.
+        late_trade = TradeHistoryRecord(
+            trades[300].timestamp + 1, "XBTUSD", "buy", 0, 0, 10, 1, "LATE"
+        )
+        client = PagedKrakenClient(trades + [late_trade])
+        update_disk_transactions(client, ledger, batch_size=100)
+
+        self.assertEqual(client.offsets[:2], [199, 0])
+        self.assertEqual(len(ledger), 401)
+        self.assertPositionsEqual(ledger, replay_positions(trades + [late_trade]))
+
+    def test_trades_crossing_zero_open_the_other_side(self):
+        ledger = TradeLedger(":memory:")
+        ledger.append(
+            [
+                TradeHistoryRecord(1, "XBTUSD", "buy", 100, 0, 100, 1, "T1"),
+                TradeHistoryRecord(2, "XBTUSD", "sell", 300, 0, 150, 2, "T2"),
+            ]
+        )
+        self.assertAlmostEqual(ledger.get_realized_pnl_by_pair()["XBTUSD"], 50)
+        self.assertPositionsEqual(ledger, {"XBTUSD": (150, -1)})
+
+        ledger.append(
+            [
+                TradeHistoryRecord(3, "XBTUSD", "buy", 240, 0, 120, 2, "T3"),
+                TradeHistoryRecord(4, "ETHUSD", "sell", 20, 0, 10, 2, "T4"),
+                TradeHistoryRecord(5, "ETHUSD", "buy", 8, 0, 8, 1, "T5"),
+            ]
+        )
+        realized_pnl = ledger.get_realized_pnl_by_pair()
+        self.assertAlmostEqual(realized_pnl["XBTUSD"], 50 + 30)
+        self.assertAlmostEqual(realized_pnl["ETHUSD"], 2)
+        self.assertPositionsEqual(ledger, {"XBTUSD": (120, 1), "ETHUSD": (10, -1)})
+
+
+if __name__ == "__main__":
+    unittest.main()